@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+
+def make_dataset(rows, cols=10, cardinality=100, null_fraction=0.05, seed=0):
+    """Synthetic frame mixing the column kinds the app handles.
+
+    About half the ``cols`` are floats (``num_*``), a quarter categorical
+    strings with ``cardinality`` distinct values (``cat_*``) and a quarter
+    free text such as ``"Intel Core i5 1.8GHz"`` (``text_*``), plus an
+    integer ``int_0`` and the targets ``target`` (binary) and ``amount``.
+    Float and categorical columns get ``null_fraction`` missing values.
+    """
+    rng = np.random.default_rng(seed)
+    n_text = max(1, cols // 4)
+    n_cat = max(1, cols // 4)
+    n_num = max(1, cols - n_text - n_cat)
+
+    data = {}
+    for i in range(n_num):
+        values = rng.normal(size=rows)
+        values[rng.random(rows) < null_fraction] = np.nan
+        data[f"num_{i}"] = values
+    data["int_0"] = rng.integers(0, 100, rows)
+
+    labels = np.array([f"c{k}" for k in range(cardinality)], dtype=object)
+    for i in range(n_cat):
+        # Half Zipf (a few very common values), half uniform over the long tail
+        codes = np.where(
+            rng.random(rows) < 0.5,
+            np.minimum(rng.zipf(1.5, rows) - 1, cardinality - 1),
+            rng.integers(0, cardinality, rows),
+        )
+        values = labels[codes]
+        values[rng.random(rows) < null_fraction] = None
+        data[f"cat_{i}"] = values
+
+    brands = np.array(["Intel Core", "AMD Ryzen", "Apple M"], dtype=object)
+    for i in range(n_text):
+        tier = rng.integers(3, 10, rows).astype(str).astype(object)
+        ghz = np.round(rng.uniform(1.0, 4.0, rows), 1).astype(str).astype(object)
+        data[f"text_{i}"] = (
+            brands[rng.integers(0, 3, rows)] + " i" + tier + " " + ghz + "GHz"
+        )
+
+    df = pd.DataFrame(data)
+    signal = df["num_0"].fillna(0) + (df["int_0"] > 50)
+    df["target"] = (signal + rng.normal(scale=0.5, size=rows) > 0.5).astype(int)
+    df["amount"] = 3 * signal + rng.normal(size=rows)
+    return df
@@ -0,0 +1,539 @@
+"""Benchmark the app's operations on synthetic data of growing size.
+
+    python -m benchmarks.run --rows 10000 100000 --cols 10 50 --cardinality 10 10000
+    python -m benchmarks.run --quick --baseline benchmarks/baseline.json
+
+Every case is timed (best of ``--repeat`` runs) and run once more under
+tracemalloc for its peak Python/NumPy allocation. Results go to a JSON
+file; with ``--baseline`` cases that got slower or hungrier than the
+threshold are listed and the exit code is 1.
+"""
+
+import argparse
+import ast
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Keep benchmark datasets out of the app's own store
+os.environ.setdefault("ML_APP_STORE_DIR", tempfile.mkdtemp(prefix="ml_app_bench_"))
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.datasets import make_dataset
+from utils import dataset_store as store
+from utils import plotting
+from utils.correlation import correlation_matrix
+from utils.ingest import read_chunked
+from utils.models import make_model, model_names
+from utils.pipeline import MAX_DENSE_CATEGORIES, apply_step, make_step
+from utils.profiling import profile_frame
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+GROUPS = [
+    "load",
+    "explore",
+    "cleaning",
+    "encoding",
+    "split",
+    "train",
+    "pages",
+    "startup",
+]
+# Groups that don't depend on the data size run once per run, not per size
+SIZE_INDEPENDENT = {"startup"}
+# SVMs scale quadratically; larger datasets are subsampled for them
+SVM_MAX_ROWS = 20_000
+
+CASES = []  # (group, name, function(ctx) -> callable or None)
+
+
+def case(group, name):
+    def register(func):
+        CASES.append((group, name, func))
+        return func
+
+    return register
+
+
+def step_case(group, name, op, **params):
+    # Fitting and applying a pipeline step is exactly what the page does
+    @case(group, name)
+    def run(ctx):
+        return lambda: apply_step(ctx["df"], make_step(op, ctx["df"], **params))
+
+
+# --- Load ---
+@case("load", "read_csv")
+def _(ctx):
+    return lambda: pd.read_csv(ctx["csv"])
+
+
+@case("load", "read_chunked")
+def _(ctx):
+    return lambda: read_chunked(ctx["csv"], chunksize=50_000)
+
+
+@case("load", "store_save_load")
+def _(ctx):
+    def run():
+        handle = store.save(ctx["df"])
+        store.load(handle)
+        store.delete(handle)
+
+    return run
+
+
+# --- Explore ---
+@case("explore", "describe")
+def _(ctx):
+    return lambda: ctx["df"].describe(include="all")
+
+
+@case("explore", "profile")
+def _(ctx):
+    return lambda: profile_frame(ctx["df"])
+
+
+@case("explore", "correlation")
+def _(ctx):
+    numeric = ctx["df"].select_dtypes("number")
+    return lambda: correlation_matrix(numeric, n_jobs=-1)
+
+
+@case("explore", "histogram_plot")
+def _(ctx):
+    values = ctx["df"]["num_0"]
+    return lambda: plotting.to_png(plotting.histogram(values))
+
+
+@case("explore", "value_counts_plot")
+def _(ctx):
+    values = ctx["df"]["cat_0"]
+    return lambda: plotting.to_png(
+        plotting.value_counts_bar(values.value_counts().head(20), "cat_0")
+    )
+
+
+# --- Cleaning ---
+step_case("cleaning", "remove_nulls", "remove_nulls", column="num_0")
+step_case("cleaning", "fill_nulls_mean", "fill_nulls", column="num_0", method="Mean")
+step_case("cleaning", "fill_nulls_mode", "fill_nulls", column="cat_0", method="Mode")
+step_case(
+    "cleaning", "remove_values", "remove_values", column="cat_0", values=["c0", "c1"]
+)
+step_case("cleaning", "to_numeric", "to_numeric", column="text_0")
+step_case("cleaning", "to_string", "to_string", column="num_0")
+step_case("cleaning", "drop_column", "drop_column", column="num_1")
+step_case(
+    "cleaning",
+    "replace_substring",
+    "replace_substring",
+    column="text_0",
+    old="GHz",
+    new="",
+)
+step_case(
+    "cleaning",
+    "apply_operation",
+    "apply_operation",
+    column="num_0",
+    expression="x * 2 + 1",
+)
+step_case(
+    "cleaning",
+    "apply_operation_str",
+    "apply_operation",
+    column="text_0",
+    expression="x.lower()",
+)
+step_case(
+    "cleaning", "rename_column", "rename_column", column="num_0", new_name="renamed"
+)
+step_case("cleaning", "optimize_dtypes", "optimize_dtypes")
+
+# --- Encoding ---
+step_case("encoding", "label_encode", "label_encode", column="cat_0")
+step_case("encoding", "ordinal_encode", "ordinal_encode", column="cat_0")
+step_case("encoding", "one_hot_sparse", "one_hot_sparse", column="cat_0")
+step_case(
+    "encoding",
+    "regex_extract",
+    "regex_extract",
+    column="text_0",
+    pattern=r"(\d+\.\d)GHz",
+    names=["ghz"],
+)
+step_case(
+    "encoding",
+    "split_delimiter",
+    "split_delimiter",
+    column="text_0",
+    delimiter=" ",
+    names=["brand", "rest"],
+)
+step_case(
+    "encoding",
+    "keyword_map",
+    "keyword_map",
+    column="text_0",
+    mapping={"Intel": "intel", "AMD": "amd"},
+    new_column="vendor",
+)
+
+
+@case("encoding", "one_hot_encode")
+def _(ctx):
+    if ctx["cardinality"] > MAX_DENSE_CATEGORIES:
+        return None  # refused by the dense guard
+    df = ctx["df"]
+    return lambda: apply_step(df, make_step("one_hot_encode", df, column="cat_0"))
+
+
+# --- Split ---
+@case("split", "train_test_split")
+def _(ctx):
+    from sklearn.model_selection import train_test_split
+
+    X, y = ctx["X"], ctx["df"]["target"]
+    return lambda: train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+@case("split", "index_split_5_folds")
+def _(ctx):
+    from utils.splits import holdout, kfold
+
+    y = ctx["df"]["target"].to_numpy()
+
+    def run():
+        train, _ = holdout(len(y), "Stratified", 0.2, 42, y)
+        kfold(train, 5, "Stratified", 42, y)
+
+    return run
+
+
+# --- Train ---
+def _train_case(task, name):
+    @case("train", name)
+    def run(ctx):
+        X, y = ctx["X"], ctx["df"]["target" if task == "Classification" else "amount"]
+        if "SVM" in name and len(X) > SVM_MAX_ROWS:
+            X, y = X.iloc[:SVM_MAX_ROWS], y.iloc[:SVM_MAX_ROWS]
+        return lambda: make_model(name).fit(X, y)
+
+
+for _task in ("Classification", "Regression"):
+    for _name in model_names(_task):
+        _train_case(_task, _name)
+
+
+# --- Pages (headless, via Streamlit's AppTest) ---
+def _page_case(prefix, name, setup=None):
+    @case("pages", name)
+    def run(ctx):
+        import glob
+
+        from streamlit.testing.v1 import AppTest
+
+        path = glob.glob(os.path.join(ctx["root"], "pages", prefix + "*.py"))[0]
+
+        def go():
+            at = AppTest.from_file(path, default_timeout=600)
+            at.session_state["dataset"] = ctx["handle"]
+            if setup is not None:
+                setup(at, ctx)
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+
+        return go
+
+
+def _with_split(at, ctx):
+    at.session_state["split"] = ctx["split"]
+
+
+_page_case("1_", "upload_and_explore")
+_page_case("2", "data_cleaning")
+_page_case("3", "feature_engineering")
+_page_case("4", "target_and_split")
+_page_case("5", "model_training", _with_split)
+
+
+# --- Startup (cold imports of each page in a fresh interpreter) ---
+# Self time a page's imports may add to Streamlit's and pandas'; a page over
+# the budget fails its case, so the run exits with status 1. Pages add a few
+# hundredths of a second today; the margin keeps slow or cold machines from
+# failing while still catching a heavy library imported at the top of a page
+IMPORT_BUDGET_SECONDS = 1.0
+BASE_IMPORTS = "import streamlit, pandas"
+
+
+def page_imports(path):
+    """The top-level import statements of a page, as code."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imports = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(n) for n in imports)
+
+
+def import_times(code, cwd):
+    """``{module: self seconds}`` of running ``code`` under ``python -X importtime``."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, module = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            times[module.strip()] = int(self_us) / 1e6
+    return times
+
+
+def _startup_case(path, name):
+    @case("startup", name)
+    def run(ctx):
+        code = page_imports(os.path.join(ctx["root"], path))
+        base = set(import_times(BASE_IMPORTS, ctx["root"]))
+
+        def go():
+            times = import_times(BASE_IMPORTS + "\n" + code, ctx["root"])
+            extra = {m: t for m, t in times.items() if m not in base}
+            total = sum(extra.values())
+            if total > IMPORT_BUDGET_SECONDS:
+                slowest = sorted(extra, key=extra.get, reverse=True)[:3]
+                raise RuntimeError(
+                    f"imports take {total:.2f}s over the {IMPORT_BUDGET_SECONDS}s "
+                    f"budget (slowest: {', '.join(slowest)})"
+                )
+
+        return go
+
+
+_startup_case("Home.py", "home_imports")
+_startup_case("pages/1_📂_Upload_and_Explore.py", "upload_and_explore_imports")
+_startup_case("pages/2🧹_Data_Cleaning.py", "data_cleaning_imports")
+_startup_case("pages/3⚙️_Feature_Engineering.py", "feature_engineering_imports")
+_startup_case("pages/4🎯_Target_and_Split.py", "target_and_split_imports")
+_startup_case("pages/5🤖_Model_Training.py", "model_training_imports")
+_startup_case("pages/6📦_Batch_Scoring.py", "batch_scoring_imports")
+_startup_case("pages/7🧮_Server_Memory.py", "server_memory_imports")
+
+
+# --- Measuring ---
+def measure(func, repeat=1):
+    """Best wall time of ``repeat`` runs and the peak traced memory in MB."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak / 1024**2
+
+
+def build_context(rows, cols, cardinality, workdir):
+    df = make_dataset(rows, cols, cardinality)
+    csv = os.path.join(workdir, f"data_{rows}_{cols}_{cardinality}.csv")
+    df.to_csv(csv, index=False)
+    features = [c for c in df.columns if c.startswith(("num_", "int_"))]
+    X = df[features].fillna(0)
+    ctx = {
+        "df": df,
+        "csv": csv,
+        "X": X,
+        "cardinality": cardinality,
+        "root": os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    }
+    return ctx
+
+
+def page_context(ctx):
+    from utils.splits import make_split
+
+    data = ctx["X"].assign(target=ctx["df"]["target"])
+    ctx["handle"] = store.save(ctx["df"])
+    ctx["split"] = make_split(
+        store.save(data, persistent=True), "target", ctx["X"].columns, n_folds=5
+    )
+
+
+def run_benchmarks(rows, cols, cardinalities, groups, repeat=1, only=None, log=print):
+    results = []
+    done = set()
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in rows:
+            for n_cols in cols:
+                for cardinality in cardinalities:
+                    ctx = build_context(n_rows, n_cols, cardinality, workdir)
+                    if "pages" in groups:
+                        page_context(ctx)
+                    for group, name, setup in CASES:
+                        if group not in groups or (only and name not in only):
+                            continue
+                        if group in SIZE_INDEPENDENT:
+                            if name in done:
+                                continue
+                            done.add(name)
+                        params = {
+                            "rows": n_rows,
+                            "cols": n_cols,
+                            "cardinality": cardinality,
+                        }
+                        row = {"group": group, "case": name, **params}
+                        try:
+                            func = setup(ctx)
+                            if func is None:
+                                continue
+                            row["seconds"], row["peak_mb"] = measure(func, repeat)
+                        except Exception as e:
+                            row["error"] = f"{type(e).__name__}: {e}"
+                        results.append(row)
+                        log(_format(row))
+    return results
+
+
+def _format(row):
+    where = f"rows={row['rows']:,} cols={row['cols']} card={row['cardinality']:,}"
+    if "error" in row:
+        return f"{row['group']:>9} {row['case']:<22} {where}  ERROR {row['error']}"
+    return (
+        f"{row['group']:>9} {row['case']:<22} {where}  "
+        f"{row['seconds']:9.3f}s {row['peak_mb']:9.1f} MB"
+    )
+
+
+# --- Baseline comparison ---
+def _key(row):
+    return (row["group"], row["case"], row["rows"], row["cols"], row["cardinality"])
+
+
+def compare(results, baseline, threshold=1.3, min_seconds=0.05, min_mb=1.0):
+    """Cases whose time or peak memory grew by more than ``threshold`` times.
+
+    Very fast or tiny cases are ignored: their noise is larger than the signal.
+    """
+    before = {_key(r): r for r in baseline["results"] if "error" not in r}
+    regressions = []
+    for row in results:
+        old = before.get(_key(row))
+        if old is None or "error" in row:
+            continue
+        if row["seconds"] > min_seconds and row["seconds"] > threshold * old["seconds"]:
+            regressions.append({**row, "metric": "seconds", "baseline": old["seconds"]})
+        if row["peak_mb"] > min_mb and row["peak_mb"] > threshold * old["peak_mb"]:
+            regressions.append({**row, "metric": "peak_mb", "baseline": old["peak_mb"]})
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--cols", type=int, nargs="+", default=[10])
+    parser.add_argument("--cardinality", type=int, nargs="+", default=[10, 10_000])
+    parser.add_argument(
+        "--groups",
+        nargs="+",
+        choices=GROUPS,
+        default=[g for g in GROUPS if g != "pages"],
+    )
+    parser.add_argument("--case", nargs="+", default=None, help="Only run these cases")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Small sizes and one timed run, for a fast smoke check",
+    )
+    parser.add_argument("--output", default=None, help="Results file (JSON)")
+    parser.add_argument(
+        "--baseline", default=None, help="Results file to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.3,
+        help="Flag cases this many times slower or larger than the baseline",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        default=None,
+        metavar="PATH",
+        help="Also write the results as the new baseline",
+    )
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.rows, args.cols, args.cardinality, args.repeat = [5_000], [10], [50], 1
+
+    results = run_benchmarks(
+        args.rows, args.cols, args.cardinality, args.groups, args.repeat, args.case
+    )
+    report = {"environment": environment(), "results": results}
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json")
+    )
+    for path in filter(None, [output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {output}")
+
+    failed = [r for r in results if "error" in r]
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for r in regressions:
+                unit = "s" if r["metric"] == "seconds" else " MB"
+                print(
+                    f"  {_format(r)}  ({r['metric']}: {r['baseline']:.3f}{unit} -> "
+                    f"{r[r['metric']]:.3f}{unit})"
+                )
+        else:
+            print(f"\nNo regressions against {args.baseline}")
+        return 1 if regressions or failed else 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
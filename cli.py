@@ -0,0 +1,154 @@
+# cli.py
+"""Headless entry points for the ML Workflow App.
+
+    python cli.py run-pipeline pipeline.json data/*.csv --out-dir processed
+    python cli.py score model.joblib data/*.parquet --out-dir scored
+"""
+import argparse
+import glob
+import sys
+
+from utils.batch import run_batch
+from utils.ingest import DEFAULT_CHUNKSIZE
+from utils.pipeline import Pipeline
+from utils.scoring import ModelBundle, score_files
+
+
+def _expand(patterns):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        files.extend(matches or [pattern])
+    return files
+
+
+def _checked(results):
+    # Clashing output paths are found before any file is processed
+    try:
+        yield from results
+    except ValueError as e:
+        yield {"input": "all inputs", "error": str(e)}
+
+
+def run_pipeline(args):
+    pipeline = Pipeline.load(args.pipeline)
+    files = _expand(args.inputs)
+    print(f"Running {len(pipeline)} steps over {len(files)} file(s)")
+
+    failed = 0
+    results = run_batch(
+        pipeline,
+        files,
+        args.out_dir,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        fmt=args.format,
+    )
+    for result in _checked(results):
+        if "error" in result:
+            failed += 1
+            print(f"FAILED {result['input']}: {result['error']}", file=sys.stderr)
+        else:
+            print(
+                f"{result['input']} -> {result['output']} "
+                f"({result['rows_in']:,} -> {result['rows_out']:,} rows, {result['seconds']:.1f}s)"
+            )
+    return 1 if failed else 0
+
+
+def score(args):
+    bundle = ModelBundle.load(args.model)
+    files = _expand(args.inputs)
+    print(f"Scoring {len(files)} file(s) with {bundle.model_name or 'model'}")
+
+    failed = 0
+    results = score_files(
+        args.model,
+        files,
+        args.out_dir,
+        fmt=args.format,
+        chunksize=args.chunksize,
+        workers=args.workers,
+        proba=args.proba,
+        keep=args.keep,
+    )
+    for result in _checked(results):
+        if "error" in result:
+            failed += 1
+            print(f"FAILED {result['input']}: {result['error']}", file=sys.stderr)
+        else:
+            print(
+                f"{result['input']} -> {result['output']} "
+                f"({result['rows_out']:,} rows, {result['seconds']:.1f}s)"
+            )
+            dropped = result["rows_in"] - result["rows_out"]
+            if dropped:
+                print(
+                    f"WARNING {result['input']}: {dropped:,} row(s) have no prediction; "
+                    f"dropped by {', '.join(bundle.row_filters())}",
+                    file=sys.stderr,
+                )
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser(
+        "run-pipeline", help="Replay an exported pipeline over input files"
+    )
+    p.add_argument("pipeline", help="Pipeline exported from the app (.json or .yaml)")
+    p.add_argument(
+        "inputs", nargs="+", help="Input files or glob patterns (CSV, Excel, Parquet)"
+    )
+    p.add_argument(
+        "--out-dir", default="processed", help="Directory for the output files"
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel processes (default: all cores)",
+    )
+    p.add_argument(
+        "--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk"
+    )
+    p.add_argument(
+        "--format", choices=["csv", "parquet"], default=None, help="Output format"
+    )
+    p.set_defaults(func=run_pipeline)
+
+    p = sub.add_parser("score", help="Score input files with a trained model")
+    p.add_argument("model", help="Model bundle downloaded from the app (.joblib)")
+    p.add_argument(
+        "inputs", nargs="+", help="Input files or glob patterns (CSV, Excel, Parquet)"
+    )
+    p.add_argument("--out-dir", default="scored", help="Directory for the output files")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Prediction processes (default: all cores)",
+    )
+    p.add_argument(
+        "--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk"
+    )
+    p.add_argument(
+        "--format", choices=["csv", "parquet"], default=None, help="Output format"
+    )
+    p.add_argument("--proba", action="store_true", help="Add class probability columns")
+    p.add_argument(
+        "--keep",
+        nargs="*",
+        default=[],
+        help="Input columns to copy into the output (e.g. an ID column)",
+    )
+    p.set_defaults(func=score)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
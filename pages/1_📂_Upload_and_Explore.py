@@ -1,73 +1,259 @@
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+
+from utils import dataset_store as store
+from utils import plotting
+from utils.correlation import correlation_matrix, downsample, top_pairs
+from utils.dtypes import memory_mb
+from utils.ingest import DEFAULT_CHUNKSIZE, read_chunked
+from utils.perf import finish_page, span, start_page
+from utils.profiling import profile_frame
+from utils.session import append_rows, get_handle, has_df, set_handle
 
 st.title("📂 Upload & Explore Data")
+start_page("Upload & Explore")
 
 
 # --- Cache loading function ---
-@st.cache_data
-def load_data(file):
-    if file.name.endswith(".csv"):
-        return pd.read_csv(file)
+@st.cache_data(show_spinner="Loading data...")
+def load_data(
+    file,
+    streaming=False,
+    chunksize=DEFAULT_CHUNKSIZE,
+    max_rows=None,
+    max_memory_mb=None,
+    sample=False,
+):
+    # Identical uploads (from any session) share one read-only stored copy
+    key = store.content_key(
+        file.getvalue(),
+        file.name,
+        streaming,
+        chunksize,
+        max_rows,
+        max_memory_mb,
+        sample,
+    )
+    handle, meta = store.find(key)
+    if handle is not None:
+        return handle, meta["size_mb"], meta["info"]
+
+    if not streaming:
+        if file.name.endswith(".csv"):
+            df, info = pd.read_csv(file), None
+        else:
+            df, info = pd.read_excel(file), None
+        size_mb = memory_mb(df)
+        return store.save_shared(df, key, size_mb=size_mb, info=info), size_mb, info
+
+    bar = st.progress(0.0, text="Reading file...")
+    df, info = read_chunked(
+        file,
+        chunksize=chunksize,
+        max_rows=max_rows,
+        max_memory_mb=max_memory_mb,
+        sample=sample,
+        progress=lambda frac, rows: bar.progress(frac, text=f"Read {rows:,} rows"),
+    )
+    bar.empty()
+    # Only the on-disk handle is cached; pages map the file on demand
+    size_mb = memory_mb(df)
+    return store.save_shared(df, key, size_mb=size_mb, info=info), size_mb, info
+
+
+# --- Cached profile, computed once per dataset version ---
+@st.cache_data(show_spinner="Profiling dataset...", max_entries=32)
+def profile_dataset(key, sample_rows, _handle):
+    return profile_frame(store.load(_handle), sample_rows=sample_rows)
+
+
+@st.cache_data(show_spinner="Computing correlations...", max_entries=16)
+def dataset_correlation(key, columns, sample_rows, _handle):
+    return correlation_matrix(
+        store.load(_handle, list(columns)), n_jobs=-1, sample_rows=sample_rows
+    )
+
+
+# --- Cached figures, rendered once per dataset version and plot parameters ---
+@st.cache_data(show_spinner="Plotting...", max_entries=64)
+def distribution_png(key, column, bins, _handle):
+    values = store.load(_handle, [column])[column]
+    if pd.api.types.is_numeric_dtype(values):
+        fig = plotting.histogram(values, bins=bins, kde=True)
     else:
-        return pd.read_excel(file)
+        fig = plotting.value_counts_bar(values.value_counts().head(20), column)
+    return plotting.to_png(fig)
+
+
+@st.cache_data(show_spinner="Plotting...", max_entries=16)
+def heatmap_png(key, columns, sample_rows, _corr):
+    if len(_corr) <= 20:
+        return plotting.to_png(plotting.correlation_heatmap(_corr)), len(_corr)
+    # Wide tables: clustered heatmap reduced to a readable size
+    shown = downsample(_corr, max_cells=60)
+    return plotting.to_png(plotting.correlation_heatmap(shown, annot=False)), len(shown)
 
 
 # --- File upload ---
 uploaded_file = st.file_uploader("Upload CSV or Excel file", type=["csv", "xlsx"])
 
+# --- Large file options ---
+with st.expander("⚙️ Large file options"):
+    streaming = st.checkbox(
+        "Streaming ingestion (read in chunks, compact dtypes)",
+        value=uploaded_file is not None and uploaded_file.size > 100 * 1024**2,
+    )
+    chunksize = st.number_input(
+        "Rows per chunk", min_value=1_000, value=DEFAULT_CHUNKSIZE, step=10_000
+    )
+    max_rows = st.number_input(
+        "Row cap (0 = no cap)", min_value=0, value=0, step=100_000
+    )
+    max_memory_mb = st.number_input(
+        "Memory cap in MB (0 = no cap)", min_value=0, value=0, step=256
+    )
+    sample = (
+        st.radio("When a cap is reached keep", ["First rows", "Random sample"])
+        == "Random sample"
+    )
+
 # --- Load if uploaded or reuse previous session state ---
 if uploaded_file is not None:
-    df = load_data(uploaded_file)
-    st.session_state["df"] = df
-elif "df" in st.session_state:
-    df = st.session_state["df"]
-else:
-    df = None
+    load_args = dict(
+        streaming=streaming,
+        chunksize=int(chunksize),
+        max_rows=int(max_rows) or None,
+        max_memory_mb=int(max_memory_mb) or None,
+        sample=sample,
+    )
+    with span("load_data"):
+        handle, size_mb, info = load_data(uploaded_file, **load_args)
+    if not store.exists(handle):
+        # The stored copy was swept; parse the upload again
+        load_data.clear()
+        handle, size_mb, info = load_data(uploaded_file, **load_args)
+    if info is not None:
+        st.caption(
+            f"Read {info['rows_read']:,} rows, kept {info['rows_kept']:,} "
+            f"({size_mb:.1f} MB in memory)"
+        )
+        if info["truncated"]:
+            kept = "a random sample" if info["mode"] == "sample" else "the first rows"
+            st.info(f"Row/memory cap reached — keeping {kept} of the file.")
+
+    # --- New dataset or new rows for the current one ---
+    appended = st.session_state.setdefault("appended_uploads", set())
+    if not has_df() or get_handle().key == handle.key:
+        set_handle(handle)
+    elif handle.key in appended:
+        st.caption(f"The rows of {uploaded_file.name} were appended to the dataset.")
+    else:
+        st.info(
+            "A dataset is already loaded: replace it, or add this file's rows to it."
+        )
+        col_replace, col_append = st.columns(2)
+        if col_replace.button("Replace the current dataset", key="replace_btn"):
+            set_handle(handle)
+            st.rerun()
+        if col_append.button("➕ Append rows to the current dataset", key="append_btn"):
+            try:
+                n = append_rows(
+                    store.load(handle), label=f"append {uploaded_file.name}"
+                )
+            except Exception as e:
+                st.error(f"Could not append the rows: {e}")
+            else:
+                appended.add(handle.key)
+                st.success(f"Appended {n:,} rows.")
+        st.caption(
+            "Appending replays the recorded cleaning and feature steps on the new "
+            "rows only, with the encoders fitted on the current data. An existing "
+            "split keeps its rows and splits the new ones the same way, and the "
+            "last trained model can then be updated with them."
+        )
 
 # --- Exploration section ---
-if df is not None:
-    st.subheader("Preview Data")
-    st.dataframe(df.head())
+# Each part only maps the columns it needs from the dataset store
+if has_df():
+    handle = get_handle()
 
-    st.subheader("Dataset Info")
-    st.write("Shape:", df.shape)
-    st.write(df.dtypes)
+    with span("preview and dtypes"):
+        st.subheader("Preview Data")
+        st.dataframe(store.head(handle))
+
+        st.subheader("Dataset Info")
+        st.write("Shape:", (handle.n_rows, len(handle.columns)))
+        dtypes = store.dtypes(handle)
+        st.write(dtypes.astype(str))
 
     st.subheader("Descriptive Statistics")
-    st.write(df.describe(include="all"))
+    approximate = st.checkbox(
+        "Approximate on a random sample (faster on large data)",
+        value=handle.n_rows > 1_000_000,
+    )
+    sample_rows = None
+    if approximate:
+        sample_rows = int(
+            st.number_input("Sample rows", min_value=1_000, value=100_000, step=10_000)
+        )
+    with span("describe (profile)"):
+        profile = profile_dataset(handle.key, sample_rows, handle)
+        st.write(profile)
+    meta = profile.attrs.get("meta", {})
+    caption = (
+        f"Single pass over {meta.get('profiled_rows', handle.n_rows):,} rows. "
+        f"Distinct counts are HyperLogLog estimates (±{100 * meta.get('distinct_error', 0):.1f}%)."
+    )
+    if meta.get("sampled"):
+        caption += " Sampled: ± columns are 95% error bounds; distinct counts are lower bounds."
+    st.caption(caption)
 
     st.subheader("Correlation Heatmap")
-    numeric_df = df.select_dtypes(include=["float64", "int64"])
-    if not numeric_df.empty:
-        corr = numeric_df.corr()
-        fig, ax = plt.subplots(figsize=(8, 5))
-        sns.heatmap(corr, annot=True, cmap="coolwarm", ax=ax)
-        st.pyplot(fig)
+    numeric_cols = [
+        c for c, t in dtypes.items() if pd.api.types.is_numeric_dtype(t) and t != bool
+    ]
+    if numeric_cols:
+        corr_sample = None
+        if handle.n_rows > 200_000 and st.checkbox(
+            "Estimate correlations on a 200,000-row sample", value=True
+        ):
+            corr_sample = 200_000
+        with span("correlation"):
+            corr = dataset_correlation(
+                handle.key, tuple(numeric_cols), corr_sample, handle
+            )
+
+        with span("heatmap plot", columns=len(corr)):
+            png, n_shown = heatmap_png(
+                handle.key, tuple(numeric_cols), corr_sample, corr
+            )
+            st.image(png, width="stretch")
+            if n_shown < len(corr):
+                st.caption(
+                    f"{len(corr)} columns clustered by |correlation| into {n_shown} x "
+                    f"{n_shown} blocks, each showing its strongest correlation; labels "
+                    "show the first column of each block."
+                )
+
+        if len(corr) > 2:
+            k = st.slider("Strongest pairs to list", 5, 100, 20)
+            st.dataframe(top_pairs(corr, k))
     else:
         st.info("No numeric columns available for correlation heatmap.")
 
     # --- Column Exploration ---
     st.subheader("🔎 Explore a Column")
-    col = st.selectbox("Choose a column to explore", df.columns)
+    col = st.selectbox("Choose a column to explore", handle.columns)
 
     if col:
         st.write(f"### Distribution of `{col}`")
 
-        if pd.api.types.is_numeric_dtype(df[col]):
-            fig, ax = plt.subplots()
-            sns.histplot(df[col].dropna(), bins=20, kde=True, ax=ax)
-            st.pyplot(fig)
-        else:
-            vc = df[col].value_counts().head(20)  # show top 20
-            fig, ax = plt.subplots(figsize=(8, 4))
-            sns.barplot(x=vc.index.astype(str), y=vc.values, ax=ax)
-            ax.set_ylabel("Count")
-            ax.set_xlabel(col)
-            ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
-            st.pyplot(fig)
+        # Numeric columns: histogram of all rows with a KDE fitted on a sample;
+        # others: the top 20 values
+        with span("distribution plot", column=col):
+            st.image(distribution_png(handle.key, col, 20, handle), width="stretch")
+
+finish_page()
 
 # if uploaded_file:
 #     if uploaded_file.name.endswith(".csv"):
@@ -1,12 +1,26 @@
 import streamlit as st
-import pandas as pd
+
+from utils.dtypes import memory_mb, memory_report
+from utils.expressions import Expression
+from utils.perf import finish_page, start_page
+from utils.session import df_head, get_df, get_handle, has_df, run_step
+from utils.widgets import pipeline_controls, undo_redo_controls
 
 st.title("🧹 Data Cleaning")
+start_page("Data Cleaning")
+
+
+# --- Frame memory, measured once per dataset version (text columns are scanned) ---
+@st.cache_data(show_spinner=False, max_entries=32)
+def frame_mb(key, _df):
+    return memory_mb(_df)
+
 
-if "df" not in st.session_state:
+if not has_df():
     st.warning("Please upload data first.")
 else:
-    df = st.session_state["df"].copy()
+    # Loaded fresh from the dataset store, so edits never touch the stored version
+    df = get_df()
 
     st.write("### Current DataFrame Preview")
     st.dataframe(df.head())
@@ -32,63 +46,144 @@ else:
             ],
         )
 
+        # --- Action parameters (shown before applying so they take effect) ---
+        if action == "Fill Nulls (Mean/Median/Mode)":
+            method = st.selectbox("Method", ["Mean", "Median", "Mode"])
+
+        elif action == "Remove Specific Values":
+            unique_vals = df[col].unique().tolist()
+            vals_to_remove = st.multiselect("Select values to remove:", unique_vals)
+
+        elif action == "Replace Substring":
+            old = st.text_input("Substring to replace (e.g., ',')", ",")
+            new = st.text_input("Replace with (e.g., '')", "")
+
+        elif action == "Apply Operation to Values":
+            operation = st.text_input(
+                "Enter operation (use `x` as the value). Example: x * 0.001",
+                help=(
+                    "Arithmetic, comparisons, and/or/not, `a if cond else b`, "
+                    "`x in ('a', 'b')`, math functions (abs, sqrt, log, exp, round, "
+                    "min, max, clip, where, isnull, fillna, int, float, str) and string "
+                    "methods (x.lower(), x.replace(',', ''), x.split('-')[0], len(x)). "
+                    'Other columns can be used by name or as col("Column name").'
+                ),
+            )
+            if operation:
+                # Live preview on the first rows; the expression is parsed once
+                try:
+                    preview = df.head(5)
+                    preview = preview.assign(
+                        result=Expression(operation, df.columns).evaluate(preview, col)
+                    )[[col, "result"]]
+                    st.dataframe(preview)
+                except Exception as e:
+                    st.error(f"Invalid operation: {e}")
+
+        elif action == "Rename Column":
+            new_name = st.text_input("Enter new column name", col)
+
         apply_btn = st.button("✅ Apply Operation on Column")
 
         if apply_btn:
+            # Every action is a recorded pipeline step, so it can be undone,
+            # exported and replayed on new files
+            label = f"{action} on {col}"
+
             if action == "Remove Nulls":
-                # df[col] = df[col].dropna()
-                df = df[df[col].notnull()]
+                df = run_step(df, "remove_nulls", label, column=col)
 
             elif action == "Fill Nulls (Mean/Median/Mode)":
-                method = st.selectbox("Method", ["Mean", "Median", "Mode"])
-                if method == "Mean" and pd.api.types.is_numeric_dtype(df[col]):
-                    df[col] = df[col].fillna(df[col].mean())
-                elif method == "Median" and pd.api.types.is_numeric_dtype(df[col]):
-                    df[col] = df[col].fillna(df[col].median())
-                else:
-                    df[col] = df[col].fillna(df[col].mode()[0])
+                df = run_step(df, "fill_nulls", label, column=col, method=method)
 
             elif action == "Remove Specific Values":
-                unique_vals = df[col].unique().tolist()
-                vals_to_remove = st.multiselect("Select values to remove:", unique_vals)
                 if vals_to_remove:
-                    df = df[~df[col].isin(vals_to_remove)]
+                    df = run_step(
+                        df, "remove_values", label, column=col, values=vals_to_remove
+                    )
 
             elif action == "Convert to Numeric":
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+                df = run_step(df, "to_numeric", label, column=col)
 
             elif action == "Convert to String":
-                df[col] = df[col].astype(str)
+                df = run_step(df, "to_string", label, column=col)
 
             elif action == "Drop Column":
-                df = df.drop(columns=[col])
+                df = run_step(df, "drop_column", label, column=col)
                 st.success(f"Column **{col}** has been dropped!")
 
             elif action == "Replace Substring":
-                old = st.text_input("Substring to replace (e.g., ',')", ",")
-                new = st.text_input("Replace with (e.g., '')", "")
                 if old:
-                    df[col] = df[col].astype(str).str.replace(old, new, regex=False)
+                    df = run_step(
+                        df, "replace_substring", label, column=col, old=old, new=new
+                    )
                     st.success(f"Replaced '{old}' with '{new}' in column {col}")
 
             elif action == "Apply Operation to Values":
-                operation = st.text_input(
-                    "Enter operation (use `x` as the value). Example: x * 0.001"
-                )
                 if operation:
                     try:
-                        df[col] = df[col].apply(lambda x: eval(operation, {"x": x}))
+                        df = run_step(
+                            df,
+                            "apply_operation",
+                            label,
+                            column=col,
+                            expression=operation,
+                        )
                         st.success(f"Applied operation `{operation}` on column {col}")
                     except Exception as e:
                         st.error(f"Error applying operation: {e}")
 
             elif action == "Rename Column":
-                new_name = st.text_input("Enter new column name", col)
-                if new_name:
-                    df = df.rename(columns={col: new_name})
-                    st.success(f"Column **{col}** renamed to **{new_name}**")
-
-            st.session_state["df"] = df
+                if new_name and new_name != col:
+                    try:
+                        df = run_step(
+                            df, "rename_column", label, column=col, new_name=new_name
+                        )
+                        st.success(f"Column **{col}** renamed to **{new_name}**")
+                    except Exception as e:
+                        st.error(f"Error renaming column: {e}")
+
+    # --- Optimize memory: compact dtypes for the whole frame ---
+    st.subheader("⚡ Optimize Memory")
+    st.caption(
+        "Downcasts integers, stores whole-number floats as (nullable) integers, "
+        "uses float32 where values survive it, and turns text into categories or "
+        f"Arrow-backed strings. The frame currently uses "
+        f"{frame_mb(get_handle().key, df):,.1f} MB."
+    )
+    col_ratio, col_float = st.columns(2)
+    category_ratio = col_ratio.slider(
+        "Make text a category when distinct values are at most this share of rows",
+        0.0,
+        1.0,
+        0.5,
+    )
+    lossy_floats = col_float.checkbox(
+        "Allow float32 rounding (about 7 significant digits)",
+        help="Otherwise float32 is only used when every value is unchanged.",
+    )
+    if st.button("⚡ Optimize memory", key="optimize_btn"):
+        before = df
+        df = run_step(
+            df,
+            "optimize_dtypes",
+            "Optimize memory",
+            category_ratio=category_ratio,
+            float_rtol=1e-6 if lossy_floats else 0.0,
+        )
+        report = memory_report(before, df)
+        saved = report["before MB"].sum() - report["after MB"].sum()
+        st.success(
+            f"{(report['before'] != report['after']).sum()} columns compacted, "
+            f"{saved:,.1f} MB saved ({report['before MB'].sum():,.1f} → "
+            f"{report['after MB'].sum():,.1f} MB)"
+        )
+        st.dataframe(report.round(2))
 
     st.subheader("Updated DataFrame")
-    st.dataframe(st.session_state["df"].head())
+    st.dataframe(df_head())
+
+    undo_redo_controls("cleaning")
+    pipeline_controls("cleaning")
+
+finish_page()
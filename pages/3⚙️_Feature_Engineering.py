@@ -1,17 +1,23 @@
-import streamlit as st
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder, OrdinalEncoder
+import streamlit as st
+
+from utils import text
+from utils.dtypes import is_text
+from utils.perf import finish_page, start_page
+from utils.pipeline import MAX_DENSE_CATEGORIES
+from utils.session import get_df, has_df, run_step
+from utils.widgets import pipeline_controls, undo_redo_controls
+
+start_page("Feature Engineering")
 
 # --- Initialize history ---
-if "df" not in st.session_state or st.session_state.df is None:
+if not has_df():
     st.warning("Please upload a dataset first in the Upload page.")
+    st.stop()
 else:
-    if "history" not in st.session_state:
-        st.session_state.history = []
-
     st.title("🔧 Feature Engineering")
 
-    df = st.session_state.df.copy()
+    df = get_df()
 
     # --- Preview Data Section ---
     st.subheader("📊 Data Preview")
@@ -39,25 +45,59 @@ else:
             ["Label Encoding", "One-Hot Encoding", "Ordinal Encoding"],
         )
 
+        if encoding_method == "One-Hot Encoding":
+            n_unique = df[col_to_encode].nunique()
+            sparse_onehot = st.checkbox(
+                "Sparse encoding (keeps one column of codes, expanded when training)",
+                value=n_unique > 100,
+                help=f"{col_to_encode} has {n_unique:,} distinct values. Dense "
+                f"one-hot is limited to {MAX_DENSE_CATEGORIES:,} categories.",
+            )
+            if sparse_onehot:
+                col_min, col_max = st.columns(2)
+                min_frequency = col_min.number_input(
+                    "Bucket categories seen fewer than N times", min_value=1, value=1
+                )
+                max_categories = col_max.number_input(
+                    "Keep at most this many categories (0 = all)",
+                    min_value=0,
+                    value=min(n_unique, 10_000),
+                    step=100,
+                )
+
         if st.button("Apply Encoding"):
-            # Save history
-            st.session_state.history.append(df.copy())
+            label = f"{encoding_method} on {col_to_encode}"
 
             if encoding_method == "Label Encoding":
-                le = LabelEncoder()
-                df[col_to_encode + "_encoded"] = le.fit_transform(df[col_to_encode])
+                df = run_step(df, "label_encode", label, column=col_to_encode)
                 st.success(f"Applied Label Encoding on {col_to_encode}")
 
+            elif encoding_method == "One-Hot Encoding" and sparse_onehot:
+                df = run_step(
+                    df,
+                    "one_hot_sparse",
+                    f"Sparse {label}",
+                    column=col_to_encode,
+                    min_frequency=min_frequency,
+                    max_categories=max_categories or None,
+                )
+                n_categories = len(df[col_to_encode].cat.categories)
+                st.success(
+                    f"Applied sparse One-Hot Encoding on {col_to_encode} "
+                    f"({n_categories:,} categories)"
+                )
+
             elif encoding_method == "One-Hot Encoding":
-                df = pd.get_dummies(df, columns=[col_to_encode], prefix=col_to_encode)
-                st.success(f"Applied One-Hot Encoding on {col_to_encode}")
+                try:
+                    df = run_step(df, "one_hot_encode", label, column=col_to_encode)
+                    st.success(f"Applied One-Hot Encoding on {col_to_encode}")
+                except ValueError as e:
+                    st.error(str(e))
 
             elif encoding_method == "Ordinal Encoding":
-                oe = OrdinalEncoder()
-                df[col_to_encode + "_ordinal"] = oe.fit_transform(df[[col_to_encode]])
+                df = run_step(df, "ordinal_encode", label, column=col_to_encode)
                 st.success(f"Applied Ordinal Encoding on {col_to_encode}")
 
-            st.session_state.df = df
             st.dataframe(df.head())
     else:
         st.info("No categorical columns available for encoding.")
@@ -72,35 +112,27 @@ else:
 
     if st.button("Split Column"):
         try:
-            # Save history
-            st.session_state.history.append(df.copy())
-
-            new_cols = df[split_col].astype(str).str.split(delimiter, n=1, expand=True)
-            if new_cols.shape[1] == 2:
-                df[split_col + "_part1"] = new_cols[0]
-                df[split_col + "_part2"] = new_cols[1]
-                st.success(f"Split {split_col} into two new columns.")
-                st.session_state.df = df
-                st.dataframe(df.head())
-            else:
-                st.error("Could not split column into 2 parts. Check delimiter.")
+            df = run_step(
+                df,
+                "split_column",
+                f"Split {split_col}",
+                column=split_col,
+                delimiter=delimiter,
+            )
+            st.success(f"Split {split_col} into two new columns.")
+            st.dataframe(df.head())
         except Exception as e:
             st.error(f"Error: {e}")
 
     st.markdown("---")
 
-    # --- Undo Option ---
-    if st.button("Undo Last Operation"):
-        if st.session_state.history:
-            st.session_state.df = st.session_state.history.pop()
-            st.success("Undid last operation.")
-            st.dataframe(st.session_state.df.head())
-        else:
-            st.info("No operations to undo.")
+    # --- Undo / Redo ---
+    undo_redo_controls("feature_engineering")
+    pipeline_controls("feature_engineering")
 
 st.subheader("🔧 Advanced Feature Extraction from Text Columns")
 
-text_cols = df.select_dtypes(include=["object"]).columns.tolist()
+text_cols = [c for c in df.columns if is_text(df[c])]
 if text_cols:
     col_to_extract = st.selectbox(
         "Select a text column", text_cols, key="text_col_extract"
@@ -112,6 +144,24 @@ if text_cols:
         key="extract_method",
     )
 
+    # Previews run on a small sample; the full column is only processed on
+    # Apply, in chunks across processes for large columns
+    sample = text.preview(df[col_to_extract])
+
+    def show_preview(result):
+        st.caption(
+            f"Preview on {len(sample)} rows · "
+            f"{result.notna().any(axis=1).mean():.0%} produce a value"
+        )
+        st.dataframe(pd.concat([sample, result], axis=1).head(10))
+
+    def check_names(names):
+        clashes = [n for n in names if n in df.columns]
+        if clashes:
+            raise ValueError(f"Columns already exist: {', '.join(clashes)}")
+        if len(set(names)) != len(names) or not all(names):
+            raise ValueError("New column names must be unique and non-empty")
+
     if extraction_method == "Regex Extract":
         # Regex tips expander
         with st.expander("💡 Regex Tips & Examples"):
@@ -133,19 +183,113 @@ if text_cols:
         )
         new_col_names = [x.strip() for x in new_col_names.split(",")]
 
-        if st.button("Apply Regex Extraction", key="regex_extract_btn"):
+        if regex_pattern:
             try:
-                st.session_state.history.append(df.copy())
-                matches = df[col_to_extract].str.extract(regex_pattern)
-                if matches.shape[1] != len(new_col_names):
-                    st.error(
-                        "Number of groups does not match number of new column names"
+                groups = text.compile_pattern(regex_pattern).groups
+                names = (
+                    new_col_names
+                    if len(new_col_names) == groups and all(new_col_names)
+                    else [f"group_{i + 1}" for i in range(groups)]
+                )
+                if groups == 0:
+                    st.warning(
+                        "The pattern has no groups `()`, so nothing is extracted."
                     )
                 else:
-                    matches.columns = new_col_names
-                    df = pd.concat([df, matches], axis=1)
-                    st.session_state.df = df
-                    st.success("Regex extraction applied!")
-                    st.dataframe(df.head())
+                    show_preview(text.extract(sample, regex_pattern, names))
+            except ValueError as e:
+                st.error(str(e))
+
+        if st.button("Apply Regex Extraction", key="regex_extract_btn"):
+            try:
+                check_names(new_col_names)
+                df = run_step(
+                    df,
+                    "regex_extract",
+                    f"Regex extract on {col_to_extract}",
+                    column=col_to_extract,
+                    pattern=regex_pattern,
+                    names=new_col_names,
+                )
+                st.success("Regex extraction applied!")
+                st.dataframe(df.head())
             except Exception as e:
                 st.error(f"Error: {e}")
+
+    elif extraction_method == "Split by Delimiter":
+        split_delim = st.text_input("Delimiter", " ", key="split_delim")
+        split_names = st.text_input(
+            "New column names separated by comma (one per part; the last keeps the rest)",
+            f"{col_to_extract}_1, {col_to_extract}_2",
+            key="split_new_cols",
+        )
+        split_names = [x.strip() for x in split_names.split(",")]
+
+        try:
+            show_preview(text.split(sample, split_delim, split_names))
+        except ValueError as e:
+            st.error(str(e))
+
+        if st.button("Apply Split", key="split_delim_btn"):
+            try:
+                check_names(split_names)
+                df = run_step(
+                    df,
+                    "split_delimiter",
+                    f"Split {col_to_extract} on {split_delim!r}",
+                    column=col_to_extract,
+                    delimiter=split_delim,
+                    names=split_names,
+                )
+                st.success(f"Split {col_to_extract} into {len(split_names)} columns.")
+                st.dataframe(df.head())
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+    else:  # Keyword Mapping
+        mapping_text = st.text_area(
+            "Keywords, one `keyword: label` per line (first match wins)",
+            "Intel: Intel\nAMD: AMD",
+            key="keyword_mapping",
+        )
+        col_name, col_default = st.columns(2)
+        mapped_name = col_name.text_input(
+            "New column name", f"{col_to_extract}_mapped", key="keyword_new_col"
+        )
+        default_label = col_default.text_input(
+            "Label when nothing matches (empty = null)", "", key="keyword_default"
+        )
+        case_sensitive = st.checkbox("Case sensitive", key="keyword_case")
+
+        try:
+            mapping = text.parse_mapping(mapping_text)
+            show_preview(
+                text.keyword_map(
+                    sample, mapping, mapped_name, default_label or None, case_sensitive
+                )
+            )
+        except ValueError as e:
+            mapping = None
+            st.error(str(e))
+
+        if st.button(
+            "Apply Keyword Mapping", key="keyword_map_btn", disabled=not mapping
+        ):
+            try:
+                check_names([mapped_name])
+                df = run_step(
+                    df,
+                    "keyword_map",
+                    f"Keyword mapping on {col_to_extract}",
+                    column=col_to_extract,
+                    mapping=mapping,
+                    new_column=mapped_name,
+                    default=default_label or None,
+                    case=case_sensitive,
+                )
+                st.success(f"Created {mapped_name} from {len(mapping)} keywords.")
+                st.dataframe(df.head())
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+finish_page()
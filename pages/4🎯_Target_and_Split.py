@@ -1,20 +1,25 @@
 import streamlit as st
-from sklearn.model_selection import train_test_split
 
-if "df" not in st.session_state or st.session_state.df is None:
+from utils.perf import finish_page, start_page
+from utils.session import df_columns, get_df, has_df, set_split
+from utils.splits import METHODS
+
+start_page("Target & Split")
+
+if not has_df():
     st.warning("Please upload data first.")
 else:
     st.title("📊 Split Train/Test")
 
-    df = st.session_state.df.copy()
+    columns = df_columns()
 
     # Select target variable
-    target_col = st.selectbox("Select target column", df.columns)
+    target_col = st.selectbox("Select target column", columns)
 
     # Select features (optional)
     feature_cols = st.multiselect(
         "Select feature columns (default: all except target)",
-        [c for c in df.columns if c != target_col],
+        [c for c in columns if c != target_col],
     )
 
     # Test size
@@ -27,27 +32,76 @@ else:
         "Random state (for reproducibility)", value=42, step=1
     )
 
+    # Split method
+    method = st.selectbox(
+        "Split method",
+        METHODS,
+        help=(
+            "Stratified keeps the class proportions of the target, Group keeps all "
+            "rows of a group on the same side, Time series tests on the latest rows."
+        ),
+    )
+    others = [c for c in columns if c != target_col]
+    group_col = order_col = None
+    if method == "Group":
+        group_col = st.selectbox("Group column", others)
+    elif method == "Time series":
+        order_col = st.selectbox("Order rows by", ["(row order)"] + others)
+        if order_col == "(row order)":
+            order_col = None
+
+    n_folds = st.number_input(
+        "Cross-validation folds on the training set (0 = none)",
+        min_value=0,
+        max_value=20,
+        value=5,
+        help="Only the row indices of each fold are stored.",
+    )
+
     # --- Submit Button ---
     if st.button("Submit Split", key="submit_split_btn"):
         try:
-            X = df[feature_cols] if feature_cols else df.drop(columns=[target_col])
-            y = df[target_col]
+            # Only map the columns the split method needs; the frames themselves
+            # are selected from the dataset by row index when training
+            needed = [c for c in (target_col, group_col, order_col) if c]
+            df = get_df(columns=needed)
+            if n_folds == 1:
+                raise ValueError("Cross-validation needs at least 2 folds")
 
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=random_state
+            split = set_split(
+                target_col,
+                feature_cols or others,
+                method=method,
+                test_size=test_size,
+                random_state=int(random_state),
+                n_folds=int(n_folds),
+                y=df[target_col].to_numpy(),
+                groups=df[group_col].to_numpy() if group_col else None,
+                order=df[order_col].to_numpy() if order_col else None,
+                group_column=group_col,
+                order_column=order_col,
             )
 
-            # Save in session state
-            st.session_state["X_train"] = X_train
-            st.session_state["X_test"] = X_test
-            st.session_state["y_train"] = y_train
-            st.session_state["y_test"] = y_test
-
             st.success("Train/Test split completed!")
-            st.write("X_train shape:", X_train.shape)
-            st.write("X_test shape:", X_test.shape)
-            st.write("y_train shape:", y_train.shape)
-            st.write("y_test shape:", y_test.shape)
+            n_features = len(split["features"])
+            st.write("X_train shape:", (len(split["train"]), n_features))
+            st.write("X_test shape:", (len(split["test"]), n_features))
+            st.write("y_train shape:", (len(split["train"]),))
+            st.write("y_test shape:", (len(split["test"]),))
+            if split["folds"]:
+                st.write(
+                    f"{len(split['folds'])} cross-validation folds, validation sizes:",
+                    [len(validate) for _, validate in split["folds"]],
+                )
+            sparse = split["sparse"]
+            if sparse:
+                st.info(
+                    f"Sparse one-hot columns ({', '.join(sparse)}) stay as category "
+                    "codes in the split and "
+                    "are one-hot encoded as a sparse matrix at training time."
+                )
 
         except Exception as e:
             st.error(f"Error splitting data: {e}")
+
+finish_page()
@@ -1,108 +1,464 @@
+import json
+import os
+import time
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-
-from sklearn.linear_model import LogisticRegression, LinearRegression
-from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.svm import SVC, SVR
-from sklearn.metrics import (
-    accuracy_score,
-    classification_report,
-    confusion_matrix,
-    mean_squared_error,
-    r2_score,
-)
-
-# Optional: XGBoost
-try:
-    from xgboost import XGBClassifier, XGBRegressor
-
-    xgb_available = True
-except:
-    xgb_available = False
+
+from utils import jobs, model_cache, plotting
+from utils.leaderboard import cross_validate, run_leaderboard, score
+from utils.models import can_update, make_model, model_names
+from utils.perf import finish_page, span, start_page
+from utils.session import get_split, has_split, session_id, set_model
+from utils.splits import is_valid, materialize
+from utils.tuning import SEARCH_SPACES, hyperband
 
 st.title("🤖 Model Training & Evaluation")
+start_page("Model Training")
+
+
+def job_panel(key):
+    """This session's training jobs; refreshes itself while any is unfinished."""
+    active = any(not job.finished for job in jobs.jobs(session_id()))
+    st.fragment(_job_list, run_every=1.0 if active else None)(key, active)
+
+
+def _job_list(key, active):
+    mine = jobs.jobs(session_id())
+    if not mine:
+        return
+    st.subheader("Training jobs")
+    for job in reversed(mine):
+        col_info, col_button = st.columns([4, 1])
+        text = f"**{job.label}** · {job.status} · {job.elapsed:.0f}s"
+        if job.status == "running" and job.progress is not None:
+            col_info.progress(min(1.0, job.progress), text=f"{text} · {job.message}")
+        elif job.status == "running":
+            col_info.write(f"{text} · {job.message} (this model reports no progress)")
+        else:
+            col_info.write(f"{text} {job.error}")
+        if job.finished:
+            col_button.button(
+                "Dismiss",
+                key=f"{key}_dismiss_{job.id}",
+                on_click=jobs.forget,
+                args=(job.id,),
+            )
+        else:
+            col_button.button(
+                "Cancel",
+                key=f"{key}_cancel_{job.id}",
+                on_click=jobs.cancel,
+                args=(job.id,),
+            )
+
+    job = jobs.get(st.session_state.get("train_job"))
+    shown = st.session_state.get("shown_job")
+    if job is not None and job.finished and shown != job.id:
+        # Show the results with the rest of the page
+        st.rerun()
+    if active and all(j.finished for j in mine):
+        # Stop refreshing
+        st.rerun()
+
+
+def leaderboard_frame(rows, task_type):
+    board = pd.DataFrame(rows).set_index("model")
+    metric = "accuracy" if task_type == "Classification" else "R²"
+    if metric in board:
+        board = board.sort_values(metric, ascending=False, na_position="last")
+    return board
+
 
 # Check if data is ready
-if "X_train" not in st.session_state:
+if not has_split():
     st.warning("Please split the data first.")
 else:
-    X_train, X_test = st.session_state["X_train"], st.session_state["X_test"]
-    y_train, y_test = st.session_state["y_train"], st.session_state["y_test"]
-
     # Ask user whether it's classification or regression
     task_type = st.radio("Task Type", ["Classification", "Regression"], index=0)
 
     # Models per task
-    if task_type == "Classification":
-        models = ["Logistic Regression", "Decision Tree", "Random Forest", "SVM"]
-        if xgb_available:
-            models.append("XGBoost")
+    models = model_names(task_type)
+
+    sparse = st.session_state["split"].get("sparse")
+    if sparse:
+        st.caption(
+            f"Sparse one-hot columns: {', '.join(sparse)}. Logistic/linear models, "
+            "linear SVM and XGBoost train on a sparse matrix; the other models "
+            "use the category codes."
+        )
+
+    mode = st.radio(
+        "Mode",
+        [
+            "Single model",
+            "Leaderboard (train several at once)",
+            "Cross-validation",
+            "Tune hyperparameters",
+        ],
+        horizontal=True,
+    )
+
+    if mode == "Single model":
+        model_choice = st.selectbox("Choose Model", models)
+
+        # --- Rows appended since the last model was trained ---
+        split = st.session_state["split"]
+        last = st.session_state.get("last_model")
+        update = False
+        if (
+            split.get("new_from") is not None
+            and last
+            and last["fingerprint"] == split["base_fingerprint"]
+            and (last["task"], last["model"]) == (task_type, model_choice)
+        ):
+            n_new = int((split["train"] >= split["new_from"]).sum())
+            if can_update(make_model(model_choice)):
+                update = st.checkbox(
+                    f"Update the trained model with the {n_new:,} new training rows "
+                    "instead of refitting it on all rows",
+                    value=n_new > 0,
+                    key="update_model",
+                )
+            else:
+                st.caption(
+                    f"{model_choice} can't be updated incrementally; training refits "
+                    f"it on all rows, including the {n_new:,} new ones."
+                )
+
+        # Training runs in a background process, so it survives reruns and page
+        # changes; the results are picked up below once it has finished
+        if st.button("Train Model", key="train_model_btn"):
+            try:
+                if update:
+                    st.session_state["train_job"] = jobs.submit(
+                        jobs.update,
+                        task_type,
+                        model_choice,
+                        label=f"Update {model_choice} ({task_type})",
+                        owner=session_id(),
+                        split=split,
+                        base_key=last["key"],
+                    )
+                else:
+                    st.session_state["train_job"] = jobs.submit(
+                        jobs.train,
+                        task_type,
+                        model_choice,
+                        label=f"{model_choice} ({task_type})",
+                        owner=session_id(),
+                        split=split,
+                    )
+            except jobs.JobQueueFull as e:
+                st.error(str(e))
+
+        job = jobs.get(st.session_state.get("train_job"))
+        first_view = job is not None and st.session_state.get("shown_job") != job.id
+        if job is not None and job.finished:
+            st.session_state["shown_job"] = job.id
+
+        if job is not None and job.status == "failed":
+            st.error(f"Training failed: {job.error}")
+        elif (
+            job is not None
+            and job.status == "done"
+            and not is_valid(job.kwargs["split"])
+        ):
+            st.info("The split has changed since this model was trained.")
+        elif job is not None and job.status == "done":
+            # scikit-learn is only imported once there are results to show
+            from sklearn.metrics import (
+                accuracy_score,
+                classification_report,
+                confusion_matrix,
+                mean_squared_error,
+                r2_score,
+            )
+
+            result = job.result
+            # Only the target is needed on every rerun, to score the predictions
+            y_test = materialize(job.kwargs["split"], columns=[])[3]
+            y_pred = result["y_pred"]
+
+            st.caption(
+                f"{result['model']}: "
+                + (
+                    "⚡ Loaded from the model cache"
+                    if result["cached"]
+                    else f"{'updated' if result['updated'] else 'trained'} "
+                    f"in {result['fit_seconds']:.1f}s"
+                )
+            )
+            if first_view:
+                # The job trained the model through the model cache (or reloaded it)
+                model = model_cache.get(result["cache_key"])
+                if model is None:
+                    st.warning(
+                        "The model was evicted from the model cache; train it again."
+                    )
+                else:
+                    X_train, _, y_train, _ = materialize(job.kwargs["split"])
+                    # Kept with the recorded preprocessing for the Batch Scoring page
+                    with span("save model bundle"):
+                        set_model(
+                            model, result["model"], result["task"], X_train, y_train
+                        )
+                    # Remembered so rows appended later can update it
+                    st.session_state["last_model"] = {
+                        "key": result["cache_key"],
+                        "task": result["task"],
+                        "model": result["model"],
+                        "fingerprint": result["fingerprint"],
+                    }
+
+            st.subheader("Evaluation Metrics")
+            if result["task"] == "Classification":
+                st.write("Accuracy:", accuracy_score(y_test, y_pred))
+                st.text(
+                    "Classification Report:\n" + classification_report(y_test, y_pred)
+                )
+
+                st.subheader("Confusion Matrix")
+                with span("confusion matrix plot"):
+                    cm = confusion_matrix(y_test, y_pred)
+                    st.pyplot(plotting.confusion_matrix_heatmap(cm))
+
+            else:  # Regression
+                mse = mean_squared_error(y_test, y_pred)
+                r2 = r2_score(y_test, y_pred)
+                st.write(f"Mean Squared Error: {mse:.4f}")
+                st.write(f"R² Score: {r2:.4f}")
+
+                st.subheader("Prediction vs Actual Plot")
+                with span("prediction plot", rows=len(y_test)):
+                    fig = plotting.actual_vs_predicted(y_test, y_pred)
+                    st.image(plotting.to_png(fig), width="stretch")
+                    if len(y_test) > plotting.SCATTER_MAX_POINTS:
+                        st.caption("Point density on a log scale (hexbin).")
+
+        job_panel("train")
+
+    elif mode == "Cross-validation":
+        # --- K-fold: one process per fold, over the split's stored fold indices ---
+        folds = st.session_state["split"].get("folds") or []
+        if not folds:
+            st.info("Choose a number of folds on the Target & Split page first.")
+        else:
+            model_choice = st.selectbox("Choose Model", models, key="cv_model")
+            cpus = os.cpu_count() or 1
+            workers = st.number_input(
+                "Folds trained at the same time",
+                min_value=1,
+                max_value=len(folds),
+                value=max(1, min(len(folds), cpus)),
+                help=f"The {cpus} CPU cores are shared between the running folds via n_jobs.",
+            )
+
+            if st.button(f"🔁 Cross-validate ({len(folds)} folds)", key="cv_btn"):
+                try:
+                    with span("cross-validation", model=model_choice, folds=len(folds)):
+                        rows = cross_validate(
+                            task_type,
+                            model_choice,
+                            st.session_state["split"],
+                            max_workers=workers,
+                        )
+                except Exception as e:
+                    st.error(f"Cross-validation failed: {e}")
+                    st.stop()
+                st.session_state["cv"] = {
+                    "task": task_type,
+                    "model": model_choice,
+                    "rows": rows,
+                }
+
+            cv = st.session_state.get("cv")
+            if cv and cv["task"] == task_type and cv["model"] == model_choice:
+                table = pd.DataFrame(cv["rows"]).set_index("fold").drop(columns="model")
+                st.dataframe(table)
+                metrics = table.select_dtypes("number")
+                st.subheader("Mean ± std over folds")
+                st.dataframe(
+                    pd.DataFrame({"mean": metrics.mean(), "std": metrics.std()})
+                )
+
+    elif mode == "Tune hyperparameters":
+        # --- Hyperband: many configs on small subsamples, the best on all rows ---
+        model_choice = st.selectbox("Choose Model", models, key="tune_model")
+        space_text = st.text_area(
+            "Search space (JSON)",
+            json.dumps(SEARCH_SPACES.get(model_choice, {}), indent=2),
+            height=220,
+            key=f"tune_space_{model_choice}",
+            help=(
+                'Each parameter is {"type": "int" | "float", "low": ..., "high": ..., '
+                '"log": true} or {"type": "choice", "values": [...]}.'
+            ),
+        )
+        col1, col2, col3 = st.columns(3)
+        budget = col1.number_input(
+            "Time budget (seconds)", min_value=10, value=120, step=10
+        )
+        max_candidates = col2.number_input(
+            "Max configurations per bracket", min_value=1, value=27
+        )
+        eta = col3.selectbox("Keep 1 / eta per round", [2, 3, 4], index=1)
+
+        if st.button("🔎 Start Tuning", key="tune_btn"):
+            try:
+                space = json.loads(space_text)
+            except json.JSONDecodeError as e:
+                st.error(f"Invalid search space: {e}")
+                st.stop()
+
+            X_train, X_test, y_train, y_test = get_split()
+            progress = st.progress(0.0, text="Searching...")
+            table = st.empty()
+            start = time.perf_counter()
+
+            def show(trials):
+                progress.progress(
+                    min(1.0, (time.perf_counter() - start) / budget),
+                    text=f"{len(trials)} fits",
+                )
+                table.dataframe(pd.DataFrame(trials).tail(20))
+
+            try:
+                with span("hyperband", model=model_choice):
+                    best, trials = hyperband(
+                        task_type,
+                        model_choice,
+                        X_train,
+                        y_train,
+                        space=space,
+                        budget_seconds=budget,
+                        eta=eta,
+                        max_candidates=max_candidates,
+                        sparse_columns=sparse,
+                        callback=show,
+                    )
+            except Exception as e:
+                st.error(f"Tuning failed: {e}")
+                st.stop()
+            progress.empty()
+
+            if best is None:
+                st.warning("The budget ran out before any configuration finished.")
+            else:
+                from utils.sparse import with_sparse
+
+                # Refit the winner on the full training set and report on the test set
+                model, _ = model_cache.fit_cached(
+                    model_choice,
+                    X_train,
+                    y_train,
+                    with_sparse(best["params"], st.session_state["split"]),
+                    fingerprint=model_cache.split_fingerprint(
+                        st.session_state["split"]
+                    ),
+                )
+                test_score = score(task_type, y_test, model.predict(X_test))
+                set_model(model, model_choice, task_type, X_train, y_train)
+                st.session_state["tuning"] = {
+                    "task": task_type,
+                    "model": model_choice,
+                    "best": best,
+                    "test": test_score,
+                    "trials": trials,
+                }
+
+        tuning = st.session_state.get("tuning")
+        if tuning and tuning["task"] == task_type and tuning["model"] == model_choice:
+            best = tuning["best"]
+            st.subheader("Best configuration")
+            st.json(best["params"])
+            st.write(
+                f"Validation score: {best['score']:.4f} on {best['rows']} rows · "
+                f"{len(tuning['trials'])} fits"
+            )
+            st.write("Test set:", tuning["test"])
+            with st.expander("All trials"):
+                trials = pd.DataFrame(tuning["trials"])
+                trials["params"] = trials["params"].map(json.dumps)
+                st.dataframe(trials)
+
     else:
-        models = [
-            "Linear Regression",
-            "Decision Tree Regressor",
-            "Random Forest Regressor",
-            "SVM Regressor",
-        ]
-        if xgb_available:
-            models.append("XGBoost Regressor")
-
-    model_choice = st.selectbox("Choose Model", models)
-
-    if st.button("Train Model", key="train_model_btn"):
-        # Initialize model
-        if model_choice == "Logistic Regression":
-            model = LogisticRegression(max_iter=500)
-        elif model_choice == "Decision Tree":
-            model = DecisionTreeClassifier()
-        elif model_choice == "Random Forest":
-            model = RandomForestClassifier()
-        elif model_choice == "SVM":
-            model = SVC()
-        elif model_choice == "Linear Regression":
-            model = LinearRegression()
-        elif model_choice == "Decision Tree Regressor":
-            model = DecisionTreeRegressor()
-        elif model_choice == "Random Forest Regressor":
-            model = RandomForestRegressor()
-        elif model_choice == "SVM Regressor":
-            model = SVR()
-        elif model_choice == "XGBoost":
-            model = XGBClassifier()
-        elif model_choice == "XGBoost Regressor":
-            model = XGBRegressor()
+        # --- Leaderboard: fit the selected models in parallel processes ---
+        selected = st.multiselect("Models to compare", models, default=models)
+        cpus = os.cpu_count() or 1
+        workers = st.number_input(
+            "Models trained at the same time",
+            min_value=1,
+            max_value=max(1, len(selected)),
+            value=max(1, min(len(selected), cpus)),
+            help=f"The {cpus} CPU cores are shared between the running models via n_jobs.",
+        )
+        timeout = st.number_input(
+            "Per-model timeout in seconds (0 = no limit)",
+            min_value=0,
+            value=300,
+            step=30,
+        )
+
+        if st.button("🏁 Train All", key="train_all_btn", disabled=not selected):
+            rows = []
+            progress = st.progress(0.0, text="Training...")
+            table = st.empty()
+            with span("leaderboard", models=len(selected)):
+                for result in run_leaderboard(
+                    task_type,
+                    selected,
+                    st.session_state["split"],
+                    max_workers=workers,
+                    timeout=timeout or None,
+                ):
+                    rows.append(result)
+                    progress.progress(
+                        len(rows) / len(selected),
+                        text=f"{result['model']}: {result['status']}",
+                    )
+                    table.dataframe(leaderboard_frame(rows, task_type))
+            progress.empty()
+            st.session_state["leaderboard"] = {"task": task_type, "rows": rows}
+
+        elif st.session_state.get("leaderboard", {}).get("task") == task_type:
+            st.caption("Last leaderboard run")
+            st.dataframe(
+                leaderboard_frame(st.session_state["leaderboard"]["rows"], task_type)
+            )
+
+    # --- Cached models ---
+    with st.expander("🗄️ Cached models"):
+        cached_models = model_cache.entries()
+        if not cached_models:
+            st.caption("No trained models cached yet.")
         else:
-            st.error("Unknown model")
-            st.stop()
-
-        # Train model
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-
-        st.subheader("Evaluation Metrics")
-        if task_type == "Classification":
-            st.write("Accuracy:", accuracy_score(y_test, y_pred))
-            st.text("Classification Report:\n" + classification_report(y_test, y_pred))
-
-            st.subheader("Confusion Matrix")
-            cm = confusion_matrix(y_test, y_pred)
-            fig, ax = plt.subplots()
-            sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", ax=ax)
-            st.pyplot(fig)
-
-        else:  # Regression
-            mse = mean_squared_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            st.write(f"Mean Squared Error: {mse:.4f}")
-            st.write(f"R² Score: {r2:.4f}")
-
-            st.subheader("Prediction vs Actual Plot")
-            fig, ax = plt.subplots()
-            ax.scatter(y_test, y_pred, alpha=0.7)
-            ax.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], "r--")
-            ax.set_xlabel("Actual")
-            ax.set_ylabel("Predicted")
-            st.pyplot(fig)
+            table = pd.DataFrame(cached_models)
+            table["used"] = pd.to_datetime(table["used"], unit="s")
+            table["params"] = table["params"].map(json.dumps)
+            st.dataframe(
+                table[["model", "params", "rows", "fit_seconds", "size_mb", "used"]]
+            )
+            st.caption(
+                f"{table['size_mb'].sum():.1f} MB of {model_cache.MAX_CACHE_MB:.0f} MB; "
+                "least recently used models are evicted first."
+            )
+
+            labels = {
+                f"{e['model']} {json.dumps(e['params'])} · {e['key'][:8]}": e
+                for e in cached_models
+            }
+            picked = labels[st.selectbox("Model file", list(labels))]
+            col_download, col_clear = st.columns(2)
+            # The file is only read when the button is clicked
+            col_download.download_button(
+                "⬇️ Download (.joblib)",
+                Path(picked["path"]).read_bytes,
+                file_name=f"{picked['model'].replace(' ', '_')}_{picked['key'][:8]}.joblib",
+            )
+            if col_clear.button("🗑️ Clear cache", key="clear_model_cache"):
+                model_cache.clear()
+                st.rerun()
+
+finish_page()
@@ -0,0 +1,155 @@
+import os
+import shutil
+from pathlib import Path
+
+import streamlit as st
+
+from utils import dataset_store as store
+from utils.batch import output_path
+from utils.ingest import DEFAULT_CHUNKSIZE, iter_chunks
+from utils.perf import finish_page, span, start_page
+from utils.scoring import ModelBundle, score_file
+from utils.session import get_model_path
+
+st.title("📦 Batch Scoring")
+start_page("Batch Scoring")
+
+# Downloads above this size are only offered as a path on the server
+MAX_DOWNLOAD_MB = 500
+# Loading a model unpickles it, which can run arbitrary code on the server,
+# so uploading one is only offered to admins
+ADMIN_PASSWORD = os.environ.get("ML_APP_ADMIN_PASSWORD")
+
+
+def spill(uploaded, prefix):
+    """Copy an upload to the store directory once so workers can stream it."""
+    os.makedirs(store.STORE_DIR, exist_ok=True)
+    path = os.path.join(store.STORE_DIR, f"{prefix}-{uploaded.file_id}-{uploaded.name}")
+    if not os.path.exists(path):
+        uploaded.seek(0)
+        with open(path + ".tmp", "wb") as f:
+            shutil.copyfileobj(uploaded, f, 16 * 1024**2)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+@st.cache_data(max_entries=8)
+def load_bundle(path, mtime):
+    return ModelBundle.load(path)
+
+
+# --- Model ---
+sources = ["Last trained model"]
+if ADMIN_PASSWORD:
+    sources.append("Upload a model (.joblib, admin only)")
+source = st.radio("Model", sources, horizontal=True)
+if source == "Last trained model":
+    bundle_path = get_model_path()
+    if bundle_path is None:
+        st.warning("Train a model first.")
+        st.stop()
+else:
+    if st.text_input("Admin password", type="password") != ADMIN_PASSWORD:
+        st.info("Enter the admin password to upload a model.")
+        st.stop()
+    uploaded_model = st.file_uploader("Model bundle", type=["joblib"])
+    if uploaded_model is None:
+        st.stop()
+    bundle_path = spill(uploaded_model, "model")
+
+try:
+    bundle = load_bundle(bundle_path, os.path.getmtime(bundle_path))
+except Exception as e:
+    st.error(f"Could not load the model: {e}")
+    st.stop()
+
+st.write(
+    f"**{bundle.model_name}** ({bundle.task}) · {len(bundle.features)} features · "
+    f"{len(bundle.scoring_pipeline())} preprocessing steps"
+)
+# Files are only read when their download button is clicked
+st.download_button(
+    "⬇️ Download model bundle",
+    Path(bundle_path).read_bytes,
+    file_name=f"{bundle.model_name.replace(' ', '_') or 'model'}.joblib",
+)
+
+# --- Data to score ---
+# Only uploads, written inside the store directory: sessions must not read
+# or write arbitrary server paths. Files on the server are scored with
+# ``python cli.py score``.
+uploaded_data = st.file_uploader("CSV or Parquet file", type=["csv", "parquet"])
+st.caption("To score files already on the server, use `python cli.py score`.")
+if uploaded_data is None:
+    st.stop()
+src = spill(uploaded_data, "score")
+out_dir = os.path.join(store.STORE_DIR, "scored")
+
+columns = list(next(iter_chunks(src, 5)).columns)
+
+# --- Options ---
+with st.expander("⚙️ Scoring options", expanded=True):
+    keep = st.multiselect(
+        "Input columns to copy into the output (e.g. an ID)",
+        columns,
+    )
+    proba = st.checkbox(
+        "Include class probabilities",
+        disabled=not hasattr(bundle.model, "predict_proba"),
+    )
+    col1, col2, col3 = st.columns(3)
+    chunksize = col1.number_input(
+        "Rows per chunk", min_value=1_000, value=DEFAULT_CHUNKSIZE, step=10_000
+    )
+    cpus = os.cpu_count() or 1
+    workers = col2.number_input("Worker processes", min_value=1, value=cpus)
+    fmt = col3.selectbox("Output format", ["csv", "parquet"])
+
+if st.button("🚀 Score File", key="score_btn"):
+    os.makedirs(out_dir, exist_ok=True)
+    dst = output_path(src, out_dir, fmt, suffix="_scored")
+    status = st.empty()
+    try:
+        with span("score file"):
+            result = score_file(
+                bundle_path,
+                src,
+                dst,
+                chunksize=chunksize,
+                workers=workers,
+                proba=proba,
+                keep=keep,
+                progress=lambda rows: status.caption(f"Scored {rows:,} rows..."),
+            )
+    except Exception as e:
+        st.error(f"Scoring failed: {e}")
+        st.stop()
+    status.empty()
+    st.session_state["scoring"] = result
+
+result = st.session_state.get("scoring")
+if result and os.path.exists(result["output"]):
+    st.success(
+        f"Scored {result['rows_out']:,} of {result['rows_in']:,} rows in "
+        f"{result['seconds']:.1f}s → `{result['output']}`"
+    )
+    dropped = result["rows_in"] - result["rows_out"]
+    if dropped:
+        st.warning(
+            f"{dropped:,} input rows have no prediction: the model's pipeline "
+            f"dropped them ({', '.join(bundle.row_filters())})."
+        )
+    st.dataframe(next(iter_chunks(result["output"], 10), None))
+    size_mb = os.path.getsize(result["output"]) / 1024**2
+    if size_mb <= MAX_DOWNLOAD_MB:
+        st.download_button(
+            "⬇️ Download predictions",
+            Path(result["output"]).read_bytes,
+            file_name=os.path.basename(result["output"]),
+        )
+    else:
+        st.caption(
+            f"{size_mb:,.0f} MB: too large to download here, see the path above."
+        )
+
+finish_page()
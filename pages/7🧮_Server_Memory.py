@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from utils import dataset_store as store
+from utils.perf import finish_page, rss_mb, start_page
+from utils.session import session_id
+
+st.title("🧮 Server Memory")
+start_page("Server Memory")
+
+# --- Access ---
+password = os.environ.get("ML_APP_ADMIN_PASSWORD")
+if password and st.text_input("Admin password", type="password") != password:
+    st.info("Enter the admin password to see the server's memory use.")
+    st.stop()
+
+# --- Eviction (before the report, so it shows the result) ---
+col_idle, col_all = st.columns(2)
+if col_idle.button("🧹 Evict idle datasets from memory", key="evict_idle_btn"):
+    st.success(f"Freed {store.evict_idle():,.1f} MB.")
+if col_all.button("🗑️ Clear all cached datasets", key="clear_frames_btn"):
+    store.clear_cache()
+    st.success("Cleared; datasets are reloaded from disk when used.")
+st.caption(
+    f"Sessions idle for {store.IDLE_AFTER_SECONDS / 60:.0f} minutes "
+    "(ML_APP_IDLE_SECONDS) lose their datasets from memory first when the "
+    "budget is reached; they are reloaded from disk when used again."
+)
+
+versions, sessions = store.usage()
+versions = pd.DataFrame(
+    versions,
+    columns=[
+        "version",
+        "shared upload",
+        "disk MB",
+        "memory MB",
+        "sessions",
+        "idle (s)",
+    ],
+)
+sessions = pd.DataFrame(
+    sessions, columns=["session", "idle (s)", "datasets", "memory MB", "shared MB"]
+)
+active = sessions[sessions["idle (s)"] < store.IDLE_AFTER_SECONDS]
+
+# --- Totals ---
+col1, col2, col3, col4 = st.columns(4)
+rss = rss_mb()
+col1.metric("Server process", f"{rss:,.0f} MB" if rss is not None else "n/a")
+col2.metric(
+    "Datasets in memory",
+    f"{versions['memory MB'].sum():,.0f} MB",
+    help=f"Budget: {store.MAX_CACHED_MB:,.0f} MB (ML_APP_FRAME_CACHE_MB)",
+)
+col3.metric("Dataset store on disk", f"{versions['disk MB'].sum():,.0f} MB")
+col4.metric("Active sessions", len(active))
+st.caption(
+    "Datasets are memory-mapped files, so the OS shares their pages between "
+    "sessions; 'memory' counts the frames loaded from them, shared by every "
+    "session using the same version. Identical uploads are stored once."
+)
+
+# --- Datasets ---
+st.subheader("Datasets")
+if versions.empty:
+    st.caption("The store is empty.")
+else:
+    st.dataframe(
+        versions.sort_values(["memory MB", "disk MB"], ascending=False),
+        hide_index=True,
+    )
+
+# --- Sessions ---
+st.subheader("Sessions")
+if sessions.empty:
+    st.caption("No session has used the store yet.")
+else:
+    sessions["this session"] = sessions["session"] == session_id()
+    sessions["session"] = sessions["session"].str[:8]
+    st.dataframe(sessions.sort_values("memory MB", ascending=False), hide_index=True)
+
+finish_page()
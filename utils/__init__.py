@@ -0,0 +1,7 @@
+import pandas as pd
+
+# Pages share frames between reruns instead of copying them, so edits must
+# never write through to a shared frame. Copy-on-Write guarantees that and
+# is always on from pandas 3.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
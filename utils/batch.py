@@ -0,0 +1,131 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.ingest import DEFAULT_CHUNKSIZE, iter_chunks
+from utils.pipeline import Pipeline
+
+
+# --- Incremental writers ---
+class ChunkWriter:
+    """Append DataFrame chunks to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = str(path).lower().endswith(".parquet")
+        self._writer = None
+        self._first = True
+
+    def write(self, df):
+        if self.parquet:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = table.cast(self._writer.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(
+                self.path,
+                mode="w" if self._first else "a",
+                header=self._first,
+                index=False,
+            )
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def output_path(src, out_dir, fmt=None, suffix=""):
+    stem, ext = os.path.splitext(os.path.basename(src))
+    ext = {"csv": ".csv", "parquet": ".parquet"}.get(
+        fmt, ext if ext in (".csv", ".parquet") else ".csv"
+    )
+    return os.path.join(out_dir, stem + suffix + ext)
+
+
+def output_paths(files, out_dir, fmt=None, suffix=""):
+    """``{src: dst}`` for many inputs, each under ``out_dir`` at its path
+    relative to the inputs' common directory.
+
+    Files with the same name in different directories therefore don't
+    overwrite each other; if two inputs still map to the same destination
+    (e.g. ``a.csv`` and ``a.parquet`` written as CSV) nothing is run.
+    """
+    files = list(files)
+    dirs = [os.path.dirname(os.path.abspath(src)) for src in files]
+    root = os.path.commonpath(dirs) if dirs else ""
+    paths = {}
+    for src, folder in zip(files, dirs):
+        target_dir = os.path.join(out_dir, os.path.relpath(folder, root))
+        paths[src] = os.path.normpath(output_path(src, target_dir, fmt, suffix))
+
+    seen = {}
+    for src, dst in paths.items():
+        if dst in seen:
+            raise ValueError(f"{seen[dst]} and {src} would both be written to {dst}")
+        seen[dst] = src
+    return paths
+
+
+# --- Running a pipeline over files ---
+def run_file(steps, src, dst, chunksize=DEFAULT_CHUNKSIZE):
+    """Stream ``src`` through the pipeline steps chunk by chunk into ``dst``."""
+    pipeline = Pipeline(steps)
+    start = time.perf_counter()
+    rows_in = rows_out = 0
+    with ChunkWriter(dst) as writer:
+        for chunk in iter_chunks(src, chunksize):
+            rows_in += len(chunk)
+            out = pipeline.apply(chunk)
+            rows_out += len(out)
+            writer.write(out)
+    return {
+        "input": src,
+        "output": dst,
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_batch(
+    pipeline, files, out_dir, workers=None, chunksize=DEFAULT_CHUNKSIZE, fmt=None
+):
+    """Run the pipeline over many files in parallel, yielding one result per file."""
+    jobs = output_paths(files, out_dir, fmt)
+    for dst in jobs.values():
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for src, dst in jobs.items():
+            yield _safe_run(pipeline.steps, src, dst, chunksize)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_safe_run, pipeline.steps, src, dst, chunksize)
+            for src, dst in jobs.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _safe_run(steps, src, dst, chunksize):
+    try:
+        return run_file(steps, src, dst, chunksize)
+    except Exception as e:
+        return {"input": src, "output": dst, "error": f"{type(e).__name__}: {e}"}
@@ -0,0 +1,142 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# --- Blockwise Pearson correlation ---
+def _prepare(X):
+    X = np.asarray(X, dtype=np.float64)
+    mask = ~np.isnan(X)
+    # Centre each column first so the sums below stay numerically stable
+    means = np.nanmean(np.where(mask.any(axis=0), X, 0.0), axis=0)
+    X0 = np.where(mask, X - means, 0.0)
+    return X0, mask.astype(np.float64), not mask.all()
+
+
+def _block(X0, M, I, J, has_nan):
+    xi, xj = X0[:, I], X0[:, J]
+    if not has_nan:
+        n = X0.shape[0]
+        cov = xi.T @ xj
+        var_i = (xi * xi).sum(axis=0)[:, None]
+        var_j = (xj * xj).sum(axis=0)[None, :]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = cov / np.sqrt(var_i * var_j)
+        return np.where(n > 1, r, np.nan)
+
+    # Pairwise-complete observations, like DataFrame.corr()
+    mi, mj = M[:, I], M[:, J]
+    n = mi.T @ mj
+    sx = xi.T @ mj
+    sy = mi.T @ xj
+    sxx = (xi * xi).T @ mj
+    syy = mi.T @ (xj * xj)
+    sxy = xi.T @ xj
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        r = cov / np.sqrt(var_x * var_y)
+    return np.where(n > 1, r, np.nan)
+
+
+def correlation_matrix(df, block_size=256, n_jobs=1, sample_rows=None, random_state=42):
+    """Pearson correlation of the columns of ``df`` computed block by block.
+
+    Blocks of ``block_size`` columns are multiplied with NumPy (which releases
+    the GIL, so ``n_jobs > 1`` runs blocks on a thread pool). With
+    ``sample_rows`` the matrix is estimated from a uniform row sample.
+    """
+    if sample_rows is not None and sample_rows < len(df):
+        rng = np.random.default_rng(random_state)
+        df = df.iloc[np.sort(rng.choice(len(df), size=sample_rows, replace=False))]
+
+    X0, M, has_nan = _prepare(df.to_numpy(dtype=np.float64, na_value=np.nan))
+    p = X0.shape[1]
+    corr = np.full((p, p), np.nan)
+    blocks = [np.arange(s, min(s + block_size, p)) for s in range(0, p, block_size)]
+    pairs = [(a, b) for a in range(len(blocks)) for b in range(a, len(blocks))]
+
+    def run(pair):
+        a, b = pair
+        return pair, _block(X0, M, blocks[a], blocks[b], has_nan)
+
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+    if n_jobs > 1 and len(pairs) > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(run, pairs))
+    else:
+        results = [run(pair) for pair in pairs]
+
+    for (a, b), r in results:
+        I, J = blocks[a], blocks[b]
+        corr[np.ix_(I, J)] = r
+        corr[np.ix_(J, I)] = r.T
+    np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+    return pd.DataFrame(corr.clip(-1, 1), index=df.columns, columns=df.columns)
+
+
+# --- Summaries for display ---
+def top_pairs(corr, k=20):
+    """The ``k`` most strongly (absolutely) correlated column pairs."""
+    values = corr.to_numpy()
+    iu, ju = np.triu_indices(len(values), k=1)
+    r = values[iu, ju]
+    keep = ~np.isnan(r)
+    iu, ju, r = iu[keep], ju[keep], r[keep]
+    if len(r) > k:
+        idx = np.argpartition(-np.abs(r), k - 1)[:k]
+        iu, ju, r = iu[idx], ju[idx], r[idx]
+    pairs = pd.DataFrame(
+        {"column 1": corr.index[iu], "column 2": corr.columns[ju], "correlation": r}
+    )
+    return pairs.reindex(
+        pairs["correlation"].abs().sort_values(ascending=False).index
+    ).reset_index(drop=True)
+
+
+def cluster_order(corr):
+    """Column order from average-linkage clustering on 1 - |r|."""
+    if len(corr) < 3:
+        return list(range(len(corr)))
+    try:
+        from scipy.cluster.hierarchy import leaves_list, linkage
+        from scipy.spatial.distance import squareform
+    except ImportError:
+        return list(range(len(corr)))
+    dist = 1 - np.abs(np.nan_to_num(corr.to_numpy(), nan=0.0))
+    np.fill_diagonal(dist, 0.0)
+    dist = (dist + dist.T) / 2
+    return leaves_list(
+        linkage(squareform(dist.clip(0), checks=False), method="average")
+    ).tolist()
+
+
+def downsample(corr, max_cells=60):
+    """Clustered matrix reduced to at most ``max_cells`` x ``max_cells`` blocks.
+
+    Each block shows its strongest correlation (largest |r|, with its sign),
+    so strong positive and negative pairs don't cancel out as in a mean.
+    """
+    order = cluster_order(corr)
+    corr = corr.iloc[order, order]
+    p = len(corr)
+    if p <= max_cells:
+        return corr
+    starts = np.linspace(0, p, max_cells + 1).astype(int)[:-1]
+    values = np.nan_to_num(corr.to_numpy(), nan=0.0)
+    # A column's correlation with itself would make every diagonal block 1
+    np.fill_diagonal(values, 0.0)
+    sizes = np.diff(np.append(starts, p))
+    high = np.maximum.reduceat(np.maximum.reduceat(values, starts, 0), starts, 1)
+    low = np.minimum.reduceat(np.minimum.reduceat(values, starts, 0), starts, 1)
+    strongest = np.where(np.abs(low) > np.abs(high), low, high)
+    single = np.flatnonzero(sizes == 1)
+    strongest[single, single] = 1.0
+    labels = [
+        str(corr.index[s]) if n == 1 else f"{corr.index[s]} (+{n - 1})"
+        for s, n in zip(starts, sizes)
+    ]
+    return pd.DataFrame(strongest, index=labels, columns=labels)
@@ -0,0 +1,369 @@
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pyarrow as pa
+
+STORE_DIR = os.environ.get(
+    "ML_APP_STORE_DIR", os.path.join(tempfile.gettempdir(), "ml_app_store")
+)
+# Versions nobody has touched for this long are swept on the next save
+STALE_AFTER_SECONDS = 24 * 3600
+# Loaded frames kept in memory for load_cached (per process, all sessions)
+MAX_CACHED_FRAMES = 32
+MAX_CACHED_MB = float(os.environ.get("ML_APP_FRAME_CACHE_MB", 1024))
+# Sessions that haven't used the store for this long are idle; their
+# datasets are the first to leave memory
+IDLE_AFTER_SECONDS = float(os.environ.get("ML_APP_IDLE_SECONDS", 1800))
+
+# Key prefix of content-addressed versions (see content_key)
+SHARED_PREFIX = "shared-"
+
+_frames = OrderedDict()  # (version key, columns) -> (frame, MB)
+_frames_lock = threading.Lock()
+_claims = {}  # session id -> {"handles": {role: handle}, "seen": time}
+
+
+@dataclass(frozen=True)
+class DatasetHandle:
+    """Lightweight reference to a dataset version stored on disk."""
+
+    key: str
+    path: str
+    columns: tuple
+    n_rows: int
+    nbytes: int
+    format: str = "arrow"
+    persistent: bool = False
+
+
+# --- Writing ---
+def save(df, key=None, persistent=False):
+    """Write ``df`` as an Arrow IPC file and return its handle.
+
+    Frames Arrow cannot represent (e.g. object columns mixing ints and
+    strings, or duplicate column names) fall back to a pickle file, which is
+    loaded eagerly.
+    """
+    os.makedirs(STORE_DIR, exist_ok=True)
+    _sweep()
+    key = key or uuid.uuid4().hex
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=None)
+        path = os.path.join(STORE_DIR, key + ".arrow")
+        # Unique, so sessions saving the same shared key don't collide
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        fmt = "arrow"
+    except (
+        pa.ArrowInvalid,
+        pa.ArrowTypeError,
+        pa.ArrowNotImplementedError,
+        # Raised by pyarrow for duplicate column names
+        ValueError,
+    ):
+        path = os.path.join(STORE_DIR, key + ".pkl")
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        fmt = "pickle"
+    os.replace(tmp, path)
+
+    return DatasetHandle(
+        key=key,
+        path=path,
+        columns=tuple(df.columns),
+        n_rows=len(df),
+        nbytes=os.path.getsize(path),
+        format=fmt,
+        persistent=persistent,
+    )
+
+
+def replace(old, df):
+    """Save a new version and drop ``old`` unless it is persistent."""
+    new = save(df)
+    if old is not None and not old.persistent and old.path != new.path:
+        delete(old)
+    return new
+
+
+# --- Content-addressed versions, shared read-only by all sessions ---
+def content_key(data, *params):
+    """Key of the version parsed from ``data`` (bytes) with ``params``."""
+    h = hashlib.sha256(data)
+    h.update(repr(params).encode())
+    return SHARED_PREFIX + h.hexdigest()[:32]
+
+
+def save_shared(df, key, **meta):
+    """Save ``df`` under a content key; ``meta`` is kept next to it for :func:`find`."""
+    handle = save(df, key=key, persistent=True)
+    with open(os.path.join(STORE_DIR, key + ".json"), "w") as f:
+        json.dump(meta, f, default=repr)
+    return handle
+
+
+def find(key):
+    """``(handle, meta)`` of a shared version saved before, or ``(None, None)``."""
+    for fmt, ext in (("arrow", ".arrow"), ("pickle", ".pkl")):
+        path = os.path.join(STORE_DIR, key + ext)
+        if not os.path.exists(path):
+            continue
+        handle = DatasetHandle(key, path, (), 0, os.path.getsize(path), fmt, True)
+        meta_path = os.path.join(STORE_DIR, key + ".json")
+        try:
+            if fmt == "arrow":
+                n_rows = read_table(handle).num_rows
+                columns = head(handle, 0).columns
+            else:
+                df = load(handle)
+                n_rows, columns = len(df), df.columns
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError, pa.ArrowInvalid):
+            return None, None
+        return dataclasses.replace(handle, columns=tuple(columns), n_rows=n_rows), meta
+    return None, None
+
+
+def delete(handle):
+    _forget(handle)
+    try:
+        os.remove(handle.path)
+    except OSError:
+        # Missing already, or still mapped on Windows; the sweep retries later
+        pass
+
+
+def exists(handle):
+    return handle is not None and os.path.exists(handle.path)
+
+
+def _sweep():
+    # Only the store's own files: dataset versions, spilled undo entries
+    # (undo-*.pkl) and unfinished writes. Model bundles and caches kept in
+    # the same directory are managed by their owners
+    now = time.time()
+    try:
+        names = os.listdir(STORE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith((".arrow", ".pkl", ".tmp")):
+            continue
+        path = os.path.join(STORE_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > STALE_AFTER_SECONDS:
+                os.remove(path)
+                if name.startswith(SHARED_PREFIX):
+                    # The metadata of a shared version goes with it
+                    os.remove(os.path.splitext(path)[0] + ".json")
+        except OSError:
+            pass
+
+
+# --- Reading ---
+def _touch(handle):
+    try:
+        os.utime(handle.path)
+    except OSError:
+        pass
+
+
+def read_table(handle, columns=None):
+    """Memory-map the version and return an Arrow table (no data is copied)."""
+    _touch(handle)
+    source = pa.memory_map(handle.path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        keep = list(columns) + [c for c in _index_columns(table) if c not in columns]
+        table = table.select(keep)
+    return table
+
+
+def _index_columns(table):
+    meta = table.schema.pandas_metadata or {}
+    return [c for c in meta.get("index_columns", []) if isinstance(c, str)]
+
+
+def load(handle, columns=None):
+    """Load the version as a DataFrame, optionally only some columns.
+
+    Numeric columns without nulls are zero-copy views over the mapped file,
+    so they are paged in from disk on demand and shared between sessions
+    through the OS page cache.
+    """
+    if handle.format == "pickle":
+        _touch(handle)
+        with open(handle.path, "rb") as f:
+            df = pickle.load(f)
+        return df if columns is None else df[list(columns)]
+    table = read_table(handle, columns)
+    return table.to_pandas(split_blocks=True, self_destruct=False)
+
+
+def load_cached(handle, columns=None):
+    """Like :func:`load`, but reuses the frame loaded for this version before.
+
+    Versions never change, so a cached frame can't go stale. Callers get a
+    shallow copy: with Copy-on-Write their edits materialise only the
+    columns they touch and never reach the cached frame, so a rerun that
+    only reads costs nothing.
+    """
+    key = (handle.key, None if columns is None else tuple(columns))
+    with _frames_lock:
+        entry = _frames.get(key)
+        if entry is not None:
+            _frames.move_to_end(key)
+    if entry is None:
+        df = load(handle, columns)
+        entry = (df, df.memory_usage(deep=True).sum() / 1024**2)
+        with _frames_lock:
+            _frames[key] = entry
+            _shrink()
+    else:
+        _touch(handle)
+    return entry[0].copy(deep=False)
+
+
+def _shrink():
+    """Drop cached frames beyond the budget: idle sessions' first, then LRU."""
+    total = sum(mb for _, mb in _frames.values())
+    if total <= MAX_CACHED_MB and len(_frames) <= MAX_CACHED_FRAMES:
+        return
+    active = _active_keys()
+    idle_first = [k for k in _frames if k[0] not in active] + [
+        k for k in _frames if k[0] in active
+    ]
+    # The newest frame always stays: it is about to be used
+    for key in idle_first[:-1]:
+        if total <= MAX_CACHED_MB and len(_frames) <= MAX_CACHED_FRAMES:
+            break
+        total -= _frames.pop(key)[1]
+
+
+def _forget(handle):
+    with _frames_lock:
+        for key in [k for k in _frames if k[0] == handle.key]:
+            del _frames[key]
+
+
+def clear_cache():
+    with _frames_lock:
+        _frames.clear()
+
+
+# --- Memory accounting ---
+def claim(session, role, handle):
+    """Record that ``session`` uses ``handle`` as ``role`` (e.g. "dataset")."""
+    with _frames_lock:
+        entry = _claims.setdefault(session, {"handles": {}, "seen": 0})
+        if handle is None:
+            entry["handles"].pop(role, None)
+        else:
+            entry["handles"][role] = handle
+        entry["seen"] = time.time()
+
+
+def _active_keys():
+    now = time.time()
+    return {
+        h.key
+        for entry in _claims.values()
+        if now - entry["seen"] < IDLE_AFTER_SECONDS
+        for h in entry["handles"].values()
+    }
+
+
+def evict_idle():
+    """Drop the cached frames no active session uses; returns the MB freed."""
+    freed = 0.0
+    with _frames_lock:
+        active = _active_keys()
+        for key in [k for k in _frames if k[0] not in active]:
+            freed += _frames.pop(key)[1]
+        # Sessions gone for a day are forgotten
+        now = time.time()
+        for session in [
+            s for s, e in _claims.items() if now - e["seen"] > STALE_AFTER_SECONDS
+        ]:
+            del _claims[session]
+    return freed
+
+
+def usage():
+    """What the store holds: ``(versions, sessions)`` tables as lists of dicts.
+
+    A version's memory is its frames cached for :func:`load_cached`; a
+    session's memory is that of the versions it uses, of which ``shared MB``
+    is also used by other sessions.
+    """
+    now = time.time()
+    with _frames_lock:
+        cached = {}
+        for (key, _), (_, mb) in _frames.items():
+            cached[key] = cached.get(key, 0.0) + mb
+        claims = {s: (dict(e["handles"]), e["seen"]) for s, e in _claims.items()}
+
+    users = {}
+    for session, (handles, _) in claims.items():
+        for handle in set(handles.values()):
+            users.setdefault(handle.key, set()).add(session)
+
+    versions = []
+    for name in sorted(os.listdir(STORE_DIR)) if os.path.isdir(STORE_DIR) else []:
+        key, ext = os.path.splitext(name)
+        if ext not in (".arrow", ".pkl"):
+            continue
+        stat = os.stat(os.path.join(STORE_DIR, name))
+        versions.append(
+            {
+                "version": key,
+                "shared upload": key.startswith(SHARED_PREFIX),
+                "disk MB": stat.st_size / 1024**2,
+                "memory MB": cached.get(key, 0.0),
+                "sessions": len(users.get(key, ())),
+                "idle (s)": now - stat.st_mtime,
+            }
+        )
+
+    sessions = []
+    for session, (handles, seen) in claims.items():
+        keys = {h.key for h in handles.values()}
+        sessions.append(
+            {
+                "session": session,
+                "idle (s)": now - seen,
+                "datasets": len(keys),
+                "memory MB": sum(cached.get(k, 0.0) for k in keys),
+                "shared MB": sum(
+                    cached.get(k, 0.0) for k in keys if len(users.get(k, ())) > 1
+                ),
+            }
+        )
+    return versions, sessions
+
+
+def head(handle, n=5):
+    if handle.format == "pickle":
+        return load(handle).head(n)
+    return read_table(handle).slice(0, n).to_pandas()
+
+
+def dtypes(handle):
+    if handle.format == "pickle":
+        return load(handle).dtypes
+    return head(handle, 0).dtypes
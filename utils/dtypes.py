@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+# Arrow-backed strings: pandas 3's default ``str``, opt-in before that
+STRING_DTYPE = "str" if int(pd.__version__.split(".")[0]) >= 3 else "string[pyarrow]"
+
+
+# --- Numeric downcasting ---
+def downcast_numeric(s):
+    """Shrink an integer/float Series to the smallest dtype that holds it exactly."""
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        return s
+
+    if pd.api.types.is_integer_dtype(s):
+        if len(s) and s.min() >= 0:
+            return pd.to_numeric(s, downcast="unsigned")
+        return pd.to_numeric(s, downcast="integer")
+
+    if pd.api.types.is_float_dtype(s) and s.dtype != np.float32:
+        as32 = s.astype(np.float32)
+        # Only keep float32 when every value round-trips without loss
+        same = (as32.astype(s.dtype) == s) | s.isna()
+        if same.all():
+            return as32
+    return s
+
+
+# --- Low-cardinality strings -> category ---
+def is_text(s):
+    return pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)
+
+
+def should_categorize(s, max_ratio=0.5, max_unique=None):
+    if not is_text(s) or len(s) == 0:
+        return False
+    n_unique = s.nunique(dropna=True)
+    if max_unique is not None and n_unique > max_unique:
+        return False
+    return n_unique / len(s) <= max_ratio
+
+
+def compact_frame(df, category_ratio=0.5):
+    """Downcast numeric columns and turn repetitive text columns into categories."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s):
+            s = downcast_numeric(s)
+        elif should_categorize(s, category_ratio):
+            s = s.astype("category")
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+# --- Whole-frame optimizer ---
+def _whole_numbers(s):
+    values = s.dropna().to_numpy()
+    return len(values) > 0 and bool(
+        np.isfinite(values).all()
+        and (values == np.round(values)).all()
+        # Beyond 2**53 floats can't tell neighbouring integers apart
+        and np.abs(values).max() < 2**53
+    )
+
+
+def optimize_column(s, category_ratio=0.5, float_rtol=0.0):
+    """The smallest dtype that holds ``s`` without changing any value.
+
+    Integers are downcast; floats holding only whole numbers become
+    (nullable, when they have nulls) integers, other floats float32 if every
+    value round-trips (or is within ``float_rtol``). Python booleans become
+    the nullable ``boolean`` dtype, repetitive text ``category`` and other
+    text Arrow-backed strings. Mixed-type columns are left alone.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(s):
+        return s
+    if pd.api.types.is_integer_dtype(s):
+        return downcast_numeric(s)
+
+    if pd.api.types.is_float_dtype(s):
+        if _whole_numbers(s):
+            ints = s.astype("Int64") if s.isna().any() else s.astype("int64")
+            return downcast_numeric(ints)
+        if float_rtol and s.dtype != np.float32:
+            as32 = s.astype(np.float32)
+            if np.allclose(as32, s, rtol=float_rtol, atol=0, equal_nan=True):
+                return as32
+        return downcast_numeric(s)
+
+    if not is_text(s):
+        return s  # datetimes, timedeltas, ...
+    kind = pd.api.types.infer_dtype(s, skipna=True)
+    if kind == "boolean" and pd.api.types.is_object_dtype(s):
+        return s.astype("boolean")
+    if kind not in ("string", "empty"):
+        return s
+    if should_categorize(s, category_ratio):
+        return s.astype("category")
+    if pd.api.types.is_object_dtype(s):
+        return s.astype(STRING_DTYPE)
+    return s
+
+
+def cast_safely(s, dtype):
+    """``s.astype(dtype)``, or ``s`` unchanged if the cast would alter a value.
+
+    Used when replaying dtypes chosen on one file on another, whose values
+    may not fit (e.g. a 300 in a column narrowed to int8).
+    """
+    if str(s.dtype) == str(dtype):
+        return s
+    try:
+        out = s.astype(dtype)
+    except (TypeError, ValueError, OverflowError):
+        return s
+    if pd.api.types.is_numeric_dtype(out) and out.dtype != np.float32:
+        before = s.to_numpy(dtype="float64", na_value=np.nan)
+        after = out.to_numpy(dtype="float64", na_value=np.nan)
+        if not np.array_equal(before, after, equal_nan=True):
+            return s
+    return out
+
+
+def concat_rows(df, new):
+    """``df`` with the rows of ``new`` (same columns, any order) appended.
+
+    Categorical columns keep their categories, extended by any new ones, so
+    the codes of the existing rows don't change. New rows are labelled after
+    the last row of an integer index.
+    """
+    missing = [c for c in df.columns if c not in new.columns]
+    extra = [c for c in new.columns if c not in df.columns]
+    if missing or extra:
+        raise ValueError(
+            f"Columns differ: missing {', '.join(map(str, missing)) or 'none'}, "
+            f"unexpected {', '.join(map(str, extra)) or 'none'}"
+        )
+    new = new[list(df.columns)]
+
+    dtypes = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            old = df[col].cat.categories
+            added = pd.Index(new[col].dropna().unique().tolist()).difference(old)
+            dtypes[col] = pd.CategoricalDtype(
+                old.append(added), ordered=df[col].cat.ordered
+            )
+    if dtypes:
+        df, new = df.astype(dtypes), new.astype(dtypes)
+
+    if pd.api.types.is_integer_dtype(df.index) and len(df):
+        start = int(df.index.max()) + 1
+        new = new.set_axis(pd.RangeIndex(start, start + len(new)))
+        return pd.concat([df, new])
+    return pd.concat([df, new], ignore_index=True)
+
+
+def optimize_frame(df, category_ratio=0.5, float_rtol=0.0):
+    """Apply :func:`optimize_column` to every column.
+
+    Returns ``(frame, report)``; see :func:`memory_report`.
+    """
+    out = {col: optimize_column(df[col], category_ratio, float_rtol) for col in df}
+    out = pd.DataFrame(out, index=df.index)
+    return out, memory_report(df, out)
+
+
+def memory_report(before, after):
+    """Dtype and memory of each column of ``after`` compared to ``before``."""
+    rows = []
+    for col in after.columns:
+        old, new = before[col], after[col]
+        old_mb = old.memory_usage(deep=True, index=False) / 1024**2
+        new_mb = new.memory_usage(deep=True, index=False) / 1024**2
+        rows.append(
+            {
+                "column": col,
+                "before": str(old.dtype),
+                "after": str(new.dtype),
+                "before MB": old_mb,
+                "after MB": new_mb,
+                "saved %": 100 * (1 - new_mb / old_mb) if old_mb else 0.0,
+            }
+        )
+    return pd.DataFrame(rows).set_index("column")
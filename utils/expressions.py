@@ -0,0 +1,514 @@
+import ast
+import math
+import multiprocessing as mp
+import operator
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Row-wise fallback only goes multi-process above this many rows
+PARALLEL_MIN_ROWS = 200_000
+MAX_CONSTANT_EXPONENT = 1000
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def _is_series(v):
+    return isinstance(v, pd.Series)
+
+
+def _widen(s):
+    """Compact integer/float32 columns as int64/float64, so arithmetic can't overflow."""
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        return s
+    if pd.api.types.is_integer_dtype(s) and s.dtype.itemsize < 8:
+        return s.astype(
+            "Int64" if pd.api.types.is_extension_array_dtype(s) else "int64"
+        )
+    if s.dtype == np.float32:
+        return s.astype("float64")
+    return s
+
+
+def _numeric(v):
+    if _is_series(v):
+        return pd.api.types.is_numeric_dtype(v)
+    if isinstance(v, np.ndarray):
+        return v.dtype.kind in "biuf"
+    return isinstance(v, (int, float, np.number))
+
+
+def _checked_operands(a, b, symbol):
+    # A column of objects may still hold numbers: TypeError makes evaluate()
+    # retry row by row, where each value is checked
+    if not (_numeric(a) and _numeric(b)):
+        if _is_series(a) or _is_series(b):
+            raise TypeError(f"{symbol} on a non-numeric column")
+        raise ExpressionError(f"{symbol} needs numbers on both sides")
+
+
+def _mul(a, b):
+    # Strings would be repeated: x * 10**9 on a text column fills the memory
+    _checked_operands(a, b, "*")
+    return a * b
+
+
+def _pow(a, b):
+    _checked_operands(a, b, "**")
+    # Python ints are unbounded, so a big exponent would hang the server
+    if isinstance(a, int) and isinstance(b, int) and abs(b) > MAX_CONSTANT_EXPONENT:
+        raise ExpressionError("Exponent is too large")
+    return a**b
+
+
+def _truth(v):
+    # Python truthiness, element-wise for a column (not bitwise like ~ & |)
+    return v.astype(bool) if _is_series(v) else bool(v)
+
+
+def _choose(cond, a, b):
+    if not _is_series(cond):
+        return a if cond else b
+    return pd.Series(np.where(cond, a, b), index=cond.index)
+
+
+def _and(a, b):
+    # Like Python's ``and``: ``a`` where it is falsy, else ``b``
+    return _choose(_truth(a), b, a)
+
+
+def _or(a, b):
+    return _choose(_truth(a), a, b)
+
+
+def _str(v):
+    return v.astype(str).str if _is_series(v) else None
+
+
+# name -> (vectorized implementation, scalar implementation)
+_FUNCS = {
+    "abs": (np.abs, abs),
+    "sqrt": (np.sqrt, math.sqrt),
+    "log": (np.log, math.log),
+    "log10": (np.log10, math.log10),
+    "log2": (np.log2, math.log2),
+    "exp": (np.exp, math.exp),
+    "sin": (np.sin, math.sin),
+    "cos": (np.cos, math.cos),
+    "tan": (np.tan, math.tan),
+    "floor": (np.floor, math.floor),
+    "ceil": (np.ceil, math.ceil),
+    "round": (lambda a, n=0: a.round(n) if _is_series(a) else round(a, n), round),
+    "min": (np.minimum, min),
+    "max": (np.maximum, max),
+    "clip": (
+        lambda a, lo=None, hi=None: (
+            a.clip(lo, hi) if _is_series(a) else np.clip(a, lo, hi)
+        ),
+        lambda a, lo, hi: min(max(a, lo), hi),
+    ),
+    "where": (np.where, lambda c, a, b: a if c else b),
+    "isnull": (pd.isna, pd.isna),
+    "notnull": (pd.notna, pd.notna),
+    "fillna": (
+        lambda a, v: a.fillna(v) if _is_series(a) else a,
+        lambda a, v: v if pd.isna(a) else a,
+    ),
+    "int": (lambda a: a.astype("int64") if _is_series(a) else int(a), int),
+    "float": (lambda a: a.astype("float64") if _is_series(a) else float(a), float),
+    "str": (lambda a: a.astype(str) if _is_series(a) else str(a), str),
+    "len": (lambda a: _str(a).len() if _is_series(a) else len(a), len),
+    # String helpers, also callable as methods: x.lower(), x.replace(",", "")
+    "lower": (lambda a: _str(a).lower(), str.lower),
+    "upper": (lambda a: _str(a).upper(), str.upper),
+    "title": (lambda a: _str(a).title(), str.title),
+    "strip": (lambda a, c=None: _str(a).strip(c), lambda a, c=None: a.strip(c)),
+    "lstrip": (lambda a, c=None: _str(a).lstrip(c), lambda a, c=None: a.lstrip(c)),
+    "rstrip": (lambda a, c=None: _str(a).rstrip(c), lambda a, c=None: a.rstrip(c)),
+    "replace": (
+        lambda a, old, new: _str(a).replace(old, new, regex=False),
+        str.replace,
+    ),
+    "contains": (lambda a, s: _str(a).contains(s, regex=False), lambda a, s: s in a),
+    "startswith": (lambda a, s: _str(a).startswith(s), str.startswith),
+    "endswith": (lambda a, s: _str(a).endswith(s), str.endswith),
+    "split": (lambda a, sep=None: _str(a).split(sep), lambda a, sep=None: a.split(sep)),
+}
+_METHODS = {
+    "lower",
+    "upper",
+    "title",
+    "strip",
+    "lstrip",
+    "rstrip",
+    "replace",
+    "startswith",
+    "endswith",
+    "split",
+}
+_CONSTANTS = {"pi": math.pi, "e": math.e, "nan": math.nan, "inf": math.inf}
+
+_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+_CMPOPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+class Expression:
+    """A user expression parsed once into a whitelisted AST.
+
+    ``x`` is the selected column; other columns are available by name when
+    the name is a valid identifier, or as ``col("Column name")``. Only
+    arithmetic, comparisons, ``and``/``or``/``not``, ``a if c else b``,
+    ``in`` against a literal list, the functions in ``_FUNCS`` and the string
+    methods in ``_METHODS`` are allowed.
+    """
+
+    def __init__(self, text, columns=()):
+        self.text = text.strip()
+        self.columns = [str(c) for c in columns]
+        try:
+            self.tree = ast.parse(self.text, mode="eval")
+        except SyntaxError as e:
+            raise ExpressionError(f"Invalid expression: {e.msg}") from None
+        self.names = set()
+        self._validate(self.tree.body)
+
+    # --- Validation ---
+    def _validate(self, node):
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str, bool, type(None))):
+                raise ExpressionError(f"Unsupported constant {node.value!r}")
+        elif isinstance(node, ast.Name):
+            if node.id == "x" or node.id in _CONSTANTS:
+                pass
+            elif node.id in self.columns:
+                self.names.add(node.id)
+            else:
+                raise ExpressionError(f"Unknown name '{node.id}'")
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in _BINOPS:
+                raise ExpressionError(
+                    f"Operator {type(node.op).__name__} is not allowed"
+                )
+            if isinstance(node.op, ast.Mult) and any(
+                isinstance(n, ast.Constant) and isinstance(n.value, str)
+                for n in (node.left, node.right)
+            ):
+                raise ExpressionError("Repeating string literals is not supported")
+            self._validate(node.left)
+            self._validate(node.right)
+            if isinstance(node.op, ast.Pow):
+                self._check_power(node)
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, (ast.USub, ast.UAdd, ast.Not)):
+                raise ExpressionError(
+                    f"Operator {type(node.op).__name__} is not allowed"
+                )
+            self._validate(node.operand)
+        elif isinstance(node, ast.BoolOp):
+            for value in node.values:
+                self._validate(value)
+        elif isinstance(node, ast.Compare):
+            for op_, comparator in zip(node.ops, node.comparators):
+                if isinstance(op_, (ast.In, ast.NotIn)):
+                    if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)):
+                        raise ExpressionError(
+                            "'in' needs a literal list, e.g. x in ('a', 'b')"
+                        )
+                elif type(op_) not in _CMPOPS:
+                    raise ExpressionError(
+                        f"Comparison {type(op_).__name__} is not allowed"
+                    )
+                self._validate(comparator)
+            self._validate(node.left)
+        elif isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            for elt in node.elts:
+                if not isinstance(elt, ast.Constant):
+                    raise ExpressionError("Lists may only contain constants")
+        elif isinstance(node, ast.IfExp):
+            self._validate(node.test)
+            self._validate(node.body)
+            self._validate(node.orelse)
+        elif isinstance(node, ast.Subscript):
+            self._validate(node.value)
+            index = node.slice
+            parts = (
+                [index.lower, index.upper, index.step]
+                if isinstance(index, ast.Slice)
+                else [index]
+            )
+            for part in parts:
+                if part is not None and not (
+                    isinstance(part, ast.Constant)
+                    or (
+                        isinstance(part, ast.UnaryOp)
+                        and isinstance(part.operand, ast.Constant)
+                    )
+                ):
+                    raise ExpressionError(
+                        "Indexes must be constants, e.g. x[0] or x[:3]"
+                    )
+        elif isinstance(node, ast.Call):
+            if node.keywords:
+                raise ExpressionError("Keyword arguments are not supported")
+            func = node.func
+            if isinstance(func, ast.Name) and func.id == "col":
+                if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant):
+                    raise ExpressionError(
+                        'col() takes a column name, e.g. col("Price")'
+                    )
+                name = str(node.args[0].value)
+                if name not in self.columns:
+                    raise ExpressionError(f"Unknown column '{name}'")
+                self.names.add(name)
+                return
+            if isinstance(func, ast.Name) and func.id in _FUNCS:
+                pass
+            elif isinstance(func, ast.Attribute) and func.attr in _METHODS:
+                self._validate(func.value)
+            else:
+                raise ExpressionError(f"Function {ast.unparse(func)}() is not allowed")
+            for arg in node.args:
+                self._validate(arg)
+        else:
+            raise ExpressionError(
+                f"{type(node).__name__} is not allowed in expressions"
+            )
+
+    @staticmethod
+    def _check_power(node):
+        # Constant-only powers like 9 ** 9 ** 9 would hang the server on
+        # Python ints, so only a literal exponent up to MAX_CONSTANT_EXPONENT
+        # is allowed when the exponent does not involve any column.
+        def constant_only(n):
+            return not any(isinstance(child, ast.Name) for child in ast.walk(n))
+
+        if not constant_only(node.right):
+            return
+        if any(isinstance(n, ast.Pow) for n in ast.walk(node.right)) or (
+            constant_only(node.left)
+            and any(isinstance(n, ast.Pow) for n in ast.walk(node.left))
+        ):
+            raise ExpressionError("Nested constant powers are not allowed")
+        # Already validated and free of powers, so this is plain arithmetic
+        exponent = eval(
+            compile(ast.Expression(node.right), "<exponent>", "eval"),
+            {"__builtins__": {}},
+        )
+        if (
+            not isinstance(exponent, (int, float))
+            or abs(exponent) > MAX_CONSTANT_EXPONENT
+        ):
+            raise ExpressionError("Exponent is too large")
+
+    # --- Vectorized evaluation ---
+    def evaluate(self, df, column, n_jobs=1):
+        """Evaluate over the whole frame; returns a Series aligned with ``df``."""
+        env = {name: _widen(df[name]) for name in self.names}
+        env["x"] = _widen(df[column])
+        try:
+            with np.errstate(all="ignore"):
+                result = self._vec(self.tree.body, env)
+        except (TypeError, AttributeError, ValueError):
+            # Mixed-type columns and the like: evaluate row by row instead
+            return self.evaluate_rows(df, column, n_jobs=n_jobs)
+        if _is_series(result):
+            return result
+        if isinstance(result, np.ndarray):
+            return pd.Series(result, index=df.index, name=column)
+        return pd.Series(result, index=df.index, name=column)
+
+    def _vec(self, node, env):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return env[node.id] if node.id in env else _CONSTANTS[node.id]
+        if isinstance(node, ast.BinOp):
+            return _BINOPS[type(node.op)](
+                self._vec(node.left, env), self._vec(node.right, env)
+            )
+        if isinstance(node, ast.UnaryOp):
+            value = self._vec(node.operand, env)
+            if isinstance(node.op, ast.USub):
+                return -value
+            if isinstance(node.op, ast.UAdd):
+                return +value
+            return ~_truth(value) if _is_series(value) else not value
+        if isinstance(node, ast.BoolOp):
+            values = [self._vec(v, env) for v in node.values]
+            combine = _and if isinstance(node.op, ast.And) else _or
+            result = values[0]
+            for value in values[1:]:
+                result = combine(result, value)
+            return result
+        if isinstance(node, ast.Compare):
+            left = self._vec(node.left, env)
+            result = None
+            for op_, comparator in zip(node.ops, node.comparators):
+                if isinstance(op_, (ast.In, ast.NotIn)):
+                    values = [e.value for e in comparator.elts]
+                    part = left.isin(values) if _is_series(left) else left in values
+                    if isinstance(op_, ast.NotIn):
+                        part = ~part if _is_series(part) else not part
+                    right = None
+                else:
+                    right = self._vec(comparator, env)
+                    part = _CMPOPS[type(op_)](left, right)
+                result = part if result is None else result & part
+                left = right
+            return result
+        if isinstance(node, ast.IfExp):
+            test = self._vec(node.test, env)
+            body, orelse = self._vec(node.body, env), self._vec(node.orelse, env)
+            if not _is_series(test):
+                return body if test else orelse
+            return pd.Series(np.where(test, body, orelse), index=test.index)
+        if isinstance(node, ast.Subscript):
+            value = self._vec(node.value, env)
+            key = (
+                ast.literal_eval(node.slice)
+                if not isinstance(node.slice, ast.Slice)
+                else slice(
+                    *[
+                        None if p is None else ast.literal_eval(p)
+                        for p in (node.slice.lower, node.slice.upper, node.slice.step)
+                    ]
+                )
+            )
+            return value.str[key] if _is_series(value) else value[key]
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Name) and func.id == "col":
+                return env[str(node.args[0].value)]
+            if isinstance(func, ast.Attribute):
+                name, args = func.attr, [func.value] + node.args
+            else:
+                name, args = func.id, node.args
+            args = [self._vec(a, env) for a in args]
+            vector_fn, scalar_fn = _FUNCS[name]
+            if any(_is_series(a) for a in args):
+                result = vector_fn(*args)
+                if isinstance(result, np.ndarray):
+                    index = next(a.index for a in args if _is_series(a))
+                    result = pd.Series(result, index=index)
+                return result
+            return scalar_fn(*args)
+        raise ExpressionError(f"{type(node).__name__} is not allowed in expressions")
+
+    # --- Row-wise fallback ---
+    def evaluate_rows(self, df, column, n_jobs=1, chunksize=50_000):
+        """Evaluate row by row on the validated AST, in chunks across processes."""
+        names = sorted(self.names - {column})
+        frame = df[[column] + names]
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        chunks = [
+            frame.iloc[i : i + chunksize] for i in range(0, len(frame), chunksize)
+        ]
+        args = [(self.text, tuple(self.columns), column, names, c) for c in chunks]
+
+        if n_jobs > 1 and len(frame) >= PARALLEL_MIN_ROWS and len(chunks) > 1:
+            # Spawned, not forked: forking the threaded Streamlit server can deadlock
+            with ProcessPoolExecutor(
+                max_workers=n_jobs, mp_context=mp.get_context("spawn")
+            ) as pool:
+                parts = list(pool.map(_eval_chunk, args))
+        else:
+            parts = [_eval_chunk(a) for a in args]
+        if not parts:
+            return pd.Series([], index=df.index, name=column, dtype=object)
+        return pd.concat(parts)
+
+
+@lru_cache(maxsize=32)
+def _compiled(text, columns):
+    expr = Expression(text, columns)
+    # Rewrite col("name") and method calls into plain names/functions, then
+    # compile once; the namespace has no builtins.
+    tree = _ScalarRewriter().visit(expr.tree)
+    ast.fix_missing_locations(tree)
+    return compile(tree, "<expression>", "eval")
+
+
+class _ScalarRewriter(ast.NodeTransformer):
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        checked = {ast.Mult: "__mul__", ast.Pow: "__pow__"}.get(type(node.op))
+        if checked is None:
+            return node
+        return ast.Call(
+            func=ast.Name(id=checked, ctx=ast.Load()),
+            args=[node.left, node.right],
+            keywords=[],
+        )
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Name) and func.id == "col":
+            return ast.Subscript(
+                value=ast.Name(id="__cols__", ctx=ast.Load()),
+                slice=node.args[0],
+                ctx=ast.Load(),
+            )
+        if isinstance(func, ast.Attribute):
+            return ast.Call(
+                func=ast.Name(id=func.attr, ctx=ast.Load()),
+                args=[func.value] + node.args,
+                keywords=[],
+            )
+        return node
+
+    def visit_Name(self, node):
+        if node.id not in _FUNCS and node.id not in _CONSTANTS and node.id != "x":
+            return ast.Subscript(
+                value=ast.Name(id="__cols__", ctx=ast.Load()),
+                slice=ast.Constant(node.id),
+                ctx=ast.Load(),
+            )
+        return node
+
+
+def _eval_chunk(args):
+    text, columns, column, names, chunk = args
+    code = _compiled(text, columns)
+    namespace = {
+        "__builtins__": {},
+        **_CONSTANTS,
+        **{k: v[1] for k, v in _FUNCS.items()},
+        "__mul__": _mul,
+        "__pow__": _pow,
+    }
+    cols = {}
+    namespace["__cols__"] = cols
+    arrays = [chunk[column].tolist()] + [chunk[n].tolist() for n in names]
+    out = []
+    for values in zip(*arrays):
+        namespace["x"] = cols[column] = values[0]
+        for name, value in zip(names, values[1:]):
+            cols[name] = value
+        out.append(eval(code, namespace))
+    return pd.Series(out, index=chunk.index, name=column)
+
+
+def evaluate(text, df, column, n_jobs=1):
+    return Expression(text, df.columns).evaluate(df, column, n_jobs=n_jobs)
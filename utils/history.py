@@ -0,0 +1,328 @@
+import os
+import pickle
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset_store as store
+
+DEFAULT_BUDGET_MB = float(os.environ.get("ML_APP_UNDO_BUDGET_MB", 512))
+
+
+def _nbytes(obj):
+    if obj is None:
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    return int(obj.memory_usage(deep=True))
+
+
+def _same(a, b):
+    if a.dtype != b.dtype or len(a) != len(b):
+        return False
+    if _shares_buffer(a, b):
+        # Untouched by the step: Copy-on-Write kept the very same values
+        return True
+    return a.reset_index(drop=True).equals(b.reset_index(drop=True))
+
+
+def _shares_buffer(a, b):
+    x, y = a.array, b.array
+    if x is y:
+        return True
+    if not isinstance(a.dtype, np.dtype):
+        return False
+    x, y = np.asarray(x), np.asarray(y)
+    return (
+        x.__array_interface__["data"][0] == y.__array_interface__["data"][0]
+        and x.strides == y.strides
+    )
+
+
+class Delta:
+    """Column-level difference between two versions of a DataFrame.
+
+    Only what is needed to move between ``before`` and ``after`` is kept:
+    the old values of dropped/replaced columns, the new values of
+    added/replaced columns, renames, and a boolean row mask (plus the removed
+    rows of untouched columns) when rows were filtered out. Anything that is
+    not a plain row filter falls back to storing both frames.
+    """
+
+    def __init__(self, before, after, label="", step=None):
+        self.label = label
+        self.step = step
+        self.before_columns = list(before.columns)
+        self.after_columns = list(after.columns)
+        self.mask = None
+        self.removed = None
+        self.removed_index = None
+        self.old_cols = {}
+        self.new_cols = {}
+        self.renames = {}  # after name -> before name
+        self.snapshot = None
+        self.spill_path = None
+
+        if not (before.columns.is_unique and after.columns.is_unique):
+            self.snapshot = (before, after)
+            return
+
+        if len(before) == len(after) and before.index.equals(after.index):
+            mask = None
+        else:
+            mask = before.index.isin(after.index)
+            if not before.index[mask].equals(after.index):
+                self.snapshot = (before, after)
+                return
+        self.mask = mask
+
+        kept_before = before if mask is None else before[mask]
+        dropped = [c for c in before.columns if c not in after.columns]
+        added = [c for c in after.columns if c not in before.columns]
+        unchanged = []
+
+        for c in before.columns:
+            if c in after.columns:
+                if _same(kept_before[c], after[c]):
+                    unchanged.append(c)
+                else:
+                    self.old_cols[c] = before[c]
+                    self.new_cols[c] = after[c]
+
+        # A dropped column whose values reappear under a new name is a rename
+        for c in added:
+            match = next(
+                (
+                    d
+                    for d in dropped
+                    if d not in self.renames.values()
+                    and _same(kept_before[d], after[c])
+                ),
+                None,
+            )
+            if match is not None:
+                self.renames[c] = match
+                unchanged.append(match)
+            else:
+                self.new_cols[c] = after[c]
+        for c in dropped:
+            if c not in self.renames.values():
+                self.old_cols[c] = before[c]
+
+        if mask is not None:
+            self.removed_index = before.index[~mask]
+            if unchanged:
+                self.removed = before.loc[~mask, unchanged]
+
+    # --- Bookkeeping ---
+    @property
+    def is_empty(self):
+        return (
+            self.snapshot is None
+            and self.mask is None
+            and not self.old_cols
+            and not self.new_cols
+            and not self.renames
+            and self.before_columns == self.after_columns
+        )
+
+    @property
+    def nbytes(self):
+        if self.spill_path is not None:
+            return 0
+        if self.snapshot is not None:
+            return sum(_nbytes(f) for f in self.snapshot)
+        return (
+            _nbytes(self.mask)
+            + _nbytes(self.removed)
+            + (
+                self.removed_index.memory_usage()
+                if self.removed_index is not None
+                else 0
+            )
+            + sum(_nbytes(s) for s in self.old_cols.values())
+            + sum(_nbytes(s) for s in self.new_cols.values())
+        )
+
+    _payload = ("mask", "removed", "removed_index", "old_cols", "new_cols", "snapshot")
+
+    def spill(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"undo-{uuid.uuid4().hex}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(
+                {k: getattr(self, k) for k in self._payload},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        for k in self._payload:
+            setattr(self, k, None)
+        self.spill_path = path
+
+    def _restore(self):
+        if self.spill_path is None:
+            return
+        with open(self.spill_path, "rb") as f:
+            for k, v in pickle.load(f).items():
+                setattr(self, k, v)
+        self.discard()
+
+    def discard(self):
+        if self.spill_path is not None:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
+
+    # --- Applying ---
+    def undo(self, after):
+        self._restore()
+        if self.snapshot is not None:
+            return self.snapshot[0]
+
+        kept = after.rename(columns={new: old for new, old in self.renames.items()})
+        index = kept.index
+        if self.mask is not None:
+            kept_pos = np.flatnonzero(self.mask)
+            removed_pos = np.flatnonzero(~self.mask)
+            order = np.argsort(np.concatenate([kept_pos, removed_pos]), kind="stable")
+            index = kept.index.append(self.removed_index)[order]
+
+        columns = {}
+        for c in self.before_columns:
+            if c in self.old_cols:
+                columns[c] = self.old_cols[c].reset_index(drop=True)
+            elif self.mask is None:
+                columns[c] = kept[c].reset_index(drop=True)
+            else:
+                both = pd.concat(
+                    [
+                        kept[c].reset_index(drop=True),
+                        self.removed[c].reset_index(drop=True),
+                    ],
+                    ignore_index=True,
+                )
+                columns[c] = both.iloc[order].reset_index(drop=True)
+
+        df = pd.DataFrame(columns, columns=self.before_columns)
+        df.index = index
+        return df
+
+    def redo(self, before):
+        self._restore()
+        if self.snapshot is not None:
+            return self.snapshot[1]
+
+        rows = before if self.mask is None else before[self.mask]
+        columns = {}
+        for c in self.after_columns:
+            if c in self.new_cols:
+                columns[c] = self.new_cols[c].reset_index(drop=True)
+            else:
+                columns[c] = rows[self.renames.get(c, c)].reset_index(drop=True)
+        df = pd.DataFrame(columns, columns=self.after_columns)
+        df.index = rows.index
+        return df
+
+
+class History:
+    """Undo/redo stacks of :class:`Delta` entries under a memory budget.
+
+    When the in-memory size of all entries exceeds ``budget_mb`` the oldest
+    entries are spilled to the dataset store directory (``spill=True``) or
+    dropped. ``version`` is the dataset key the stacks were recorded against;
+    callers compare it with the current dataset to detect outside changes.
+    """
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, spill=True):
+        self.budget_mb = budget_mb
+        self.spill = spill
+        self.undo_stack = []
+        self.redo_stack = []
+        # Pipeline steps of entries dropped to stay within the budget
+        self.base_steps = []
+        self.version = None
+
+    @property
+    def steps(self):
+        """Pipeline steps from the loaded data to the current state."""
+        return self.base_steps + [d.step for d in self.undo_stack if d.step is not None]
+
+    def record(self, before, after, label="", step=None):
+        delta = Delta(before, after, label, step)
+        if delta.is_empty and step is None:
+            return False
+        self._clear(self.redo_stack)
+        self.undo_stack.append(delta)
+        self._enforce_budget()
+        return True
+
+    def undo(self, current):
+        if not self.undo_stack:
+            return None
+        delta = self.undo_stack.pop()
+        try:
+            df = delta.undo(current)
+        except OSError:
+            # A spilled entry was swept from disk; the history is unusable
+            self.clear()
+            return None
+        self.redo_stack.append(delta)
+        self._enforce_budget()
+        return df
+
+    def redo(self, current):
+        if not self.redo_stack:
+            return None
+        delta = self.redo_stack.pop()
+        try:
+            df = delta.redo(current)
+        except OSError:
+            # A spilled entry was swept from disk; the history is unusable
+            self.clear()
+            return None
+        self.undo_stack.append(delta)
+        self._enforce_budget()
+        return df
+
+    def clear(self):
+        self._clear(self.undo_stack)
+        self._clear(self.redo_stack)
+        self.base_steps = []
+
+    @staticmethod
+    def _clear(stack):
+        for delta in stack:
+            delta.discard()
+        stack.clear()
+
+    # --- Memory accounting ---
+    @property
+    def nbytes(self):
+        return sum(d.nbytes for d in self.undo_stack + self.redo_stack)
+
+    @property
+    def n_spilled(self):
+        return sum(d.spill_path is not None for d in self.undo_stack + self.redo_stack)
+
+    def _enforce_budget(self):
+        budget = self.budget_mb * 1024**2
+        # Oldest first: bottom of the undo stack, then bottom of the redo stack
+        # (the redo entry closest to the current state is at the top).
+        candidates = self.undo_stack[:-1] + self.redo_stack[:-1]
+        for delta in candidates:
+            if self.nbytes <= budget:
+                return
+            if delta.spill_path is not None:
+                continue
+            if self.spill:
+                delta.spill(store.STORE_DIR)
+            elif delta in self.undo_stack:
+                self.undo_stack.remove(delta)
+                if delta.step is not None:
+                    self.base_steps.append(delta.step)
+                delta.discard()
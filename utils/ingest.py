@@ -0,0 +1,210 @@
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.dtypes import compact_frame, is_text, should_categorize
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+# --- Chunk sources ---
+def _open(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb"), os.path.getsize(source), True
+    source.seek(0)
+    size = getattr(source, "size", None)
+    if size is None:
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(0)
+    return source, size, False
+
+
+def _name(source):
+    return str(getattr(source, "name", source))
+
+
+def iter_csv_chunks(handle, chunksize):
+    for chunk in pd.read_csv(handle, chunksize=chunksize, low_memory=False):
+        yield chunk, handle.tell()
+
+
+def iter_excel_chunks(handle, chunksize):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(handle, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        total = ws.max_row or 0
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [
+            str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)
+        ]
+
+        seen = 1
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunksize:
+                seen += len(batch)
+                yield pd.DataFrame(batch, columns=header).infer_objects(), seen / max(
+                    total, 1
+                )
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header).infer_objects(), 1.0
+    finally:
+        wb.close()
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrame chunks of a CSV, Excel or Parquet file."""
+    lower = str(path).lower()
+    if lower.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif lower.endswith((".xlsx", ".xls")):
+        with open(path, "rb") as handle:
+            for chunk, _ in iter_excel_chunks(handle, chunksize):
+                yield chunk
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, low_memory=False)
+
+
+# --- Combining compact chunks ---
+def _combine(chunks, category_ratio):
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+
+    n_rows = sum(len(c) for c in chunks)
+    out = {}
+    for col in chunks[0].columns:
+        parts = [c[col] for c in chunks]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            s = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+            if len(s.cat.categories) / n_rows > category_ratio:
+                s = s.astype(object)
+        else:
+            s = pd.concat(parts, ignore_index=True)
+            if is_text(s) and should_categorize(s, category_ratio):
+                s = s.astype("category")
+        out[col] = s
+        # Release the per-chunk copies as soon as the column is merged
+        for c in chunks:
+            del c[col]
+    return pd.DataFrame(out)
+
+
+# --- Public entry point ---
+def read_chunked(
+    source,
+    chunksize=DEFAULT_CHUNKSIZE,
+    max_rows=None,
+    max_memory_mb=None,
+    sample=False,
+    category_ratio=0.5,
+    random_state=42,
+    progress=None,
+):
+    """Stream a CSV/Excel file into a compact DataFrame.
+
+    Each chunk is downcast and categorised before the next one is read, so
+    peak memory stays close to the size of the final frame. When ``max_rows``
+    or ``max_memory_mb`` is reached, either the first rows are kept or, with
+    ``sample=True``, a uniform random sample of the whole file (bottom-k
+    sampling on random keys). ``progress(fraction, rows_read)`` is called
+    after each chunk.
+
+    Returns ``(df, info)`` where ``info`` describes what was read and kept.
+    """
+    handle, size, owned = _open(source)
+    is_excel = _name(source).lower().endswith((".xlsx", ".xls"))
+    rng = np.random.default_rng(random_state)
+
+    chunks, keys = [], []
+    rows_read = kept_rows = kept_bytes = 0
+    row_cap = None
+    truncated = False
+
+    try:
+        if is_excel:
+            stream = iter_excel_chunks(handle, chunksize)
+        else:
+            stream = (
+                (c, pos / max(size, 1)) for c, pos in iter_csv_chunks(handle, chunksize)
+            )
+
+        for chunk, fraction in stream:
+            rows_read += len(chunk)
+            chunk = compact_frame(chunk, category_ratio)
+
+            chunk_bytes = chunk.memory_usage(deep=True).sum()
+            kept_rows += len(chunk)
+            kept_bytes += chunk_bytes
+
+            # Row cap from the explicit limit and the running bytes/row estimate
+            row_cap = max_rows
+            if max_memory_mb is not None and kept_rows:
+                per_row = max(kept_bytes / kept_rows, 1)
+                mem_cap = int(max_memory_mb * 1024**2 / per_row)
+                row_cap = mem_cap if row_cap is None else min(row_cap, mem_cap)
+
+            if sample:
+                chunks.append(chunk)
+                keys.append(rng.random(len(chunk)))
+                # Amortised pruning: only re-filter once we hold twice the cap
+                if row_cap is not None and kept_rows > 2 * row_cap:
+                    chunks, keys = _bottom_k(chunks, keys, row_cap)
+                    kept_rows = sum(len(c) for c in chunks)
+                    kept_bytes = sum(c.memory_usage(deep=True).sum() for c in chunks)
+                    truncated = True
+            else:
+                if row_cap is not None and kept_rows >= row_cap:
+                    excess = kept_rows - row_cap
+                    if excess:
+                        chunk = chunk.iloc[: len(chunk) - excess]
+                    chunks.append(chunk)
+                    truncated = True
+                    if progress is not None:
+                        progress(1.0, rows_read)
+                    break
+                chunks.append(chunk)
+
+            if progress is not None:
+                progress(min(fraction, 1.0), rows_read)
+    finally:
+        if owned:
+            handle.close()
+
+    if sample and row_cap is not None and sum(len(c) for c in chunks) > row_cap:
+        chunks, keys = _bottom_k(chunks, keys, row_cap)
+        truncated = True
+
+    df = _combine(chunks, category_ratio)
+    info = {
+        "rows_read": rows_read,
+        "rows_kept": len(df),
+        "truncated": truncated,
+        "mode": "sample" if sample else "head",
+    }
+    return df, info
+
+
+def _bottom_k(chunks, keys, k):
+    threshold = np.partition(np.concatenate(keys), k - 1)[k - 1] if k > 0 else -1.0
+    new_chunks, new_keys = [], []
+    for chunk, key in zip(chunks, keys):
+        mask = key <= threshold
+        if mask.any():
+            new_chunks.append(chunk[mask])
+            new_keys.append(key[mask])
+    return new_chunks, new_keys
@@ -0,0 +1,358 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+
+# Jobs running at once per server process; the cores are shared between them
+MAX_RUNNING = int(os.environ.get("ML_APP_MAX_JOBS", max(1, (os.cpu_count() or 1) // 2)))
+# Jobs waiting for a slot before submit() refuses new ones
+MAX_QUEUED = int(os.environ.get("ML_APP_JOB_QUEUE", 8))
+# Finished jobs are forgotten after this long
+KEEP_FINISHED_SECONDS = 3600
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    """A function running in a background process, as seen by the app."""
+
+    id: str
+    label: str
+    owner: str
+    target: object
+    args: tuple
+    kwargs: dict
+    status: str = "queued"
+    progress: float = None
+    message: str = ""
+    result: object = None
+    error: str = ""
+    submitted: float = field(default_factory=time.time)
+    started: float = None
+    ended: float = None
+    process: object = None
+    conn: object = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.time()) - self.started
+
+
+# --- Server-wide state: shared by all sessions of this Streamlit process ---
+_ctx = mp.get_context("spawn")
+_jobs = OrderedDict()
+_lock = threading.Lock()
+_supervisor = None
+
+
+def _ensure_supervisor():
+    global _supervisor
+    if _supervisor is None or not _supervisor.is_alive():
+        _supervisor = threading.Thread(target=_supervise, daemon=True)
+        _supervisor.start()
+
+
+# --- Public API ---
+def submit(target, *args, label="", owner=None, **kwargs):
+    """Queue ``target(*args, progress=..., **kwargs)`` and return the job id.
+
+    ``target`` must be importable by name (it runs in a spawned process) and
+    may call ``progress(fraction, message)``; ``fraction`` is None when the
+    work can't be measured.
+    """
+    with _lock:
+        _ensure_supervisor()
+        queued = sum(job.status == "queued" for job in _jobs.values())
+        if queued >= MAX_QUEUED:
+            raise JobQueueFull(
+                f"{queued} jobs are already waiting; try again when one finishes."
+            )
+        job = Job(
+            uuid.uuid4().hex, label or target.__name__, owner, target, args, kwargs
+        )
+        _jobs[job.id] = job
+        _start_queued()
+    return job.id
+
+
+def get(job_id):
+    with _lock:
+        # Restarts a supervisor that died, so running jobs keep being followed
+        _ensure_supervisor()
+        return _jobs.get(job_id) if job_id else None
+
+
+def jobs(owner=None):
+    """Jobs of ``owner`` (all when None), oldest first."""
+    with _lock:
+        _ensure_supervisor()
+        return [j for j in _jobs.values() if owner is None or j.owner == owner]
+
+
+def cancel(job_id):
+    """Cancel a queued job or terminate a running one."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job.process is not None:
+            job.process.terminate()
+            job.process.join()
+        _end(job, "cancelled")
+        _start_queued()
+    return True
+
+
+def forget(job_id):
+    """Remove a finished job and its result."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None and job.finished:
+            del _jobs[job_id]
+
+
+# --- Supervisor ---
+# Each job reports over its own pipe, so terminating one mid-message can't
+# corrupt what the others send
+def _worker(conn, target, args, kwargs):
+    def progress(fraction=None, message=""):
+        conn.send(("progress", (fraction, message)))
+
+    try:
+        result = target(*args, progress=progress, **kwargs)
+    except Exception as e:
+        conn.send(("failed", f"{type(e).__name__}: {e}"))
+    else:
+        try:
+            conn.send(("done", result))
+        except Exception as e:
+            # The result is pickled before anything is written to the pipe
+            conn.send(("failed", f"Result can't be sent back: {type(e).__name__}: {e}"))
+    conn.close()
+
+
+def _start_queued():
+    running = sum(job.status == "running" for job in _jobs.values())
+    for job in _jobs.values():
+        if running >= MAX_RUNNING:
+            break
+        if job.status != "queued":
+            continue
+        job.conn, child = _ctx.Pipe(duplex=False)
+        job.process = _ctx.Process(
+            target=_worker,
+            args=(child, job.target, job.args, job.kwargs),
+            daemon=True,
+        )
+        job.process.start()
+        # Only the worker holds the writing end, so its exit reads as EOF
+        child.close()
+        job.status, job.started = "running", time.time()
+        running += 1
+
+
+def _end(job, status, error=""):
+    job.status, job.error, job.ended = status, error, time.time()
+    if job.started is None:
+        job.started = job.ended
+    if job.conn is not None:
+        job.conn.close()
+    job.process = job.conn = None
+
+
+def _receive(job):
+    try:
+        kind, payload = job.conn.recv()
+    except (EOFError, OSError):
+        # Died without reporting (e.g. killed by the OOM killer)
+        job.process.join()
+        _end(job, "failed", f"crashed (exit code {job.process.exitcode})")
+        return
+    if kind == "progress":
+        job.progress, job.message = payload
+    else:
+        job.process.join()
+        if kind == "done":
+            job.result, job.progress = payload, 1.0
+        _end(job, kind, "" if kind == "done" else payload)
+
+
+def _supervise():
+    while True:
+        with _lock:
+            conns = {j.conn: j for j in _jobs.values() if j.status == "running"}
+        if conns:
+            try:
+                ready = wait(list(conns), timeout=0.5)
+            except (OSError, ValueError):
+                # A job was cancelled (closing its pipe) while we waited
+                continue
+        else:
+            ready = []
+            time.sleep(0.5)
+
+        with _lock:
+            for conn in ready:
+                job = conns[conn]
+                # Drain everything sent so far; skip jobs cancelled while we waited
+                while job.conn is conn and conn.poll():
+                    _receive(job)
+
+            now = time.time()
+            for job in list(_jobs.values()):
+                if job.finished and now - job.ended > KEEP_FINISHED_SECONDS:
+                    del _jobs[job.id]
+            _start_queued()
+
+
+# --- Training job ---
+def fit_with_progress(model, X, y, progress):
+    """``model.fit(X, y)``, reporting progress where the estimator allows it.
+
+    XGBoost reports every boosting round through a callback and forests are
+    grown ten chunks of trees at a time with ``warm_start``; other models
+    only report that they are fitting.
+    """
+    from sklearn.ensemble import BaseEnsemble
+    from sklearn.pipeline import Pipeline
+
+    estimator = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    params = estimator.get_params()
+
+    if type(estimator).__name__.startswith("XGB"):
+        from xgboost.callback import TrainingCallback
+
+        total = params["n_estimators"] or 100
+
+        class Report(TrainingCallback):
+            def after_iteration(self, booster, epoch, evals_log):
+                progress((epoch + 1) / total, f"round {epoch + 1}/{total}")
+                return False
+
+        estimator.set_params(callbacks=[Report()])
+        try:
+            model.fit(X, y)
+        finally:
+            # Keeps the fitted model picklable
+            estimator.set_params(callbacks=None)
+
+    elif isinstance(estimator, BaseEnsemble) and "warm_start" in params:
+        total = params["n_estimators"]
+        step = max(1, total // 10)
+        estimator.set_params(warm_start=True)
+        try:
+            for n in list(range(step, total, step)) + [total]:
+                estimator.set_params(n_estimators=n)
+                model.fit(X, y)
+                progress(n / total, f"{n}/{total} trees")
+        finally:
+            estimator.set_params(warm_start=False)
+
+    else:
+        progress(None, "fitting")
+        model.fit(X, y)
+
+
+def train(task, name, split, params=None, progress=None):
+    """Job target: fit ``name`` on ``split`` through the model cache and predict the test set."""
+    from utils import model_cache
+    from utils.models import set_n_jobs
+    from utils.sparse import with_sparse
+    from utils.splits import materialize
+
+    progress = progress or (lambda fraction=None, message="": None)
+    progress(0.0, "loading data")
+    X_train, X_test, y_train, y_test = materialize(split)
+    params = with_sparse(params, split)
+    fingerprint = model_cache.split_fingerprint(split)
+
+    def fit(model, X, y):
+        set_n_jobs(model, max(1, (os.cpu_count() or 1) // MAX_RUNNING))
+        fit_with_progress(model, X, y, progress)
+
+    start = time.perf_counter()
+    model, cached = model_cache.fit_cached(
+        name, X_train, y_train, params, fingerprint=fingerprint, fit=fit
+    )
+    fit_seconds = time.perf_counter() - start
+    progress(1.0, "predicting")
+    return {
+        "task": task,
+        "model": name,
+        "cache_key": model_cache.cache_key(fingerprint, name, params),
+        "fingerprint": fingerprint,
+        "cached": cached,
+        "updated": False,
+        "fit_seconds": fit_seconds,
+        "y_pred": model.predict(X_test),
+    }
+
+
+def update(task, name, split, base_key, progress=None):
+    """Job target: continue training cached model ``base_key`` on the split's new rows.
+
+    The split comes from :func:`utils.splits.extend`: training rows from
+    ``split["new_from"]`` on were appended after the model was trained.
+    """
+    from utils import model_cache
+    from utils.models import set_n_jobs, update_model
+    from utils.splits import materialize
+
+    progress = progress or (lambda fraction=None, message="": None)
+    progress(0.0, "loading data")
+    X_train, X_test, y_train, y_test = materialize(split)
+    new = split["train"] >= split["new_from"]
+    if not new.any():
+        raise ValueError("The split has no new training rows.")
+    fingerprint = model_cache.split_fingerprint(split)
+    params = {"update_of": base_key}
+    key = model_cache.cache_key(fingerprint, name, params)
+
+    start = time.perf_counter()
+    model = model_cache.get(key)
+    cached = model is not None
+    if not cached:
+        model = model_cache.get(base_key)
+        if model is None:
+            raise ValueError(
+                "The model to update was evicted from the model cache; train it again."
+            )
+        progress(None, f"updating on {int(new.sum()):,} new rows")
+        set_n_jobs(model, max(1, (os.cpu_count() or 1) // MAX_RUNNING))
+        update_model(model, X_train[new], y_train[new], rows_seen=int((~new).sum()))
+        model_cache.put(
+            key,
+            model,
+            model=name,
+            params=params,
+            rows=int(new.sum()),
+            features=list(map(str, X_train.columns)),
+            fit_seconds=time.perf_counter() - start,
+        )
+    fit_seconds = time.perf_counter() - start
+    progress(1.0, "predicting")
+    return {
+        "task": task,
+        "model": name,
+        "cache_key": key,
+        "fingerprint": fingerprint,
+        "cached": cached,
+        "updated": True,
+        "fit_seconds": fit_seconds,
+        "y_pred": model.predict(X_test),
+    }
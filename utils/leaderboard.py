@@ -0,0 +1,150 @@
+import multiprocessing as mp
+import os
+import time
+from multiprocessing.connection import wait
+
+import numpy as np
+
+
+# --- Scoring ---
+def score(task, y_true, y_pred):
+    from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score
+
+    if task == "Classification":
+        return {
+            "accuracy": accuracy_score(y_true, y_pred),
+            "f1 (macro)": f1_score(y_true, y_pred, average="macro"),
+        }
+    return {"MSE": mean_squared_error(y_true, y_pred), "R²": r2_score(y_true, y_pred)}
+
+
+def fit_and_score(task, name, split, n_jobs=1, params=None, fold=None):
+    """Fit one model on a split (or one of its folds) and return its metrics and timings."""
+    from utils.model_cache import fit_cached, split_fingerprint
+    from utils.models import set_n_jobs
+    from utils.sparse import with_sparse
+    from utils.splits import materialize
+
+    X_train, X_test, y_train, y_test = materialize(split, fold)
+
+    def fit(model, X, y):
+        set_n_jobs(model, n_jobs)
+        model.fit(X, y)
+
+    # Unchanged data, model and parameters reload the earlier fit from disk
+    start = time.perf_counter()
+    model, cached = fit_cached(
+        name,
+        X_train,
+        y_train,
+        with_sparse(params, split),
+        fingerprint=split_fingerprint(split, fold),
+        fit=fit,
+    )
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+
+    return {
+        "model": name,
+        "status": "ok (cached)" if cached else "ok",
+        **score(task, y_test, y_pred),
+        "fit time (s)": fit_time,
+        "predict time (s)": predict_time,
+    }
+
+
+# --- Cross-validation ---
+def cross_validate(task, name, split, max_workers=None, params=None):
+    """Score ``name`` on every fold of ``split``, folds running in parallel processes.
+
+    Workers select their fold from the shared, memory-mapped dataset by the
+    split's stored indices, and folds trained before reload from the model
+    cache. Returns one row per fold.
+    """
+    from joblib import Parallel, delayed
+
+    folds = range(len(split["folds"]))
+    cpus = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers or cpus, len(folds) or 1))
+    n_jobs = max(1, cpus // max_workers)
+
+    rows = Parallel(n_jobs=max_workers)(
+        delayed(fit_and_score)(task, name, split, n_jobs, params, fold)
+        for fold in folds
+    )
+    for fold, row in zip(folds, rows):
+        row["fold"] = fold + 1
+    return rows
+
+
+def _worker(conn, task, name, split, n_jobs):
+    try:
+        result = fit_and_score(task, name, split, n_jobs)
+    except Exception as e:
+        result = {"model": name, "status": f"error: {type(e).__name__}: {e}"}
+    conn.send(result)
+    conn.close()
+
+
+# --- Parallel runner ---
+def run_leaderboard(task, names, split, max_workers=None, timeout=None):
+    """Train ``names`` concurrently, one process each, yielding results as they finish.
+
+    At most ``max_workers`` models run at once and the machine's cores are
+    shared between them through ``n_jobs``. A model still running after
+    ``timeout`` seconds is terminated and reported as timed out. Each model
+    reports through its own pipe, so terminating one can't corrupt the
+    results of the others.
+    """
+    cpus = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers or cpus, len(names) or 1))
+    n_jobs = max(1, cpus // max_workers)
+
+    ctx = mp.get_context("spawn")
+    pending = list(names)
+    running = {}  # name -> (process, read end of its pipe, start time)
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            name = pending.pop(0)
+            conn, child = ctx.Pipe(duplex=False)
+            proc = ctx.Process(
+                target=_worker, args=(child, task, name, split, n_jobs), daemon=True
+            )
+            proc.start()
+            child.close()
+            running[name] = (proc, conn, time.perf_counter())
+
+        conns = {conn: name for name, (_, conn, _) in running.items()}
+        for conn in wait(list(conns), timeout=0.2):
+            name = conns[conn]
+            proc, _, _ = running.pop(name)
+            try:
+                result = conn.recv()
+            except EOFError:
+                result = None
+            conn.close()
+            proc.join()
+            if result is None:
+                # Exited without reporting (e.g. killed by the OOM killer)
+                result = {
+                    "model": name,
+                    "status": f"crashed (exit code {proc.exitcode})",
+                }
+            yield result
+
+        now = time.perf_counter()
+        for name, (proc, conn, started) in list(running.items()):
+            if timeout is not None and now - started > timeout:
+                proc.terminate()
+                proc.join()
+                conn.close()
+                running.pop(name)
+                yield {
+                    "model": name,
+                    "status": f"timed out after {timeout:.0f}s",
+                    "fit time (s)": np.nan,
+                }
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils import dataset_store as store
+
+CACHE_DIR = os.environ.get(
+    "ML_APP_MODEL_CACHE_DIR", os.path.join(store.STORE_DIR, "models")
+)
+MAX_CACHE_MB = float(os.environ.get("ML_APP_MODEL_CACHE_MB", 2048))
+
+# (dataset version, columns) -> data fingerprint, so reruns don't rehash it
+_fingerprints = {}
+
+
+# --- Keys ---
+def data_fingerprint(X, y):
+    """Content hash of a training set: values, index, column names and dtypes."""
+    h = hashlib.sha256()
+    for obj in (X, y):
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        frame = obj.to_frame() if isinstance(obj, pd.Series) else obj
+        h.update(repr([(str(c), str(t)) for c, t in frame.dtypes.items()]).encode())
+    return h.hexdigest()
+
+
+def split_fingerprint(split, fold=None):
+    """Fingerprint of the training rows of a split, or of one of its folds.
+
+    The split's dataset is hashed once per version; the training rows are
+    identified by their positions in it.
+    """
+    features, target = list(split["features"]), split["target"]
+    version = (split["dataset"].key, tuple(features), target)
+    if version not in _fingerprints:
+        df = store.load_cached(split["dataset"], features + [target])
+        _fingerprints[version] = data_fingerprint(df[features], df[target])
+    rows = split["train"] if fold is None else split["folds"][fold][0]
+    h = hashlib.sha256(_fingerprints[version].encode())
+    h.update(np.asarray(rows, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+def cache_key(fingerprint, name, params=None):
+    spec = {"data": fingerprint, "model": name, "params": params or {}}
+    text = json.dumps(spec, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def _paths(key):
+    base = os.path.join(CACHE_DIR, key)
+    return base + ".joblib", base + ".json"
+
+
+# --- Reading / writing ---
+def get(key):
+    """Cached model for ``key`` or None; a hit marks the entry as recently used."""
+    path, _ = _paths(key)
+    try:
+        model = joblib.load(path)
+    except (OSError, EOFError):
+        return None
+    os.utime(path)
+    return model
+
+
+def put(key, estimator, **meta):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path, meta_path = _paths(key)
+    # Unique, so processes caching the same key at once don't interleave writes
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        joblib.dump(estimator, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    tmp = f"{meta_path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"key": key, "created": time.time(), **meta}, f, default=repr)
+    os.replace(tmp, meta_path)
+    evict()
+
+
+def fit_cached(name, X, y, params=None, fingerprint=None, fit=None):
+    """Return ``(model, hit)``, training and caching the model on a miss.
+
+    ``fit(model, X, y)`` overrides the plain ``model.fit`` call, e.g. to set
+    ``n_jobs`` first.
+    """
+    from utils.models import make_model
+
+    params = params or {}
+    fingerprint = fingerprint or data_fingerprint(X, y)
+    key = cache_key(fingerprint, name, params)
+
+    model = get(key)
+    if model is not None:
+        return model, True
+
+    model = make_model(name, **params)
+    start = time.perf_counter()
+    if fit is None:
+        model.fit(X, y)
+    else:
+        fit(model, X, y)
+    put(
+        key,
+        model,
+        model=name,
+        params=params,
+        rows=len(X),
+        features=list(map(str, X.columns)),
+        fit_seconds=time.perf_counter() - start,
+    )
+    return model, False
+
+
+# --- Housekeeping ---
+def entries():
+    """Cached models, most recently used first."""
+    rows = []
+    if not os.path.isdir(CACHE_DIR):
+        return rows
+    for file in os.listdir(CACHE_DIR):
+        if not file.endswith(".joblib"):
+            continue
+        path, meta_path = _paths(file[: -len(".joblib")])
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            continue
+        rows.append(
+            {**meta, "path": path, "size_mb": stat.st_size / 1e6, "used": stat.st_mtime}
+        )
+    return sorted(rows, key=lambda r: r["used"], reverse=True)
+
+
+def delete(key):
+    for path in _paths(key):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def clear():
+    for entry in entries():
+        delete(entry["key"])
+
+
+def evict(max_mb=None):
+    """Drop least recently used models until the cache fits in ``max_mb``."""
+    max_mb = MAX_CACHE_MB if max_mb is None else max_mb
+    cached = entries()
+    total = sum(e["size_mb"] for e in cached)
+    # The most recently used model is always kept
+    while len(cached) > 1 and total > max_mb:
+        oldest = cached.pop()
+        delete(oldest["key"])
+        total -= oldest["size_mb"]
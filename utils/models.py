@@ -0,0 +1,214 @@
+import importlib
+import importlib.util
+import os
+
+import numpy as np
+
+TASKS = ("Classification", "Regression")
+
+# --- Model registry: display name -> factory with the app's defaults ---
+# Estimator classes are imported when a model is first built, so listing the
+# models (e.g. to fill a selectbox) imports neither scikit-learn nor XGBoost
+CLASSIFIERS = {}
+REGRESSORS = {}
+# Models trained on a CSR matrix when the split has sparse one-hot columns;
+# the others see the category codes as a single integer feature
+SPARSE_MODELS = set()
+
+
+def _resolve(estimator):
+    if isinstance(estimator, str):
+        module, _, name = estimator.partition(":")
+        return getattr(importlib.import_module(module), name)
+    return estimator
+
+
+def register_model(name, task, estimator, defaults=None, sparse=False):
+    """Offer model ``name`` for ``task`` ("Classification" or "Regression").
+
+    ``estimator`` is an estimator class or factory, or a ``"module:Class"``
+    path imported only when the model is built. ``defaults`` are the app's
+    parameters, overridden by those passed to :func:`make_model`. With
+    ``sparse`` the model takes sparse one-hot columns as a CSR matrix.
+    Registering a name again replaces it.
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown task: {task}")
+    defaults = dict(defaults or {})
+
+    def factory(**params):
+        return _resolve(estimator)(**{**defaults, **params})
+
+    CLASSIFIERS.pop(name, None)
+    REGRESSORS.pop(name, None)
+    (CLASSIFIERS if task == "Classification" else REGRESSORS)[name] = factory
+    SPARSE_MODELS.discard(name)
+    if sparse:
+        SPARSE_MODELS.add(name)
+
+
+# --- Built-in models ---
+register_model(
+    "Logistic Regression",
+    "Classification",
+    "sklearn.linear_model:LogisticRegression",
+    {"max_iter": 500},
+    sparse=True,
+)
+register_model("Decision Tree", "Classification", "sklearn.tree:DecisionTreeClassifier")
+register_model(
+    "Random Forest", "Classification", "sklearn.ensemble:RandomForestClassifier"
+)
+register_model("SVM", "Classification", "sklearn.svm:SVC")
+register_model("Linear SVM", "Classification", "sklearn.svm:LinearSVC", sparse=True)
+register_model(
+    "SGD Classifier",
+    "Classification",
+    "sklearn.linear_model:SGDClassifier",
+    sparse=True,
+)
+register_model(
+    "Linear Regression",
+    "Regression",
+    "sklearn.linear_model:LinearRegression",
+    sparse=True,
+)
+register_model(
+    "Decision Tree Regressor", "Regression", "sklearn.tree:DecisionTreeRegressor"
+)
+register_model(
+    "Random Forest Regressor", "Regression", "sklearn.ensemble:RandomForestRegressor"
+)
+register_model("SVM Regressor", "Regression", "sklearn.svm:SVR")
+register_model(
+    "Linear SVM Regressor", "Regression", "sklearn.svm:LinearSVR", sparse=True
+)
+register_model(
+    "SGD Regressor", "Regression", "sklearn.linear_model:SGDRegressor", sparse=True
+)
+
+# Optional: XGBoost, found without importing it
+xgb_available = importlib.util.find_spec("xgboost") is not None
+if xgb_available:
+    register_model("XGBoost", "Classification", "xgboost:XGBClassifier", sparse=True)
+    register_model(
+        "XGBoost Regressor", "Regression", "xgboost:XGBRegressor", sparse=True
+    )
+
+# Extra models: each module in ML_APP_MODEL_PLUGINS (comma-separated) calls
+# register_model() when imported. Background jobs import this module in a
+# fresh process, so they register the same models
+for _module in os.environ.get("ML_APP_MODEL_PLUGINS", "").split(","):
+    if _module.strip():
+        importlib.import_module(_module.strip())
+
+
+def model_names(task):
+    return list(CLASSIFIERS if task == "Classification" else REGRESSORS)
+
+
+def make_model(name, sparse_columns=None, **params):
+    """Build ``name``; ``sparse_columns`` are one-hot expanded in front of it."""
+    factory = CLASSIFIERS.get(name) or REGRESSORS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown model: {name}")
+    model = factory(**params)
+    if sparse_columns:
+        from sklearn.pipeline import Pipeline
+
+        from utils.sparse import OneHotCodes
+
+        encoder = OneHotCodes(list(sparse_columns), sparse=name in SPARSE_MODELS)
+        model = Pipeline([("one_hot", encoder), ("model", model)])
+    return model
+
+
+def set_n_jobs(model, n_jobs):
+    """Pass ``n_jobs`` to estimators that support it; returns True if set."""
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(model, Pipeline):
+        model = model.steps[-1][1]
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+        return True
+    return False
+
+
+# --- Incremental updates ---
+def _is_xgb(estimator):
+    return type(estimator).__name__.startswith("XGB")
+
+
+def _is_forest(estimator):
+    from sklearn.ensemble import BaseEnsemble
+
+    return (
+        isinstance(estimator, BaseEnsemble) and "warm_start" in estimator.get_params()
+    )
+
+
+def can_update(model):
+    """Whether :func:`update_model` can continue training ``model``."""
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(model, Pipeline):
+        model = model.steps[-1][1]
+    return _is_xgb(model) or _is_forest(model) or hasattr(model, "partial_fit")
+
+
+def update_model(model, X, y, rows_seen=None):
+    """Continue training the fitted ``model`` on the new rows ``X, y`` only.
+
+    XGBoost adds boosting rounds to its booster, forests grow extra trees on
+    the new rows with ``warm_start`` and estimators with ``partial_fit`` take
+    one more pass over them. Given ``rows_seen``, the rows the model was
+    trained on so far, rounds and trees are added in proportion to the new
+    rows. Encoders in front of the model keep their fitted categories.
+    """
+    from sklearn.pipeline import Pipeline
+
+    estimator = model
+    if isinstance(model, Pipeline):
+        estimator = model.steps[-1][1]
+        X = model[:-1].transform(X)
+
+    def more(n):
+        return n if not rows_seen else max(1, round(n * len(y) / rows_seen))
+
+    classes = getattr(estimator, "classes_", None)
+    if classes is not None:
+        labels = np.unique(y)
+        unseen = set(labels.tolist()) - set(np.asarray(classes).tolist())
+        if unseen:
+            raise ValueError(
+                f"New classes in the target ({', '.join(map(str, unseen))}); "
+                "retrain the model instead."
+            )
+        if not hasattr(estimator, "partial_fit") and len(labels) < len(classes):
+            raise ValueError(
+                "The new rows don't contain every class; retrain the model instead."
+            )
+
+    if _is_xgb(estimator):
+        n = estimator.get_params()["n_estimators"] or 100
+        estimator.set_params(n_estimators=more(n))
+        try:
+            estimator.fit(X, y, xgb_model=estimator.get_booster())
+        finally:
+            estimator.set_params(n_estimators=n)
+    elif _is_forest(estimator):
+        n = estimator.get_params()["n_estimators"]
+        estimator.set_params(warm_start=True, n_estimators=n + more(n))
+        try:
+            estimator.fit(X, y)
+        finally:
+            estimator.set_params(warm_start=False)
+    elif hasattr(estimator, "partial_fit"):
+        estimator.partial_fit(X, y)
+    else:
+        raise ValueError(
+            f"{type(estimator).__name__} can't be updated incrementally; "
+            "retrain it instead."
+        )
+    return model
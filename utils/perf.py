@@ -0,0 +1,212 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Set ML_APP_PERF=0 to turn the spans into no-ops
+ENABLED = os.environ.get("ML_APP_PERF", "1") != "0"
+# Finished reruns are appended here as JSON lines, for production sessions
+LOG_PATH = os.environ.get("ML_APP_PERF_LOG")
+KEEP_RUNS = 50
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def rss_mb():
+    """Resident memory of this process in MB (None where /proc is unavailable)."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024**2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# --- Recording ---
+def _state():
+    # Spans are only recorded on a Streamlit script thread; the CLI, batch
+    # workers and benchmarks see no-ops
+    if not ENABLED or get_script_run_ctx() is None:
+        return None
+    if "perf" not in st.session_state:
+        st.session_state["perf"] = {"current": None, "runs": deque(maxlen=KEEP_RUNS)}
+    return st.session_state["perf"]
+
+
+@contextmanager
+def span(name, **args):
+    """Time a block of the current rerun and the change in resident memory."""
+    state = _state()
+    run = state and state["current"]
+    if not run:
+        yield
+        return
+    start = time.perf_counter()
+    rss = rss_mb()
+    run["depth"] += 1
+    try:
+        yield
+    finally:
+        run["depth"] -= 1
+        end_rss = rss_mb()
+        run["spans"].append(
+            {
+                "name": name,
+                "start": start - run["t0"],
+                "seconds": time.perf_counter() - start,
+                "rss_delta_mb": None if rss is None else end_rss - rss,
+                "depth": run["depth"],
+                "args": args,
+            }
+        )
+
+
+def timed(name=None):
+    """Decorator form of :func:`span`."""
+
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _finish(state, completed):
+    run = state["current"]
+    if run is None:
+        return
+    if completed:
+        run["seconds"] = time.perf_counter() - run["t0"]
+    else:
+        # The script stopped early (st.stop, an exception); end at the last span
+        run["seconds"] = max(
+            (s["start"] + s["seconds"] for s in run["spans"]), default=0
+        )
+    run["completed"] = completed
+    run["rss_mb"] = rss_mb()
+    del run["t0"], run["depth"]
+    run["spans"].sort(key=lambda s: s["start"])
+    state["runs"].append(run)
+    state["current"] = None
+    if LOG_PATH:
+        with open(LOG_PATH, "a") as f:
+            f.write(json.dumps(run, default=str) + "\n")
+
+
+# --- Page hooks ---
+def start_page(page):
+    """Call at the top of a page: starts a rerun and shows the last breakdown."""
+    state = _state()
+    if state is None:
+        return
+    _finish(state, completed=False)
+    state["current"] = {
+        "page": page,
+        "wall": time.time(),
+        "t0": time.perf_counter(),
+        "depth": 0,
+        "spans": [],
+    }
+    state["placeholder"] = st.sidebar.empty()
+    if state["runs"]:
+        with state["placeholder"].container():
+            _panel(state, "previous")
+
+
+def finish_page():
+    """Call at the end of a page: closes the rerun and shows its breakdown."""
+    state = _state()
+    if state is None or state["current"] is None:
+        return
+    _finish(state, completed=True)
+    with state["placeholder"].container():
+        _panel(state, "last")
+
+
+# --- Export ---
+def to_json(runs):
+    return json.dumps(list(runs), indent=2, default=str)
+
+
+def to_chrome_trace(runs):
+    """Runs as Chrome trace events (open in chrome://tracing or Perfetto)."""
+    events = []
+    for run in runs:
+        base = run["wall"] * 1e6
+        events.append(
+            {
+                "name": run["page"],
+                "cat": "rerun",
+                "ph": "X",
+                "ts": base,
+                "dur": run["seconds"] * 1e6,
+                "pid": 1,
+                "tid": 1,
+                "args": {"completed": run["completed"], "rss_mb": run["rss_mb"]},
+            }
+        )
+        for s in run["spans"]:
+            events.append(
+                {
+                    "name": s["name"],
+                    "cat": run["page"],
+                    "ph": "X",
+                    "ts": base + s["start"] * 1e6,
+                    "dur": s["seconds"] * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                    "args": {"rss_delta_mb": s["rss_delta_mb"], **s["args"]},
+                }
+            )
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+
+
+# --- Sidebar panel ---
+def _panel(state, key):
+    import pandas as pd
+
+    run = state["runs"][-1]
+    with st.expander("⏱️ Performance", expanded=False):
+        status = "" if run["completed"] else " (stopped early)"
+        rss = f" · {run['rss_mb']:,.0f} MB resident" if run["rss_mb"] else ""
+        st.caption(f"Last rerun of {run['page']}: {run['seconds']:.2f}s{status}{rss}")
+        if run["spans"]:
+            table = pd.DataFrame(
+                {
+                    "step": ["  " * s["depth"] + s["name"] for s in run["spans"]],
+                    "ms": [s["seconds"] * 1000 for s in run["spans"]],
+                    "Δ MB": [s["rss_delta_mb"] for s in run["spans"]],
+                }
+            )
+            st.dataframe(table.round(1), hide_index=True)
+
+        runs = list(state["runs"])
+        st.caption(f"{len(runs)} reruns recorded")
+        col_json, col_trace = st.columns(2)
+        col_json.download_button(
+            "JSON",
+            to_json(runs),
+            "perf.json",
+            "application/json",
+            key=f"perf_json_{key}",
+        )
+        col_trace.download_button(
+            "Chrome trace",
+            to_chrome_trace(runs),
+            "perf.trace.json",
+            "application/json",
+            key=f"perf_trace_{key}",
+        )
@@ -0,0 +1,352 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils import text
+from utils.dtypes import STRING_DTYPE, cast_safely, optimize_frame
+from utils.expressions import Expression
+
+# Each op is registered with an ``apply(df, **params)`` function and an
+# optional ``fit(df, **params)`` that records data-dependent values (fill
+# values, encoder categories, ...) in the step so it replays identically on
+# new files and on independent chunks.
+_OPS = {}
+
+# Dense one-hot beyond this many categories must use the sparse encoding
+MAX_DENSE_CATEGORIES = 1000
+RARE_CATEGORY = "__rare__"
+
+
+def op(name, fit=None):
+    def register(func):
+        _OPS[name] = (func, fit)
+        return func
+
+    return register
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray, pd.Index)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def make_step(name, df, **params):
+    """Fit op ``name`` on ``df`` and return it as a serializable step dict."""
+    if name not in _OPS:
+        raise ValueError(f"Unknown pipeline step: {name}")
+    fit = _OPS[name][1]
+    if fit is not None:
+        params.update(fit(df, **params))
+    return {"op": name, **_jsonable(params)}
+
+
+def apply_step(df, step):
+    params = dict(step)
+    name = params.pop("op")
+    if name not in _OPS:
+        raise ValueError(f"Unknown pipeline step: {name}")
+    return _OPS[name][0](df, **params)
+
+
+def _with_column(df, column, values):
+    out = df.copy(deep=False)
+    out[column] = values
+    return out
+
+
+def _append_columns(df, new):
+    # Like assigning each column: outputs that already exist (e.g. from
+    # splitting the same column twice) are overwritten in place
+    new.index = df.index
+    existing = [c for c in new.columns if c in df.columns]
+    if existing:
+        df = df.copy(deep=False)
+        for c in existing:
+            df[c] = new[c]
+        new = new.drop(columns=existing)
+    return pd.concat([df, new], axis=1)
+
+
+# --- Cleaning steps ---
+@op("remove_nulls")
+def remove_nulls(df, column):
+    return df[df[column].notnull()]
+
+
+def _fit_fill(df, column, method, value=None):
+    s = df[column]
+    if method == "Mean" and pd.api.types.is_numeric_dtype(s):
+        value = s.mean()
+    elif method == "Median" and pd.api.types.is_numeric_dtype(s):
+        value = s.median()
+    else:
+        mode = s.mode()
+        value = mode.iloc[0] if len(mode) else None
+    return {"value": value}
+
+
+@op("fill_nulls", fit=_fit_fill)
+def fill_nulls(df, column, method, value=None):
+    if value is None:
+        return df
+    s = df[column]
+    if (
+        pd.api.types.is_integer_dtype(s)
+        and isinstance(value, float)
+        and not value.is_integer()
+    ):
+        # e.g. the mean of a (nullable) integer column
+        s = s.astype("float64")
+    return _with_column(df, column, s.fillna(value))
+
+
+def _fit_optimize(df, category_ratio=0.5, float_rtol=0.0, dtypes=None):
+    optimized, _ = optimize_frame(df, category_ratio, float_rtol)
+    return {
+        "dtypes": {
+            c: str(t) for c, t in optimized.dtypes.items() if str(t) != str(df[c].dtype)
+        }
+    }
+
+
+@op("optimize_dtypes", fit=_fit_optimize)
+def optimize_dtypes(df, dtypes, category_ratio=0.5, float_rtol=0.0):
+    """Cast columns to the compact dtypes chosen when the step was fitted."""
+    out = df.copy(deep=False)
+    for column, dtype in dtypes.items():
+        if column in out.columns:
+            out[column] = cast_safely(out[column], dtype)
+    return out
+
+
+@op("remove_values")
+def remove_values(df, column, values):
+    return df[~df[column].isin(values)]
+
+
+@op("to_numeric")
+def to_numeric(df, column):
+    return _with_column(df, column, pd.to_numeric(df[column], errors="coerce"))
+
+
+@op("to_string")
+def to_string(df, column):
+    # Arrow-backed, not one Python object per value
+    return _with_column(df, column, df[column].astype(str).astype(STRING_DTYPE))
+
+
+@op("drop_column")
+def drop_column(df, column):
+    return df.drop(columns=[column])
+
+
+@op("replace_substring")
+def replace_substring(df, column, old, new):
+    values = df[column].astype(str).str.replace(old, new, regex=False)
+    return _with_column(df, column, values)
+
+
+def _fit_operation(df, column, expression):
+    # Parse up front so invalid or disallowed expressions fail before any work
+    Expression(expression, df.columns)
+    return {}
+
+
+@op("apply_operation", fit=_fit_operation)
+def apply_operation(df, column, expression):
+    values = Expression(expression, df.columns).evaluate(df, column, n_jobs=-1)
+    return _with_column(df, column, values)
+
+
+def _fit_rename(df, column, new_name):
+    if new_name != column and new_name in df.columns:
+        raise ValueError(f"A column named {new_name!r} already exists")
+    return {}
+
+
+@op("rename_column", fit=_fit_rename)
+def rename_column(df, column, new_name):
+    return df.rename(columns={column: new_name})
+
+
+# --- Feature engineering steps ---
+def _fit_label(df, column, classes=None):
+    from sklearn.preprocessing import LabelEncoder
+
+    # Missing values are not a class; they encode as -1 like unseen values
+    return {"classes": LabelEncoder().fit(df[column].dropna()).classes_}
+
+
+@op("label_encode", fit=_fit_label)
+def label_encode(df, column, classes):
+    # Unseen values get -1 instead of failing like LabelEncoder.transform
+    codes = pd.Categorical(df[column], categories=classes).codes.astype("int64")
+    return _with_column(df, column + "_encoded", codes)
+
+
+def _fit_ordinal(df, column, categories=None):
+    from sklearn.preprocessing import OrdinalEncoder
+
+    return {"categories": OrdinalEncoder().fit(df[[column]].dropna()).categories_[0]}
+
+
+@op("ordinal_encode", fit=_fit_ordinal)
+def ordinal_encode(df, column, categories):
+    codes = pd.Categorical(df[column], categories=categories).codes.astype("float64")
+    codes[codes < 0] = np.nan
+    return _with_column(df, column + "_ordinal", codes)
+
+
+def _fit_one_hot(df, column, categories=None):
+    s = df[column]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        categories = s.cat.categories
+    else:
+        categories = pd.Categorical(s).categories
+    if len(categories) > MAX_DENSE_CATEGORIES:
+        raise ValueError(
+            f"{column} has {len(categories):,} categories; dense one-hot is limited to "
+            f"{MAX_DENSE_CATEGORIES:,}. Use sparse one-hot encoding instead."
+        )
+    return {"categories": categories}
+
+
+@op("one_hot_encode", fit=_fit_one_hot)
+def one_hot_encode(df, column, categories):
+    dummies = pd.get_dummies(
+        pd.Categorical(df[column], categories=categories), prefix=column
+    )
+    return _append_columns(df.drop(columns=[column]), dummies)
+
+
+def _fit_one_hot_sparse(
+    df, column, min_frequency=1, max_categories=None, categories=None
+):
+    # Categories seen fewer than ``min_frequency`` times, or beyond the
+    # ``max_categories`` most frequent, share one rare-category bucket
+    counts = df[column].value_counts()
+    kept = counts[counts >= min_frequency]
+    if max_categories:
+        kept = kept.head(max_categories)
+    categories = sorted(kept.index, key=str)
+    if len(kept) < len(counts):
+        categories.append(RARE_CATEGORY)
+    return {"categories": categories}
+
+
+@op("one_hot_sparse", fit=_fit_one_hot_sparse)
+def one_hot_sparse(df, column, categories, min_frequency=1, max_categories=None):
+    # Keeps one categorical column of codes; utils.sparse expands it into a
+    # CSR indicator matrix only when a model is trained
+    s = df[column]
+    if RARE_CATEGORY in categories:
+        s = s.where(s.isin(categories) | s.isna(), RARE_CATEGORY)
+    return _with_column(df, column, pd.Categorical(s, categories=categories))
+
+
+def _fit_split(df, column, delimiter):
+    parts = df[column].astype(str).str.split(delimiter, n=1, expand=True)
+    if parts.shape[1] != 2:
+        raise ValueError("Could not split column into 2 parts. Check delimiter.")
+    return {}
+
+
+@op("split_column", fit=_fit_split)
+def split_column(df, column, delimiter):
+    parts = df[column].astype(str).str.split(delimiter, n=1, expand=True)
+    parts = parts.reindex(columns=[0, 1])
+    parts.columns = [column + "_part1", column + "_part2"]
+    return _append_columns(df, parts)
+
+
+def _fit_regex(df, column, pattern, names):
+    if text.compile_pattern(pattern).groups != len(names):
+        raise ValueError("Number of groups does not match number of new column names")
+    return {}
+
+
+@op("regex_extract", fit=_fit_regex)
+def regex_extract(df, column, pattern, names):
+    return _append_columns(df, text.extract(df[column], pattern, names, n_jobs=-1))
+
+
+@op("split_delimiter")
+def split_delimiter(df, column, delimiter, names):
+    return _append_columns(df, text.split(df[column], delimiter, names, n_jobs=-1))
+
+
+@op("keyword_map")
+def keyword_map(df, column, mapping, new_column, default=None, case=False):
+    return _append_columns(
+        df,
+        text.keyword_map(df[column], mapping, new_column, default, case, n_jobs=-1),
+    )
+
+
+# --- Pipeline ---
+class Pipeline:
+    """An ordered list of fitted steps that can be saved and replayed."""
+
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])
+
+    def __len__(self):
+        return len(self.steps)
+
+    def apply(self, df):
+        for step in self.steps:
+            df = apply_step(df, step)
+        return df
+
+    def to_dict(self):
+        return {"version": 1, "steps": self.steps}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_yaml(self):
+        import yaml
+
+        return yaml.safe_dump(self.to_dict(), sort_keys=False)
+
+    @classmethod
+    def from_dict(cls, data):
+        steps = data["steps"] if isinstance(data, dict) else data
+        for step in steps:
+            if step.get("op") not in _OPS:
+                raise ValueError(f"Unknown pipeline step: {step.get('op')}")
+        return cls(steps)
+
+    @classmethod
+    def from_text(cls, text, fmt=None):
+        if fmt == "yaml" or (fmt is None and not text.lstrip().startswith(("{", "["))):
+            import yaml
+
+            return cls.from_dict(yaml.safe_load(text))
+        return cls.from_dict(json.loads(text))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        fmt = "yaml" if str(path).lower().endswith((".yaml", ".yml")) else "json"
+        return cls.from_text(text, fmt)
+
+    def save(self, path):
+        text = (
+            self.to_yaml()
+            if str(path).lower().endswith((".yaml", ".yml"))
+            else self.to_json()
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
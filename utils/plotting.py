@@ -0,0 +1,129 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# matplotlib and seaborn are imported by the functions below, so pages only
+# load them once a plot is drawn
+
+# Points drawn individually in a scatter; above this it becomes a hexbin
+SCATTER_MAX_POINTS = 20_000
+# Rows the KDE curve is fitted on (a KDE costs rows x grid points)
+KDE_MAX_POINTS = 10_000
+KDE_GRID_POINTS = 200
+
+
+# --- Rendering ---
+def to_png(fig, dpi=200):
+    """Render ``fig`` to PNG bytes (as ``st.pyplot`` would) and close it."""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+# --- Figures ---
+def histogram(values, bins=20, kde=True, seed=0):
+    """Histogram of all values, binned with numpy before anything is drawn.
+
+    The KDE curve is fitted on at most ``KDE_MAX_POINTS`` sampled values and
+    scaled to the counts, like seaborn's ``histplot(kde=True)``.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    values = pd.Series(values)
+    label = values.name
+    values = values.dropna().to_numpy(dtype=float)
+    counts, edges = np.histogram(values, bins=bins)
+
+    fig, ax = plt.subplots()
+    binned = pd.DataFrame({"value": edges[:-1], "count": counts})
+    sns.histplot(
+        binned,
+        x="value",
+        weights="count",
+        bins=len(counts),
+        binrange=(edges[0], edges[-1]),
+        ax=ax,
+    )
+    if kde and len(values) > 1 and np.ptp(values) > 0:
+        from scipy.stats import gaussian_kde
+
+        sample = values
+        if len(values) > KDE_MAX_POINTS:
+            rng = np.random.default_rng(seed)
+            sample = rng.choice(values, KDE_MAX_POINTS, replace=False)
+        grid = np.linspace(edges[0], edges[-1], KDE_GRID_POINTS)
+        density = gaussian_kde(sample)(grid)
+        ax.plot(grid, density * len(values) * (edges[1] - edges[0]))
+    ax.set_xlabel(label)
+    ax.set_ylabel("Count")
+    return fig
+
+
+def value_counts_bar(counts, label):
+    """Bar chart of precomputed value counts."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.barplot(x=counts.index.astype(str), y=counts.values, ax=ax)
+    ax.set_ylabel("Count")
+    ax.set_xlabel(label)
+    ax.set_xticks(ax.get_xticks())
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
+    return fig
+
+
+def actual_vs_predicted(y_true, y_pred, max_points=SCATTER_MAX_POINTS):
+    """Prediction-vs-actual scatter, drawn as a hexbin density for many points."""
+    import matplotlib.pyplot as plt
+
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    fig, ax = plt.subplots()
+    if len(y_true) <= max_points:
+        ax.scatter(y_true, y_pred, alpha=0.7)
+    else:
+        hb = ax.hexbin(y_true, y_pred, gridsize=60, bins="log", mincnt=1, cmap="Blues")
+        fig.colorbar(hb, ax=ax, label="Points (log)")
+    low, high = y_true.min(), y_true.max()
+    ax.plot([low, high], [low, high], "r--")
+    ax.set_xlabel("Actual")
+    ax.set_ylabel("Predicted")
+    return fig
+
+
+def correlation_heatmap(corr, annot=True):
+    """Heatmap of a correlation matrix, annotated with the values or (for wide ones) not."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if annot:
+        fig, ax = plt.subplots(figsize=(8, 5))
+        sns.heatmap(corr, annot=True, cmap="coolwarm", ax=ax)
+        return fig
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(
+        corr,
+        cmap="coolwarm",
+        vmin=-1,
+        vmax=1,
+        xticklabels=True,
+        yticklabels=True,
+        ax=ax,
+    )
+    ax.tick_params(labelsize=6)
+    return fig
+
+
+def confusion_matrix_heatmap(cm):
+    """Heatmap of a confusion matrix with the counts written in the cells."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots()
+    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", ax=ax)
+    return fig
@@ -0,0 +1,238 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+PROFILE_CHUNK_ROWS = 200_000
+
+
+# --- HyperLogLog distinct counts ---
+class HyperLogLog:
+    """Mergeable distinct-count sketch; relative error is about 1.04 / sqrt(2**p)."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, s):
+        if len(s) == 0:
+            return
+        h = pd.util.hash_pandas_object(s, index=False).to_numpy(np.uint64)
+        bits = 64 - self.p
+        idx = (h >> np.uint64(bits)).astype(np.int64)
+        rest = h & np.uint64((1 << bits) - 1)
+        # bit_length via frexp is exact here: ``rest`` has at most 50 bits
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+
+# --- Top-k value counts ---
+class TopK:
+    """Heavy-hitter summary keeping ``capacity`` candidates.
+
+    Counts are lower bounds; each is at most ``error`` below the true count.
+    """
+
+    def __init__(self, k=10, capacity=None):
+        self.k = k
+        self.capacity = capacity or 50 * k
+        self.counts = pd.Series(dtype="int64")
+        self.error = 0
+
+    def add(self, s):
+        vc = s.value_counts(dropna=True)
+        if len(vc) == 0:
+            return
+        vc.index = vc.index.astype(object)
+        counts = self.counts.add(vc, fill_value=0) if len(self.counts) else vc
+        if len(counts) > self.capacity:
+            counts = counts.sort_values(ascending=False)
+            self.error += int(counts.iloc[self.capacity])
+            counts = counts.iloc[: self.capacity]
+        self.counts = counts.astype("int64")
+
+    def top(self):
+        return self.counts.sort_values(ascending=False).head(self.k)
+
+
+# --- Streaming quantiles ---
+class QuantileSummary:
+    """Quantiles from per-chunk summaries of ``k`` evenly spaced order statistics.
+
+    Each chunk of ``n_i`` values contributes a rank error of at most
+    ``n_i / k``, so the merged summary answers any quantile within a rank
+    error of ``1 / k`` of the total count.
+    """
+
+    def __init__(self, k=1000):
+        self.k = k
+        self.values = []
+        self.weights = []
+        self.n = 0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        values.sort()
+        if n <= self.k:
+            self.values.append(values)
+            self.weights.append(np.ones(n))
+        else:
+            pos = ((np.arange(self.k) + 0.5) * n / self.k).astype(np.int64)
+            self.values.append(values[pos])
+            self.weights.append(np.full(self.k, n / self.k))
+        self.n += n
+
+    @property
+    def rank_error(self):
+        return 0.0 if self.n <= self.k else 1.0 / self.k
+
+    def quantiles(self, qs):
+        if self.n == 0:
+            return [np.nan for _ in qs]
+        values = np.concatenate(self.values)
+        weights = np.concatenate(self.weights)
+        order = np.argsort(values, kind="stable")
+        values, cum = values[order], np.cumsum(weights[order])
+        targets = np.asarray(qs) * cum[-1]
+        pos = np.searchsorted(cum, targets, side="left").clip(0, len(values) - 1)
+        return values[pos].tolist()
+
+
+# --- Single-pass moments (Chan et al. parallel update) ---
+class Moments:
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta**2 * self.n * n_b / n
+        self.n = n
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+
+# --- Column / dataset profiles ---
+def _numeric(s):
+    return pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+
+
+def profile_frame(df, sample_rows=None, random_state=42, top_k=5, quantile_k=1000):
+    """Single-pass profile of every column of ``df``.
+
+    With ``sample_rows`` the statistics are computed on a uniform random
+    sample and the result carries 95% error bounds: ``mean ±`` for means,
+    ``null % ±`` for null fractions, and ``quantile rank ±`` (DKW bound) for
+    quantiles. Distinct counts on a sample are lower bounds.
+
+    Returns a DataFrame with one row per column and an ``attrs["meta"]``
+    dict describing how it was computed.
+    """
+    n_total = len(df)
+    sampled = sample_rows is not None and sample_rows < n_total
+    if sampled:
+        rng = np.random.default_rng(random_state)
+        df = df.iloc[np.sort(rng.choice(n_total, size=sample_rows, replace=False))]
+    n = len(df)
+
+    rows = {}
+    for col in df.columns:
+        s = df[col]
+        hll = HyperLogLog()
+        is_num = _numeric(s)
+        topk = None if is_num else TopK(top_k)
+        moments, quant = (
+            (Moments(), QuantileSummary(quantile_k)) if is_num else (None, None)
+        )
+        nulls = 0
+
+        for start in range(0, n, PROFILE_CHUNK_ROWS):
+            part = s.iloc[start : start + PROFILE_CHUNK_ROWS]
+            nulls += int(part.isna().sum())
+            hll.add(part.dropna())
+            if topk is not None:
+                topk.add(part)
+            if is_num:
+                values = part.to_numpy(dtype=np.float64, na_value=np.nan)
+                moments.add(values)
+                quant.add(values)
+
+        row = {
+            "dtype": str(s.dtype),
+            "count": n - nulls,
+            "null %": 100 * nulls / n if n else np.nan,
+            "distinct (≈)": int(round(hll.estimate())),
+        }
+        top = topk.top() if topk is not None else []
+        if len(top):
+            row["top"] = top.index[0]
+            row["top freq"] = int(top.iloc[0])
+            if topk.error:
+                row["top freq ±"] = topk.error
+        if is_num:
+            q25, q50, q75 = quant.quantiles([0.25, 0.5, 0.75])
+            row.update(
+                mean=moments.mean if moments.n else np.nan,
+                std=moments.std,
+                min=moments.min if moments.n else np.nan,
+                **{"25%": q25, "50%": q50, "75%": q75},
+                max=moments.max if moments.n else np.nan,
+            )
+            row["quantile rank ±"] = quant.rank_error
+        if sampled:
+            fpc = math.sqrt((n_total - n) / max(n_total - 1, 1))
+            p = nulls / n if n else 0.0
+            row["null % ±"] = 100 * 1.96 * math.sqrt(p * (1 - p) / max(n, 1)) * fpc
+            if is_num and moments.n > 1:
+                row["mean ±"] = 1.96 * moments.std / math.sqrt(moments.n) * fpc
+            if is_num:
+                # Dvoretzky–Kiefer–Wolfowitz: empirical CDF within eps w.p. 95%
+                row["quantile rank ±"] += math.sqrt(math.log(2 / 0.05) / (2 * n))
+        rows[col] = row
+
+    profile = pd.DataFrame.from_dict(rows, orient="index")
+    profile.attrs["meta"] = {
+        "rows": n_total,
+        "profiled_rows": n,
+        "sampled": sampled,
+        "distinct_error": HyperLogLog().relative_error,
+    }
+    return profile
@@ -0,0 +1,201 @@
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import joblib
+import pandas as pd
+
+from utils.batch import ChunkWriter, output_paths
+from utils.ingest import DEFAULT_CHUNKSIZE, iter_chunks
+from utils.pipeline import Pipeline
+
+# Ops that drop rows rather than transform them
+ROW_FILTERS = ("remove_nulls", "remove_values")
+
+# Columns written by ops that don't write back to their own ``column``
+_WRITES = {
+    "label_encode": lambda s: [s["column"] + "_encoded"],
+    "ordinal_encode": lambda s: [s["column"] + "_ordinal"],
+    "split_column": lambda s: [s["column"] + "_part1", s["column"] + "_part2"],
+    "regex_extract": lambda s: s["names"],
+    "split_delimiter": lambda s: s["names"],
+    "keyword_map": lambda s: [s["new_column"]],
+    "rename_column": lambda s: [s["new_name"]],
+}
+
+
+def _writes(step):
+    func = _WRITES.get(step["op"])
+    return func(step) if func else [step.get("column")]
+
+
+# --- Model bundle ---
+@dataclass
+class ModelBundle:
+    """A trained model with the preprocessing and columns it expects."""
+
+    model: object
+    model_name: str = ""
+    task: str = "Classification"
+    features: list = field(default_factory=list)
+    target: str = None
+    steps: list = field(default_factory=list)
+
+    def target_columns(self):
+        """The target and every column it was built from (e.g. the raw label)."""
+        sources = {self.target}
+        for step in reversed(self.steps):
+            if sources.intersection(_writes(step)):
+                sources.add(step.get("column"))
+        sources.discard(None)
+        return sources
+
+    def scoring_pipeline(self):
+        # Steps that read or build the target (e.g. dropping rows with a
+        # missing label, encoding it) only make sense on training data; new
+        # files usually don't have the raw label at all
+        sources = self.target_columns()
+        return Pipeline(
+            s
+            for s in self.steps
+            if s.get("column") not in sources and not sources.intersection(_writes(s))
+        )
+
+    def row_filters(self):
+        """Describe the scoring steps that can drop input rows."""
+        return [
+            f"{s['op']} on {s['column']}"
+            for s in self.scoring_pipeline().steps
+            if s["op"] in ROW_FILTERS
+        ]
+
+    def predict(self, df, proba=False, keep=()):
+        """Preprocess raw rows and return the kept columns plus predictions."""
+        X = self.scoring_pipeline().apply(df)
+        missing = [c for c in self.features if c not in X.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(map(str, missing))}")
+        X = X[self.features] if self.features else X
+
+        out = df.loc[X.index, list(keep)].copy()
+        if len(X):
+            out["prediction"] = self.model.predict(X)
+            if proba and hasattr(self.model, "predict_proba"):
+                for cls, p in zip(self.model.classes_, self.model.predict_proba(X).T):
+                    out[f"proba_{cls}"] = p
+        else:
+            out["prediction"] = pd.Series(dtype=float)
+        return out
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a bundle; a bare estimator (e.g. from the model cache) is wrapped."""
+        obj = joblib.load(path)
+        if isinstance(obj, cls):
+            return obj
+        if not hasattr(obj, "predict"):
+            raise ValueError(f"{path} does not contain a model")
+        features = list(getattr(obj, "feature_names_in_", []))
+        task = "Classification" if hasattr(obj, "classes_") else "Regression"
+        return cls(obj, type(obj).__name__, task, features)
+
+
+# --- Worker side: the bundle is loaded once per process ---
+_bundle = None
+
+
+def _init_worker(path):
+    global _bundle
+    _bundle = ModelBundle.load(path)
+
+
+def _predict_chunk(chunk, proba, keep):
+    return _bundle.predict(chunk, proba, keep)
+
+
+# --- Streaming ---
+def score_file(
+    bundle_path,
+    src,
+    dst,
+    chunksize=DEFAULT_CHUNKSIZE,
+    workers=None,
+    proba=False,
+    keep=(),
+    progress=None,
+):
+    """Stream ``src`` through the bundle chunk by chunk and write predictions to ``dst``.
+
+    Chunks are read in this process and predicted in a pool of ``workers``
+    processes. At most two chunks per worker are in flight and results are
+    written in input order as soon as they are ready, so memory stays bounded
+    by the chunk size rather than the file size.
+
+    ``progress(rows_done)`` is called after every written chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    rows_in = rows_out = 0
+    keep = tuple(keep)
+
+    with ChunkWriter(dst) as writer:
+        if workers == 1:
+            _init_worker(bundle_path)
+            for chunk in iter_chunks(src, chunksize):
+                rows_in += len(chunk)
+                out = _predict_chunk(chunk, proba, keep)
+                rows_out += len(out)
+                writer.write(out)
+                if progress is not None:
+                    progress(rows_in)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(bundle_path,),
+            ) as pool:
+                pending = deque()
+                sizes = deque()
+                chunks = iter_chunks(src, chunksize)
+                while True:
+                    while len(pending) < 2 * workers:
+                        chunk = next(chunks, None)
+                        if chunk is None:
+                            break
+                        pending.append(pool.submit(_predict_chunk, chunk, proba, keep))
+                        sizes.append(len(chunk))
+                    if not pending:
+                        break
+                    out = pending.popleft().result()
+                    rows_in += sizes.popleft()
+                    rows_out += len(out)
+                    writer.write(out)
+                    if progress is not None:
+                        progress(rows_in)
+
+    return {
+        "input": src,
+        "output": dst,
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def score_files(bundle_path, files, out_dir, fmt=None, **kwargs):
+    """Score several files one after another, yielding one result per file."""
+    paths = output_paths(files, out_dir, fmt, suffix="_scored")
+    for dst in paths.values():
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    for src, dst in paths.items():
+        try:
+            yield score_file(bundle_path, src, dst, **kwargs)
+        except Exception as e:
+            yield {"input": src, "output": dst, "error": f"{type(e).__name__}: {e}"}
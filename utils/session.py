@@ -0,0 +1,240 @@
+import os
+import uuid
+
+import streamlit as st
+
+from utils import dataset_store as store
+from utils.history import History
+from utils.perf import span
+from utils.pipeline import Pipeline, apply_step, make_step
+from utils.dtypes import concat_rows
+from utils.splits import extend, is_valid, make_split, materialize, release
+
+
+def session_id():
+    """Stable id of this browser session, e.g. to find its background jobs."""
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return st.session_state["session_id"]
+
+
+# --- Working dataset ---
+# Every version the session uses is claimed in the store, for its memory
+# accounting and so datasets of idle sessions are evicted first
+def has_df():
+    handle = st.session_state.get("dataset")
+    store.claim(session_id(), "dataset", handle)
+    return store.exists(handle)
+
+
+def get_handle():
+    return st.session_state.get("dataset")
+
+
+def get_df(columns=None):
+    with span("load dataset", columns=len(columns) if columns else "all"):
+        return store.load_cached(st.session_state["dataset"], columns)
+
+
+def set_df(df):
+    with span("save dataset", rows=len(df)):
+        st.session_state["dataset"] = store.replace(st.session_state.get("dataset"), df)
+    store.claim(session_id(), "dataset", st.session_state["dataset"])
+
+
+def set_handle(handle):
+    st.session_state["dataset"] = handle
+    store.claim(session_id(), "dataset", handle)
+
+
+def df_columns():
+    return list(st.session_state["dataset"].columns)
+
+
+def df_head(n=5):
+    return store.head(st.session_state["dataset"], n)
+
+
+# --- Undo/redo history ---
+def get_history():
+    history = st.session_state.get("history")
+    if not isinstance(history, History):
+        history = st.session_state["history"] = History()
+    key = get_handle().key if get_handle() is not None else None
+    if history.version != key:
+        # The dataset was replaced outside the history (e.g. a new upload)
+        history.clear()
+        history.version = key
+    return history
+
+
+def commit(before, after, label="", step=None):
+    """Record ``before -> after`` in the history and make ``after`` current."""
+    history = get_history()
+    # Saved first: a version that fails to save must not reach the history
+    set_df(after)
+    with span("record history"):
+        history.record(before, after, label, step)
+    history.version = get_handle().key
+
+
+def apply_and_commit(df, step, label=None):
+    with span(f"apply {step['op']}"):
+        after = apply_step(df, step)
+    commit(df, after, label or step["op"], step)
+    return after
+
+
+def run_step(df, name, label=None, **params):
+    """Fit pipeline op ``name`` on ``df``, apply it and record it."""
+    with span(f"fit {name}"):
+        step = make_step(name, df, **params)
+    return apply_and_commit(df, step, label)
+
+
+def get_pipeline():
+    return Pipeline(get_history().steps)
+
+
+def append_rows(rows, label="append rows"):
+    """Append raw ``rows`` to the dataset after replaying the recorded steps on them.
+
+    Only the new rows are transformed, with the encoders and fill values
+    fitted on the earlier data. A split of the current version is carried
+    over (see :func:`utils.splits.extend`). Returns the rows appended.
+    """
+    before = get_df()
+    with span("replay pipeline on new rows", rows=len(rows)):
+        new = get_pipeline().apply(rows)
+    with span("append rows", rows=len(new)):
+        after = concat_rows(before, new)
+    split = st.session_state.get("split")
+    source = get_handle().key
+    commit(before, after, label)
+    if is_valid(split) and split.get("source") == source:
+        _extend_split(split, len(before))
+    return len(after) - len(before)
+
+
+def _extend_split(split, n_old):
+    from utils.model_cache import split_fingerprint
+
+    columns = [split["target"]] + [
+        c for c in (split.get("group_column"), split.get("order_column")) if c
+    ]
+    df = get_df(columns=columns)
+    with span("extend split", rows=len(df) - n_old):
+        extended = extend(
+            split,
+            get_handle(),
+            n_old,
+            y=df[split["target"]].to_numpy(),
+            groups=(
+                df[split["group_column"]].to_numpy()
+                if split.get("group_column")
+                else None
+            ),
+            order=(
+                df[split["order_column"]].to_numpy()
+                if split.get("order_column")
+                else None
+            ),
+        )
+    # Rows from ``new_from`` on are new to models trained on ``base_fingerprint``;
+    # batches appended since the last training stay new
+    fingerprint = split_fingerprint(split)
+    last = st.session_state.get("last_model")
+    if split.get("new_from") is None or (last and last["fingerprint"] == fingerprint):
+        extended["new_from"], extended["base_fingerprint"] = n_old, fingerprint
+    release(split)
+    st.session_state["split"] = extended
+    store.claim(session_id(), "split", extended["dataset"])
+
+
+def undo():
+    history = get_history()
+    return _move(history.undo, history.undo_stack, history.redo_stack)
+
+
+def redo():
+    history = get_history()
+    return _move(history.redo, history.redo_stack, history.undo_stack)
+
+
+def _move(step, source, target):
+    """Apply one undo/redo ``step`` moving an entry from ``source`` to ``target``.
+
+    If the resulting version can't be saved the entry is moved back, so the
+    stacks still match the unchanged data, and the error is re-raised.
+    """
+    history = get_history()
+    df = step(get_df())
+    if df is None:
+        return False
+    try:
+        set_df(df)
+    except Exception:
+        source.append(target.pop())
+        raise
+    history.version = get_handle().key
+    return True
+
+
+# --- Train/test split ---
+def has_split():
+    split = st.session_state.get("split")
+    store.claim(session_id(), "split", split["dataset"] if is_valid(split) else None)
+    return is_valid(split)
+
+
+def set_split(target, features, group_column=None, order_column=None, **options):
+    """Split the current dataset; session state only keeps row indices.
+
+    ``options`` are passed to :func:`utils.splits.make_split`; the group and
+    order column names are kept to split rows appended later the same way.
+    """
+    with span("make split", method=options.get("method", "Random")):
+        split = make_split(get_handle(), target, features, **options)
+    split["group_column"], split["order_column"] = group_column, order_column
+    # Sparse one-hot columns stay as codes until a model is trained
+    from utils.sparse import sparse_columns
+
+    split["sparse"] = sparse_columns(get_pipeline().steps, features)
+    release(st.session_state.get("split"))
+    st.session_state["split"] = split
+    store.claim(session_id(), "split", split["dataset"])
+    return split
+
+
+def get_split(columns=None, fold=None):
+    with span("load split", fold=fold):
+        return materialize(st.session_state["split"], fold, columns)
+
+
+# --- Trained model ---
+def set_model(model, model_name, task, X_train, y_train):
+    """Bundle the model with the recorded pipeline and save it for batch scoring."""
+    from utils.scoring import ModelBundle
+
+    bundle = ModelBundle(
+        model,
+        model_name,
+        task,
+        features=list(X_train.columns),
+        target=y_train.name,
+        steps=get_pipeline().steps,
+    )
+    os.makedirs(store.STORE_DIR, exist_ok=True)
+    path = os.path.join(store.STORE_DIR, f"bundle-{uuid.uuid4().hex}.joblib")
+    bundle.save(path)
+
+    old = st.session_state.get("model_bundle")
+    if old and os.path.exists(old):
+        os.remove(old)
+    st.session_state["model_bundle"] = path
+    return path
+
+
+def get_model_path():
+    path = st.session_state.get("model_bundle")
+    return path if path and os.path.exists(path) else None
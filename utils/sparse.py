@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+def sparse_columns(steps, columns=None):
+    """Columns holding sparse one-hot codes after replaying ``steps``."""
+    found = []
+    for step in steps:
+        column = step.get("column")
+        if step["op"] == "one_hot_sparse" and column not in found:
+            found.append(column)
+        elif step["op"] == "rename_column" and column in found:
+            found[found.index(column)] = step["new_name"]
+        elif step["op"] == "drop_column" and column in found:
+            found.remove(column)
+    if columns is not None:
+        found = [c for c in found if c in columns]
+    return found
+
+
+def with_sparse(params, split):
+    """Model parameters plus the split's sparse one-hot columns, if any."""
+    params = dict(params or {})
+    if split.get("sparse"):
+        params["sparse_columns"] = list(split["sparse"])
+    return params
+
+
+class OneHotCodes(TransformerMixin, BaseEstimator):
+    """Expand category-coded columns into one-hot indicators.
+
+    With ``sparse=True`` the output is a CSR matrix: the other columns as
+    they are, followed by one indicator per category of each coded column,
+    never materialised densely. Models that can't take sparse input get
+    ``sparse=False`` and see the integer codes instead.
+    """
+
+    def __init__(self, columns=(), sparse=True):
+        self.columns = columns
+        self.sparse = sparse
+
+    def fit(self, X, y=None):
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.categories_ = {}
+        for column in self.columns:
+            s = X[column]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                categories = s.cat.categories
+            else:
+                categories = pd.Categorical(s).categories
+            self.categories_[column] = list(categories)
+        self.other_ = [c for c in X.columns if c not in self.categories_]
+        return self
+
+    def _codes(self, X, column):
+        # Values outside the fitted categories (and nulls) get -1: no indicator
+        return pd.Categorical(X[column], categories=self.categories_[column]).codes
+
+    def transform(self, X):
+        if not self.sparse:
+            out = X[self.other_].copy()
+            for column in self.categories_:
+                out[column] = self._codes(X, column)
+            return out
+
+        n = len(X)
+        blocks = []
+        if self.other_:
+            blocks.append(sp.csr_matrix(X[self.other_].to_numpy(dtype="float64")))
+        for column, categories in self.categories_.items():
+            codes = self._codes(X, column)
+            rows = np.flatnonzero(codes >= 0)
+            blocks.append(
+                sp.csr_matrix(
+                    (np.ones(len(rows)), (rows, codes[rows])),
+                    shape=(n, len(categories)),
+                )
+            )
+        return sp.hstack(blocks, format="csr")
+
+    def get_feature_names_out(self, input_features=None):
+        if not self.sparse:
+            return np.asarray(self.other_ + list(self.categories_), dtype=object)
+        names = list(self.other_)
+        for column, categories in self.categories_.items():
+            names += [f"{column}_{c}" for c in categories]
+        return np.asarray(names, dtype=object)
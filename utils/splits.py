@@ -0,0 +1,224 @@
+import dataclasses
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+from utils import dataset_store as store
+
+METHODS = ["Random", "Stratified", "Group", "Time series"]
+
+
+# --- Pinning the split's dataset version ---
+def pin(handle):
+    """A persistent copy of ``handle`` that later edits of the dataset can't delete.
+
+    The copy is a hard link to the same file when the filesystem allows it,
+    so pinning costs no disk space or copying.
+    """
+    if handle.persistent:
+        return handle
+    key = uuid.uuid4().hex
+    path = os.path.join(store.STORE_DIR, key + os.path.splitext(handle.path)[1])
+    try:
+        os.link(handle.path, path)
+    except OSError:
+        shutil.copyfile(handle.path, path)
+    return dataclasses.replace(handle, key=key, path=path, persistent=True)
+
+
+def release(split):
+    """Delete the pinned dataset version of a split that is no longer used."""
+    if split and split.get("pinned") and store.exists(split["dataset"]):
+        store.delete(split["dataset"])
+
+
+# --- Building indices ---
+def _compact(idx):
+    return np.asarray(idx, dtype=np.int32 if len(idx) < 2**31 else np.int64)
+
+
+def holdout(
+    n_rows,
+    method="Random",
+    test_size=0.2,
+    random_state=42,
+    y=None,
+    groups=None,
+    order=None,
+):
+    """Train and test row positions for one holdout split.
+
+    ``Stratified`` keeps the class proportions of ``y``, ``Group`` keeps
+    every group of ``groups`` on one side and ``Time series`` tests on the
+    last rows by ``order`` (row order when None). Positions are sorted, so
+    selecting them reads the stored columns front to back.
+    """
+    from sklearn.model_selection import GroupShuffleSplit, train_test_split
+
+    positions = np.arange(n_rows)
+    if method == "Time series":
+        if order is not None:
+            positions = np.argsort(np.asarray(order), kind="stable")
+        cut = int(round(n_rows * (1 - test_size)))
+        # Kept in time order, so the folds below can only look back
+        return _compact(positions[:cut]), _compact(positions[cut:])
+    if method == "Group":
+        splitter = GroupShuffleSplit(
+            n_splits=1, test_size=test_size, random_state=random_state
+        )
+        train, test = next(splitter.split(positions, groups=groups))
+    else:
+        train, test = train_test_split(
+            positions,
+            test_size=test_size,
+            random_state=random_state,
+            stratify=y if method == "Stratified" else None,
+        )
+    return _compact(np.sort(train)), _compact(np.sort(test))
+
+
+def kfold(train, n_folds, method="Random", random_state=42, y=None, groups=None):
+    """Cross-validation folds over the training positions, as (fit, validate) pairs."""
+    from sklearn.model_selection import (
+        GroupKFold,
+        KFold,
+        StratifiedKFold,
+        TimeSeriesSplit,
+    )
+
+    if method == "Stratified":
+        splitter = StratifiedKFold(n_folds, shuffle=True, random_state=random_state)
+    elif method == "Group":
+        splitter = GroupKFold(n_folds)
+    elif method == "Time series":
+        splitter = TimeSeriesSplit(n_folds)
+    else:
+        splitter = KFold(n_folds, shuffle=True, random_state=random_state)
+
+    y = None if y is None else np.asarray(y)[train]
+    groups = None if groups is None else np.asarray(groups)[train]
+    folds = []
+    for fit, validate in splitter.split(train, y, groups):
+        fit, validate = train[fit], train[validate]
+        if method != "Time series":
+            fit, validate = np.sort(fit), np.sort(validate)
+        folds.append((_compact(fit), _compact(validate)))
+    return folds
+
+
+def make_split(
+    handle,
+    target,
+    features,
+    method="Random",
+    test_size=0.2,
+    random_state=42,
+    n_folds=0,
+    y=None,
+    groups=None,
+    order=None,
+):
+    """An index-based split over a pinned version of ``handle``.
+
+    Only row positions are kept; the frames are selected from the shared,
+    memory-mapped dataset when a model is trained (see :func:`materialize`).
+    """
+    train, test = holdout(
+        handle.n_rows, method, test_size, random_state, y, groups, order
+    )
+    folds = []
+    if n_folds >= 2:
+        folds = kfold(train, n_folds, method, random_state, y, groups)
+    return {
+        "dataset": pin(handle),
+        "pinned": not handle.persistent,
+        # The version the split was made on, before pinning
+        "source": handle.key,
+        "features": list(features),
+        "target": target,
+        "method": method,
+        "options": {
+            "test_size": test_size,
+            "random_state": random_state,
+            "n_folds": n_folds,
+        },
+        "train": train,
+        "test": test,
+        "folds": folds,
+        "sparse": [],
+    }
+
+
+def extend(split, handle, n_old, y=None, groups=None, order=None):
+    """``split`` carried over to ``handle``, whose first ``n_old`` rows are its dataset.
+
+    The old rows keep their side, so a model trained on the split has still
+    never seen its test rows; the new rows are split with the same method
+    and test size, and the folds are rebuilt over the grown training set.
+    ``y``, ``groups`` and ``order`` cover all rows of ``handle``.
+    """
+    options = split["options"]
+    n_new = handle.n_rows - n_old
+
+    def new_rows(values):
+        return None if values is None else np.asarray(values)[n_old:]
+
+    try:
+        train, test = holdout(
+            n_new,
+            split["method"],
+            options["test_size"],
+            options["random_state"],
+            new_rows(y),
+            new_rows(groups),
+            new_rows(order),
+        )
+    except ValueError:
+        # Too few new rows for the method (e.g. a class with a single row)
+        train, test = np.arange(n_new), np.arange(0)
+    train = _compact(np.concatenate([split["train"], train + n_old]))
+    test = _compact(np.concatenate([split["test"], test + n_old]))
+
+    folds = []
+    if options["n_folds"] >= 2:
+        folds = kfold(
+            train,
+            options["n_folds"],
+            split["method"],
+            options["random_state"],
+            y,
+            groups,
+        )
+    return {
+        **split,
+        "dataset": pin(handle),
+        "pinned": not handle.persistent,
+        "source": handle.key,
+        "train": train,
+        "test": test,
+        "folds": folds,
+    }
+
+
+# --- Reading ---
+def is_valid(split):
+    return split is not None and store.exists(split.get("dataset"))
+
+
+def materialize(split, fold=None, columns=None):
+    """``X_train, X_test, y_train, y_test`` of the holdout or of fold ``fold``.
+
+    For a fold, "test" is the fold's validation part of the training rows.
+    ``columns=[]`` selects only the target, e.g. to score predictions.
+    """
+    features = list(split["features"] if columns is None else columns)
+    target = split["target"]
+    df = store.load_cached(split["dataset"], features + [target])
+    if fold is None:
+        train, test = split["train"], split["test"]
+    else:
+        train, test = split["folds"][fold]
+    X, y = df[features], df[target]
+    return X.iloc[train], X.iloc[test], y.iloc[train], y.iloc[test]
@@ -0,0 +1,131 @@
+import multiprocessing as mp
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Below this many rows a process pool costs more than it saves
+PARALLEL_MIN_ROWS = 200_000
+PREVIEW_ROWS = 200
+
+
+@lru_cache(maxsize=64)
+def compile_pattern(pattern):
+    """Compile ``pattern`` once; raises ValueError with the regex error message."""
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid regex: {e}") from None
+
+
+# --- Vectorized kernels (one chunk each) ---
+def _extract(s, pattern, names):
+    out = s.astype("string").str.extract(compile_pattern(pattern), expand=True)
+    out.columns = names
+    return out
+
+
+def _split(s, delimiter, names):
+    out = s.astype("string").str.split(
+        delimiter, n=len(names) - 1, expand=True, regex=False
+    )
+    out = out.reindex(columns=range(len(names)))
+    out.columns = names
+    return out
+
+
+def _keywords(s, mapping, default, case, name):
+    text = s.astype("string")
+    if not case:
+        text = text.str.lower()
+    # First matching keyword wins, in the order given; no match -> default,
+    # missing values stay missing
+    masks = [
+        text.str.contains(k if case else k.lower(), regex=False)
+        .fillna(False)
+        .to_numpy(bool)
+        for k in mapping
+    ]
+    codes = np.select(masks, np.arange(len(masks)), default=-1) if masks else -1
+    labels = np.array(list(mapping.values()) + [default], dtype=object)
+    values = labels[np.broadcast_to(codes, len(s))]
+    values[s.isna().to_numpy()] = None
+    return pd.DataFrame({name: values}, index=s.index)
+
+
+_KERNELS = {"extract": _extract, "split": _split, "keywords": _keywords}
+
+
+def _run_chunk(args):
+    kind, chunk, params = args
+    return _KERNELS[kind](chunk, **params)
+
+
+def _run(kind, s, n_jobs=1, chunksize=100_000, **params):
+    """Run a kernel over ``s``, in chunks across processes for large columns."""
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and len(s) >= PARALLEL_MIN_ROWS:
+        chunks = [s.iloc[i : i + chunksize] for i in range(0, len(s), chunksize)]
+        # Spawned, not forked: forking the threaded Streamlit server can deadlock
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, mp_context=mp.get_context("spawn")
+        ) as pool:
+            parts = list(pool.map(_run_chunk, [(kind, c, params) for c in chunks]))
+        return pd.concat(parts)
+    return _KERNELS[kind](s, **params)
+
+
+# --- Public API ---
+def extract(s, pattern, names, n_jobs=1):
+    """Regex groups of ``pattern`` as new columns ``names``."""
+    if compile_pattern(pattern).groups != len(names):
+        raise ValueError("Number of groups does not match number of new column names")
+    return _run("extract", s, n_jobs, pattern=pattern, names=list(names))
+
+
+def split(s, delimiter, names, n_jobs=1):
+    """Split on a literal ``delimiter`` into ``len(names)`` columns; the last keeps the rest."""
+    if not delimiter:
+        raise ValueError("Delimiter must not be empty")
+    if len(names) < 2:
+        raise ValueError("Give at least two new column names")
+    return _run("split", s, n_jobs, delimiter=delimiter, names=list(names))
+
+
+def keyword_map(s, mapping, name, default=None, case=False, n_jobs=1):
+    """Label each value by the first keyword of ``mapping`` it contains."""
+    return _run(
+        "keywords",
+        s,
+        n_jobs,
+        mapping=dict(mapping),
+        default=default,
+        case=case,
+        name=name,
+    )
+
+
+def preview(s, n=PREVIEW_ROWS):
+    """A small, non-empty sample of ``s`` for live previews."""
+    non_null = s.dropna()
+    return (non_null if len(non_null) else s).head(n)
+
+
+def parse_mapping(text):
+    """Parse ``keyword: label`` lines (or ``keyword=label``) into an ordered dict."""
+    mapping = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        sep = ":" if ":" in line else "="
+        if sep not in line:
+            raise ValueError(f"Expected 'keyword: label', got {line.strip()!r}")
+        keyword, label = line.split(sep, 1)
+        if not keyword.strip():
+            raise ValueError(f"Empty keyword in {line.strip()!r}")
+        mapping[keyword.strip()] = label.strip()
+    return mapping
@@ -0,0 +1,278 @@
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.leaderboard import score
+from utils.models import SPARSE_MODELS, make_model, set_n_jobs
+
+# --- Search spaces ---
+# Each parameter is declared as one of:
+#   {"type": "int", "low": 2, "high": 32, "log": False}
+#   {"type": "float", "low": 1e-3, "high": 1e2, "log": True}
+#   {"type": "choice", "values": [...]}
+_TREE = {
+    "max_depth": {"type": "choice", "values": [None, 3, 5, 8, 12, 20, 40]},
+    "min_samples_leaf": {"type": "int", "low": 1, "high": 50, "log": True},
+}
+_FOREST = {
+    "n_estimators": {"type": "int", "low": 50, "high": 500, "log": True},
+    "max_features": {"type": "choice", "values": ["sqrt", "log2", 0.5, 1.0]},
+    **_TREE,
+}
+_XGB = {
+    "learning_rate": {"type": "float", "low": 0.01, "high": 0.3, "log": True},
+    "max_depth": {"type": "int", "low": 2, "high": 10},
+    "min_child_weight": {"type": "float", "low": 1, "high": 20, "log": True},
+    "subsample": {"type": "float", "low": 0.5, "high": 1.0},
+    "colsample_bytree": {"type": "float", "low": 0.5, "high": 1.0},
+}
+SEARCH_SPACES = {
+    "Logistic Regression": {
+        "C": {"type": "float", "low": 1e-3, "high": 1e2, "log": True}
+    },
+    "Decision Tree": {
+        "criterion": {"type": "choice", "values": ["gini", "entropy"]},
+        **_TREE,
+    },
+    "Random Forest": _FOREST,
+    "SVM": {
+        "C": {"type": "float", "low": 1e-2, "high": 1e2, "log": True},
+        "gamma": {"type": "choice", "values": ["scale", "auto"]},
+        "kernel": {"type": "choice", "values": ["rbf", "linear"]},
+    },
+    "Linear SVM": {"C": {"type": "float", "low": 1e-3, "high": 1e2, "log": True}},
+    "SGD Classifier": {
+        "alpha": {"type": "float", "low": 1e-6, "high": 1e-1, "log": True},
+        "loss": {"type": "choice", "values": ["hinge", "log_loss", "modified_huber"]},
+    },
+    "XGBoost": _XGB,
+    "Linear Regression": {"fit_intercept": {"type": "choice", "values": [True, False]}},
+    "Decision Tree Regressor": _TREE,
+    "Random Forest Regressor": _FOREST,
+    "SVM Regressor": {
+        "C": {"type": "float", "low": 1e-2, "high": 1e2, "log": True},
+        "epsilon": {"type": "float", "low": 1e-3, "high": 1.0, "log": True},
+        "gamma": {"type": "choice", "values": ["scale", "auto"]},
+    },
+    "Linear SVM Regressor": {
+        "C": {"type": "float", "low": 1e-3, "high": 1e2, "log": True},
+        "epsilon": {"type": "float", "low": 1e-3, "high": 1.0, "log": True},
+    },
+    "SGD Regressor": {
+        "alpha": {"type": "float", "low": 1e-6, "high": 1e-1, "log": True},
+        "loss": {"type": "choice", "values": ["squared_error", "huber"]},
+    },
+    "XGBoost Regressor": _XGB,
+}
+# Boosting runs up to this many rounds and stops early on a held-out slice
+XGB_MAX_ROUNDS = 2000
+XGB_EARLY_STOPPING = 50
+
+
+def sample_params(space, rng):
+    params = {}
+    for name, spec in space.items():
+        kind = spec["type"]
+        if kind == "choice":
+            params[name] = spec["values"][rng.integers(len(spec["values"]))]
+        elif kind in ("int", "float"):
+            low, high = spec["low"], spec["high"]
+            if spec.get("log"):
+                value = math.exp(rng.uniform(math.log(low), math.log(high)))
+            else:
+                value = rng.uniform(low, high)
+            params[name] = int(round(value)) if kind == "int" else float(value)
+        else:
+            raise ValueError(f"Unknown parameter type '{kind}' for {name}")
+    return params
+
+
+def _is_xgb(name):
+    return name.startswith("XGBoost")
+
+
+# --- Single evaluation ---
+def evaluate(task, name, params, X, y, X_val, y_val, n_jobs=1, random_state=0):
+    """Fit ``name`` with ``params`` on ``X``/``y`` and score it on the validation set."""
+    start = time.perf_counter()
+    params = dict(params)
+    fit_kwargs = {}
+    if _is_xgb(name):
+        # Early stopping on the last 10% of the rung's rows
+        cut = max(1, int(len(y) * 0.9))
+        X, X_stop, y, y_stop = X[:cut], X[cut:], y[:cut], y[cut:]
+        params.update(
+            n_estimators=XGB_MAX_ROUNDS, early_stopping_rounds=XGB_EARLY_STOPPING
+        )
+        fit_kwargs = {"eval_set": [(X_stop, y_stop)], "verbose": False}
+    model = make_model(name, **params)
+    set_n_jobs(model, n_jobs)
+    model.fit(X, y, **fit_kwargs)
+    result = score(task, y_val, model.predict(X_val))
+    trial = {
+        "score": result["accuracy" if task == "Classification" else "R²"],
+        "seconds": time.perf_counter() - start,
+    }
+    if _is_xgb(name):
+        trial["n_estimators"] = int(model.best_iteration) + 1
+    return trial
+
+
+# --- Successive halving / Hyperband ---
+def hyperband(
+    task,
+    name,
+    X_train,
+    y_train,
+    space=None,
+    budget_seconds=300,
+    eta=3,
+    min_resource=None,
+    max_candidates=81,
+    validation_fraction=0.2,
+    n_jobs=-1,
+    random_state=42,
+    sparse_columns=None,
+    callback=None,
+):
+    """Hyperband search over ``space`` within a wall-clock budget.
+
+    The resource is the number of training rows: every bracket starts many
+    random candidates on a small subsample and keeps the best ``1 / eta`` at
+    each rung while growing the subsample ``eta`` times, ending on all rows.
+    Candidates of a rung are fitted in parallel across cores (joblib). The
+    budget is checked before every rung, so the search stops shortly after
+    it runs out and returns the best configuration found so far, preferring
+    scores measured on more data.
+
+    ``sparse_columns`` are one-hot expanded once up front, so every trial
+    trains on the same (CSR) matrix. ``callback(trials)`` is called after
+    every rung with the list of trials.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import train_test_split
+
+    space = SEARCH_SPACES.get(name, {}) if space is None else space
+    rng = np.random.default_rng(random_state)
+    deadline = time.perf_counter() + budget_seconds
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+
+    if sparse_columns:
+        from utils.sparse import OneHotCodes
+
+        encoder = OneHotCodes(list(sparse_columns), sparse=name in SPARSE_MODELS)
+        X_train = encoder.fit_transform(X_train)
+    if not hasattr(X_train, "dtypes"):
+        X = X_train
+    elif all(pd.api.types.is_numeric_dtype(t) for t in X_train.dtypes):
+        X = np.asarray(X_train)
+    else:
+        X = X_train
+    y = np.asarray(y_train)
+    stratify = (
+        y
+        if task == "Classification" and pd.Series(y).value_counts().min() >= 2
+        else None
+    )
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X,
+        y,
+        test_size=validation_fraction,
+        random_state=random_state,
+        stratify=stratify,
+    )
+    # Shuffle once so every rung's subsample is simply a prefix
+    order = rng.permutation(len(y_fit))
+    X_fit = X_fit.iloc[order] if hasattr(X_fit, "iloc") else X_fit[order]
+    y_fit = y_fit[order]
+
+    R = len(y_fit)
+    min_resource = min_resource or max(100, R // eta**4)
+    s_max = max(0, int(math.floor(math.log(max(R / min_resource, 1), eta))))
+    max_candidates = max(1, max_candidates)
+    trials = []
+    finished = set()
+    parallel = Parallel(n_jobs=n_jobs)
+    # Models with n_jobs get one core each; the pool provides the parallelism
+    worker_jobs = 1 if n_jobs > 1 else -1
+
+    def run_rung(candidates, resource, bracket, rung):
+        # One batch per core at a time so the budget is checked between batches
+        scores = []
+        for start in range(0, len(candidates), n_jobs):
+            if time.perf_counter() > deadline:
+                break
+            batch = candidates[start : start + n_jobs]
+            results = parallel(
+                delayed(evaluate)(
+                    task,
+                    name,
+                    params,
+                    X_fit[:resource],
+                    y_fit[:resource],
+                    X_val,
+                    y_val,
+                    worker_jobs,
+                )
+                for params in batch
+            )
+            for params, result in zip(batch, results):
+                trials.append(
+                    {
+                        "bracket": bracket,
+                        "rung": rung,
+                        "rows": resource,
+                        **result,
+                        "params": params,
+                    }
+                )
+                scores.append(result["score"])
+            if callback is not None:
+                callback(trials)
+        return scores
+
+    for s in range(s_max, -1, -1):
+        n = min(max_candidates, int(math.ceil((s_max + 1) / (s + 1) * eta**s)))
+        # Configurations already trained on all rows are not worth repeating
+        candidates = [
+            params
+            for key, params in _distinct(sample_params(space, rng) for _ in range(n))
+            if key not in finished
+        ]
+        for i in range(s + 1):
+            if time.perf_counter() > deadline:
+                break
+            resource = R if i == s else int(R * eta ** (i - s))
+            scores = run_rung(candidates, resource, s_max - s, i)
+            candidates = candidates[: len(scores)]
+            if resource == R:
+                finished.update(key for key, _ in _distinct(candidates))
+            keep = max(1, len(candidates) // eta)
+            best = np.argsort(scores)[::-1][:keep]
+            candidates = [candidates[j] for j in best]
+        if time.perf_counter() > deadline:
+            break
+
+    return best_trial(trials), trials
+
+
+def _distinct(candidates):
+    seen = {}
+    for params in candidates:
+        seen.setdefault(repr(sorted(params.items())), params)
+    return list(seen.items())
+
+
+def best_trial(trials):
+    """Best score among the trials run on the most rows."""
+    if not trials:
+        return None
+    most = max(t["rows"] for t in trials)
+    top = max((t for t in trials if t["rows"] == most), key=lambda t: t["score"])
+    params = dict(top["params"])
+    if "n_estimators" in top:
+        params["n_estimators"] = top["n_estimators"]
+    return {**top, "params": params}
@@ -0,0 +1,116 @@
+import importlib.util
+
+import streamlit as st
+
+from utils.pipeline import Pipeline
+from utils.session import (
+    apply_and_commit,
+    get_df,
+    get_history,
+    get_pipeline,
+    redo,
+    undo,
+)
+
+
+# --- Undo / redo ---
+def undo_redo_controls(key):
+    history = get_history()
+
+    col_undo, col_redo, col_info = st.columns([1, 1, 4])
+    undo_label = history.undo_stack[-1].label if history.undo_stack else ""
+    redo_label = history.redo_stack[-1].label if history.redo_stack else ""
+
+    if col_undo.button(
+        "↩️ Undo",
+        key=f"{key}_undo",
+        disabled=not history.undo_stack,
+        help=undo_label or None,
+    ):
+        try:
+            moved = undo()
+        except Exception as e:
+            st.error(f"Undo failed: {e}")
+        else:
+            st.toast(f"Undid: {undo_label}" if moved else "Nothing to undo.")
+            st.rerun()
+
+    if col_redo.button(
+        "↪️ Redo",
+        key=f"{key}_redo",
+        disabled=not history.redo_stack,
+        help=redo_label or None,
+    ):
+        try:
+            moved = redo()
+        except Exception as e:
+            st.error(f"Redo failed: {e}")
+        else:
+            if moved:
+                st.toast(f"Redid: {redo_label}")
+            st.rerun()
+
+    col_info.caption(
+        f"{len(history.undo_stack)} undo / {len(history.redo_stack)} redo steps · "
+        f"{history.nbytes / 1024**2:.1f} MB in memory, {history.n_spilled} on disk"
+    )
+
+    with st.expander("Undo settings"):
+        history.budget_mb = st.number_input(
+            "Undo memory budget (MB)",
+            min_value=0.0,
+            value=float(history.budget_mb),
+            step=64.0,
+            key=f"{key}_undo_budget",
+            help="Older steps beyond this budget are moved to disk.",
+        )
+
+
+# --- Recorded pipeline ---
+def pipeline_controls(key):
+    pipeline = get_pipeline()
+    with st.expander(f"📜 Recorded pipeline ({len(pipeline)} steps)"):
+        st.caption(
+            "Every applied action is stored as a step. Export it and replay it "
+            "on new files with `python cli.py run-pipeline pipeline.json data/*.csv`."
+        )
+        if len(pipeline):
+            st.json(pipeline.to_dict(), expanded=False)
+            col_json, col_yaml = st.columns(2)
+            col_json.download_button(
+                "⬇️ Export JSON",
+                pipeline.to_json(),
+                file_name="pipeline.json",
+                mime="application/json",
+                key=f"{key}_pipeline_json",
+            )
+            if importlib.util.find_spec("yaml") is not None:
+                # Built only when the button is clicked
+                col_yaml.download_button(
+                    "⬇️ Export YAML",
+                    pipeline.to_yaml,
+                    file_name="pipeline.yaml",
+                    mime="text/yaml",
+                    key=f"{key}_pipeline_yaml",
+                )
+            else:
+                col_yaml.caption("Install PyYAML to export YAML.")
+
+        uploaded = st.file_uploader(
+            "Replay a saved pipeline on the current data",
+            type=["json", "yaml", "yml"],
+            key=f"{key}_pipeline_file",
+        )
+        if uploaded is not None and st.button(
+            "▶️ Replay pipeline", key=f"{key}_pipeline_replay"
+        ):
+            try:
+                fmt = "json" if uploaded.name.endswith(".json") else "yaml"
+                loaded = Pipeline.from_text(uploaded.getvalue().decode("utf-8"), fmt)
+                df = get_df()
+                for step in loaded.steps:
+                    df = apply_and_commit(df, step, f"Replay: {step['op']}")
+                st.toast(f"Replayed {len(loaded)} steps")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Could not replay pipeline: {e}")